@@ -0,0 +1,33 @@
+"""
+NumPy structured arrays of table columns, for vectorised reads and bulk insertion.
+
+Nullable integer and boolean columns are carried as float64 fields in which NULL is
+NaN, and datetimes as datetime64 in which NULL is NaT. `CosmicDB_Engine.bulk_insert`
+inserts NaN back as NULL.
+"""
+from datetime import datetime
+
+
+def structured_dtype(columns: list):
+    """
+    The NumPy structured dtype for the SQLAlchemy columns: int64, float64 and bool
+    (float64 when nullable, NULL being NaN), datetime64[us], fixed-width unicode for
+    bounded strings and objects otherwise.
+    """
+    import numpy
+
+    fields = []
+    for col in columns:
+        python_type = col.type.python_type
+        if python_type in [int, bool]:
+            field_dtype = numpy.float64 if col.nullable else (numpy.int64 if python_type == int else numpy.bool_)
+        elif python_type == float:
+            field_dtype = numpy.float64
+        elif python_type == datetime:
+            field_dtype = "datetime64[us]"
+        elif python_type == str and getattr(col.type, "length", None) is not None and not col.nullable:
+            field_dtype = f"U{col.type.length}"
+        else:
+            field_dtype = object
+        fields.append((col.name, field_dtype))
+    return numpy.dtype(fields)
@@ -0,0 +1,81 @@
+"""
+Bloom filters, for compact probabilistic set membership.
+
+A filter never reports that it lacks a value that was added, and reports that it may
+contain a value that was not added at about the false-positive rate it was sized for.
+Values are hashed by their string form with BLAKE2b, so that filters are stable across
+processes and can be cached. Values of different types hash differently (e.g. `5` and
+`5.0`), so normalise them to a single type on adding and on testing alike.
+"""
+import base64
+import hashlib
+import math
+
+
+class CosmicDB_BloomFilter:
+    def __init__(self, bit_count: int, hash_count: int, bits: bytearray = None):
+        """
+        Parameters
+        ----------
+        bit_count: int
+            The number of bits in the filter.
+        hash_count: int
+            The number of bits set per value.
+        bits: bytearray
+            The filter's bits, defaults to none set.
+        """
+        assert bit_count > 0 and hash_count > 0, "A Bloom filter requires a positive bit count and hash count."
+        self.bit_count = bit_count
+        self.hash_count = hash_count
+        self.bits = bytearray((bit_count + 7)//8) if bits is None else bits
+        assert len(self.bits) == (bit_count + 7)//8, f"Expected {(bit_count + 7)//8} bytes of bits, not {len(self.bits)}."
+
+    @classmethod
+    def for_capacity(cls, capacity: int, false_positive_rate: float = 0.01):
+        """An empty filter sized for the false-positive rate once `capacity` values are added."""
+        if not 0 < false_positive_rate < 1:
+            raise ValueError(f"The false-positive rate must be within (0, 1), not {false_positive_rate}.")
+        capacity = max(1, capacity)
+        bit_count = max(8, math.ceil(-capacity*math.log(false_positive_rate)/math.log(2)**2))
+        return cls(bit_count, max(1, round(bit_count/capacity*math.log(2))))
+
+    def _positions(self, value):
+        # double hashing, from the two halves of a single digest
+        digest = hashlib.blake2b(str(value).encode(), digest_size=16).digest()
+        hash_a = int.from_bytes(digest[:8], "little")
+        hash_b = int.from_bytes(digest[8:], "little") | 1
+        return [
+            (hash_a + hash_index*hash_b) % self.bit_count
+            for hash_index in range(self.hash_count)
+        ]
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def update(self, values):
+        for value in values:
+            self.add(value)
+
+    def might_contain(self, value) -> bool:
+        """False only if the value was never added."""
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(value)
+        )
+
+    def to_dict(self) -> dict:
+        """A JSON-serialisable representation, see `from_dict`."""
+        return {
+            "bit_count": self.bit_count,
+            "hash_count": self.hash_count,
+            "bits": base64.b64encode(bytes(self.bits)).decode(),
+        }
+
+    @classmethod
+    def from_dict(cls, filter_dict: dict):
+        return cls(
+            filter_dict["bit_count"],
+            filter_dict["hash_count"],
+            bytearray(base64.b64decode(filter_dict["bits"]))
+        )
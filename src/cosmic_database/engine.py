@@ -1,24 +1,233 @@
 import os
+import json
 import yaml
+import time
+import heapq
+import hashlib
+import queue
+import threading
+import concurrent.futures
+from collections import OrderedDict
 from datetime import datetime
 
 import sqlalchemy
 
 from cosmic_database import entities
+from cosmic_database import sky
+from cosmic_database import arrays
+from cosmic_database import hit_windows
+from cosmic_database import rollups
+from cosmic_database import value_tables
+from cosmic_database import planning
+from cosmic_database import federation
+
+
+def _column_is_generated(column) -> bool:
+    """Whether an unset value of the column is generated: an autoincremented primary key or a callable default."""
+    return column.primary_key or (column.default is not None and column.default.is_callable)
+
+
+class CosmicDB_StatementCache:
+    """
+    A bounded, least-recently-used cache of constructed statements (and other
+    per-entity lookups), keyed by `(kind, ...)` tuples, counting hits and misses per kind.
+    Cached statements use bound parameters so that each shape compiles only once.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._cache = OrderedDict()
+        self._hits = {}
+        self._misses = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple, build):
+        """
+        Returns
+        -------
+        The cached value for the key, calling `build()` to create it on a miss.
+        """
+        kind = key[0]
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self._hits[kind] = self._hits.get(kind, 0) + 1
+                return self._cache[key]
+            self._misses[kind] = self._misses.get(kind, 0) + 1
+
+        value = build()
+        with self._lock:
+            self._cache[key] = value
+            if len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        return value
+
+    def statistics(self) -> dict:
+        """
+        Returns
+        -------
+        dict: the `hits` and `misses` of each kind, along with the cache `size`.
+        """
+        with self._lock:
+            return {
+                "size": len(self._cache),
+                **{
+                    kind: {
+                        "hits": self._hits.get(kind, 0),
+                        "misses": self._misses.get(kind, 0),
+                    }
+                    for kind in set(self._hits.keys()).union(self._misses.keys())
+                }
+            }
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self._hits.clear()
+            self._misses.clear()
+
+
+STATEMENT_CACHE = CosmicDB_StatementCache()
+
+
+class CosmicDB_EngineRegistry:
+    """
+    A process-wide collection of `CosmicDB_Engine` instances, keyed by the
+    engine URL, the scope and the keyword arguments for `sqlalchemy.create_engine`.
+    Shared engines keep their connection pools alive between requests.
+    """
+
+    def __init__(self):
+        self._engines = {}
+        self._request_counts = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(engine_url, scope: entities.DatabaseScope, engine_kwargs: dict):
+        engine_url = sqlalchemy.engine.make_url(engine_url)
+        return (
+            engine_url.render_as_string(hide_password=False),
+            entities.DatabaseScope(scope),
+            tuple(sorted(
+                (key, repr(value))
+                for key, value in engine_kwargs.items()
+            ))
+        )
+
+    def get_engine(self, engine_url, scope: entities.DatabaseScope, **engine_kwargs):
+        """
+        Returns
+        -------
+        CosmicDB_Engine: the registered engine for the arguments, created on first request.
+        """
+        key = self._key(engine_url, scope, engine_kwargs)
+        with self._lock:
+            engine = self._engines.get(key)
+            if engine is None:
+                engine = CosmicDB_Engine(
+                    engine_url = engine_url,
+                    scope = scope,
+                    **engine_kwargs
+                )
+                self._engines[key] = engine
+                self._request_counts[key] = 0
+            self._request_counts[key] += 1
+            return engine
+
+    def dispose(self, engine_url = None, scope: entities.DatabaseScope = None):
+        """
+        Dispose of, and forget, the registered engines. Specifying the `engine_url`
+        and/or `scope` limits the disposal to matching engines.
+        """
+        url_str = None
+        if engine_url is not None:
+            url_str = sqlalchemy.engine.make_url(engine_url).render_as_string(hide_password=False)
+
+        with self._lock:
+            for key in list(self._engines.keys()):
+                if url_str is not None and key[0] != url_str:
+                    continue
+                if scope is not None and key[1] != scope:
+                    continue
+                self._engines.pop(key).dispose()
+                self._request_counts.pop(key)
+
+    def pool_statistics(self) -> list:
+        """
+        Returns
+        -------
+        list of dict: the connection pool statistics of each registered engine,
+        along with the number of times that engine has been requested.
+        """
+        with self._lock:
+            return [
+                {
+                    "url": engine.engine.url.render_as_string(hide_password=True),
+                    "scope": engine.scope.value,
+                    "requests": self._request_counts[key],
+                    **engine.pool_statistics()
+                }
+                for key, engine in self._engines.items()
+            ]
+
+    def __len__(self):
+        return len(self._engines)
+
+
+ENGINE_REGISTRY = CosmicDB_EngineRegistry()
 
 
 class CosmicDB_EngineMultiConfig:
     def __init__(
         self,
-        filepath: str
+        filepath: str,
+        engine_registry: CosmicDB_EngineRegistry = None,
+        discovery_workers: int = 1,
+        discovery_probe_timeout_s: float = None,
+        discovery_timeout_s: float = None,
+        lazy_storage_discovery: bool = False,
+        discovery_cache_dirpath: str = None,
+        discovery_cache_ttl_s: float = 86400,
+        storage_manifest_ttl_s: float = 300
     ):
+        """
+        `discovery_workers > 1` probes the Storage databases concurrently, each within
+        `discovery_probe_timeout_s` and all within `discovery_timeout_s`. `lazy_storage_discovery`
+        defers probing until a filesystem UUID is needed. Discovered maps, and the Storage
+        manifests, are cached under `discovery_cache_dirpath` for `discovery_cache_ttl_s`;
+        a manifest that rules its Storage database out of a plan is validated again once older
+        than `storage_manifest_ttl_s`.
+        """
+        self.engine_registry = ENGINE_REGISTRY if engine_registry is None else engine_registry
+        self.discovery_workers = discovery_workers
+        self.discovery_probe_timeout_s = discovery_probe_timeout_s
+        self.discovery_timeout_s = discovery_timeout_s
         self.operation_engurl = None
-        self.storage_uuid_map_engurl = {}
-        self.storage_label_map_uuid = None
+        self.storage_engurls = []
+        self._storage_uuid_map_engurl = {}
+        self._unresolved_storage_engurls = []
+        # serialises the probing of outstanding Storage databases, e.g. by `fanout_storage` workers
+        self._storage_discovery_lock = threading.RLock()
+        self.storage_label_map_uuid = {}
         self.problematic_storage_engurls = []
 
-        with open(filepath, "r") as yaml_fio:
-            yaml_dict = yaml.safe_load(yaml_fio)
+        with open(filepath, "rb") as yaml_fio:
+            yaml_bytes = yaml_fio.read()
+        yaml_dict = yaml.safe_load(yaml_bytes)
+        self.discovery_cache_filepath = None
+        self.storage_manifest_filepath = None
+        if discovery_cache_dirpath is not None:
+            self.discovery_cache_filepath = os.path.join(
+                discovery_cache_dirpath,
+                f"storage_discovery.{hashlib.sha256(yaml_bytes).hexdigest()}.json"
+            )
+            self.storage_manifest_filepath = os.path.join(
+                discovery_cache_dirpath,
+                f"storage_manifests.{hashlib.sha256(yaml_bytes).hexdigest()}.json"
+            )
+        self.discovery_cache_ttl_s = discovery_cache_ttl_s
+        self.storage_manifest_ttl_s = storage_manifest_ttl_s
+        self._storage_manifests = None
         try:
             assert len(yaml_dict) > 0
             for key, engine_conf in yaml_dict.items():
@@ -32,25 +241,26 @@ class CosmicDB_EngineMultiConfig:
                     if not isinstance(engine_conf, list):
                         engine_conf = [engine_conf]
                     
-                    for engconf in engine_conf:
-                        engurl = sqlalchemy.engine.url.URL.create(
+                    self.storage_engurls += [
+                        sqlalchemy.engine.url.URL.create(
                             **engconf
                         )
-                        try:
-                            storage_dbinfo = CosmicDB_Engine(
-                                engine_url = engurl,
-                                scope = engscope
-                            ).select_entity(entities.CosmicDB_StorageDatabaseInfo)
-                            assert storage_dbinfo is not None, f"{engurl} has no StorageDatabaseInfo record."
-
-                            self.storage_uuid_map_engurl[storage_dbinfo.filesystem_uuid] = engurl
-                        except BaseException as err:
-                            print(f"Failed to access CosmicDB_StorageDatabaseInfo.filesystem_uuid at {engurl}:\n{err}")
-                            self.problematic_storage_engurls.append(engurl)
+                        for engconf in engine_conf
+                    ]
 
         except ValueError as err:
             raise ValueError(f"Expecting a Multi-scope engine configuration YAML: {filepath}.") from err
 
+        self._unresolved_storage_engurls = list(self.storage_engurls)
+        cache_loaded = self._load_discovery_cache()
+        if lazy_storage_discovery:
+            # labels are resolved on demand by `_get_fs_uuid_by_label`
+            return
+
+        self._resolve_storage_engurls(self._unresolved_storage_engurls)
+        if cache_loaded:
+            return
+
         if self.operation_engurl is not None:
             # populate the storage_label_map_uuid
             with self.get_operation_dbengine().session() as session:
@@ -61,10 +271,321 @@ class CosmicDB_EngineMultiConfig:
                         sqlalchemy.select(
                             entities.CosmicDB_Filesystem
                         ).where(
-                            entities.CosmicDB_Filesystem.uuid in list(self.storage_uuid_map_engurl.keys())
+                            entities.CosmicDB_Filesystem.uuid.in_(list(self._storage_uuid_map_engurl.keys()))
                         )
                     ).all()
                 }
+            self._save_discovery_cache()
+
+    def _get_filesystem_mount_latest_start(self):
+        if self.operation_engurl is None:
+            return None
+        with self.get_operation_dbengine().session() as session:
+            latest_start = session.scalar(
+                sqlalchemy.select(
+                    sqlalchemy.func.max(entities.CosmicDB_FilesystemMount.start)
+                )
+            )
+        return None if latest_start is None else latest_start.isoformat()
+
+    def _load_discovery_cache(self) -> bool:
+        """Populate the UUID and label maps from a valid discovery cache file, returning whether it was loaded."""
+        if self.discovery_cache_filepath is None or not os.path.exists(self.discovery_cache_filepath):
+            return False
+        try:
+            with open(self.discovery_cache_filepath, "r") as cache_fio:
+                cache = json.load(cache_fio)
+            if time.time() - cache["created_unix"] > self.discovery_cache_ttl_s:
+                return False
+            if cache["filesystem_mount_latest_start"] != self._get_filesystem_mount_latest_start():
+                return False
+
+            for fs_uuid, engurl_index in cache["storage_uuid_map_index"].items():
+                engurl = self.storage_engurls[engurl_index]
+                self._storage_uuid_map_engurl[fs_uuid] = engurl
+                self._unresolved_storage_engurls.remove(engurl)
+            self.storage_label_map_uuid.update(cache["storage_label_map_uuid"])
+        except BaseException as err:
+            print(f"Disregarding storage discovery cache {self.discovery_cache_filepath}: {err}")
+            self._storage_uuid_map_engurl.clear()
+            self._unresolved_storage_engurls = list(self.storage_engurls)
+            self.storage_label_map_uuid.clear()
+            return False
+        self._discovery_cache_created_unix = cache["created_unix"]
+        self._discovery_cache_filesystem_mount_latest_start = cache["filesystem_mount_latest_start"]
+        return True
+
+    def _save_discovery_cache(self):
+        """
+        Write the UUID and label maps to the discovery cache file. Engine URLs are recorded
+        by their index in the configuration so that no credentials are written.
+        """
+        if self.discovery_cache_filepath is None:
+            return
+        if not hasattr(self, "_discovery_cache_created_unix"):
+            self._discovery_cache_created_unix = time.time()
+            self._discovery_cache_filesystem_mount_latest_start = self._get_filesystem_mount_latest_start()
+
+        cache = {
+            "created_unix": self._discovery_cache_created_unix,
+            "filesystem_mount_latest_start": self._discovery_cache_filesystem_mount_latest_start,
+            "storage_uuid_map_index": {
+                fs_uuid: self.storage_engurls.index(engurl)
+                for fs_uuid, engurl in self._storage_uuid_map_engurl.items()
+            },
+            "storage_label_map_uuid": self.storage_label_map_uuid,
+        }
+        try:
+            os.makedirs(os.path.dirname(self.discovery_cache_filepath), exist_ok=True)
+            tmp_filepath = f"{self.discovery_cache_filepath}.{os.getpid()}.tmp"
+            with open(tmp_filepath, "w") as cache_fio:
+                json.dump(cache, cache_fio)
+            os.replace(tmp_filepath, self.discovery_cache_filepath)
+        except OSError as err:
+            print(f"Failed to write storage discovery cache {self.discovery_cache_filepath}: {err}")
+
+    def _load_storage_manifests(self) -> dict:
+        """The cached Storage database manifests, unless a FilesystemMount has started since they were written."""
+        from cosmic_database.bloom import CosmicDB_BloomFilter
+
+        self._storage_manifests_filesystem_mount_latest_start = self._get_filesystem_mount_latest_start()
+        if self.storage_manifest_filepath is None or not os.path.exists(self.storage_manifest_filepath):
+            return {}
+        try:
+            with open(self.storage_manifest_filepath, "r") as cache_fio:
+                cache = json.load(cache_fio)
+            if cache["filesystem_mount_latest_start"] != self._storage_manifests_filesystem_mount_latest_start:
+                return {}
+            return {
+                fs_uuid: {
+                    **manifest,
+                    "filters": {
+                        fieldname: CosmicDB_BloomFilter.from_dict(filter_dict)
+                        for fieldname, filter_dict in manifest["filters"].items()
+                    }
+                }
+                for fs_uuid, manifest in cache["storage_manifests"].items()
+            }
+        except BaseException as err:
+            print(f"Disregarding storage manifest cache {self.storage_manifest_filepath}: {err}")
+            return {}
+
+    def _save_storage_manifests(self):
+        if self.storage_manifest_filepath is None:
+            return
+        cache = {
+            "filesystem_mount_latest_start": self._storage_manifests_filesystem_mount_latest_start,
+            "storage_manifests": {
+                fs_uuid: {
+                    **manifest,
+                    "filters": {
+                        fieldname: bloom_filter.to_dict()
+                        for fieldname, bloom_filter in manifest["filters"].items()
+                    }
+                }
+                for fs_uuid, manifest in self._storage_manifests.items()
+            },
+        }
+        try:
+            os.makedirs(os.path.dirname(self.storage_manifest_filepath), exist_ok=True)
+            tmp_filepath = f"{self.storage_manifest_filepath}.{os.getpid()}.tmp"
+            with open(tmp_filepath, "w") as cache_fio:
+                json.dump(cache, cache_fio)
+            os.replace(tmp_filepath, self.storage_manifest_filepath)
+        except OSError as err:
+            print(f"Failed to write storage manifest cache {self.storage_manifest_filepath}: {err}")
+
+    def get_storage_manifests(self, fs_uuids: list = None, workers: int = 8, max_age_s: float = None) -> dict:
+        """
+        The Bloom filter manifests (see `planning.refresh_storage_manifest`) of the Storage
+        databases, cached alongside the discovery cache. Those not validated against their
+        database within `max_age_s` (or at all, when `None`) are validated first.
+        Databases that fail to refresh are omitted.
+        """
+        if fs_uuids is None:
+            fs_uuids = list(self.storage_uuid_map_engurl.keys())
+        if self._storage_manifests is None:
+            self._storage_manifests = self._load_storage_manifests()
+
+        # a manifest that misses a database's new ObservationKeys would wrongly skip it
+        def refresh(fs_uuid, engine):
+            with engine.engine.connect() as conn:
+                return planning.refresh_storage_manifest(conn, self._storage_manifests.get(fs_uuid))
+
+        stale_fs_uuids = [
+            fs_uuid
+            for fs_uuid in fs_uuids
+            if fs_uuid not in self._storage_manifests
+            or max_age_s is None
+            or time.time() - self._storage_manifests[fs_uuid].get("validated_unix", 0) > max_age_s
+        ]
+        for fs_uuid, manifest, err in self.fanout_storage(refresh, workers, stale_fs_uuids):
+            if err is not None:
+                self._storage_manifests.pop(fs_uuid, None)
+            else:
+                self._storage_manifests[fs_uuid] = manifest
+        if len(stale_fs_uuids) > 0:
+            self._save_storage_manifests()
+
+        return {
+            fs_uuid: self._storage_manifests[fs_uuid]
+            for fs_uuid in fs_uuids
+            if fs_uuid in self._storage_manifests
+        }
+
+    @property
+    def storage_uuid_map_engurl(self) -> dict:
+        """The filesystem UUID to engine URL map of all accessible Storage databases."""
+        with self._storage_discovery_lock:
+            if len(self._unresolved_storage_engurls) > 0:
+                self._resolve_storage_engurls(self._unresolved_storage_engurls)
+        return self._storage_uuid_map_engurl
+
+    def _resolve_storage_engurls(self, engurls: list):
+        engurls = list(engurls)
+        for engurl in engurls:
+            self._unresolved_storage_engurls.remove(engurl)
+
+        if len(engurls) > 0 and (
+            self.discovery_workers > 1
+            or self.discovery_probe_timeout_s is not None
+            or self.discovery_timeout_s is not None
+        ):
+            self._discover_storage_concurrently(
+                engurls,
+                self.discovery_workers,
+                self.discovery_probe_timeout_s,
+                self.discovery_timeout_s
+            )
+        else:
+            for engurl in engurls:
+                try:
+                    self._storage_uuid_map_engurl[self._probe_storage_fs_uuid(engurl)] = engurl
+                except BaseException as err:
+                    print(f"Failed to access CosmicDB_StorageDatabaseInfo.filesystem_uuid at {engurl}:\n{err}")
+                    self.problematic_storage_engurls.append(engurl)
+
+        if len(engurls) > 0:
+            self._save_discovery_cache()
+
+    def _resolve_storage_fs_uuid(self, fs_uuid: str):
+        """
+        Returns
+        -------
+        sqlalchemy.engine.url.URL: the engine URL of the Storage database for the filesystem UUID,
+        probing outstanding Storage databases one at a time until it is found.
+        """
+        with self._storage_discovery_lock:
+            while fs_uuid not in self._storage_uuid_map_engurl and len(self._unresolved_storage_engurls) > 0:
+                self._resolve_storage_engurls(self._unresolved_storage_engurls[0:1])
+            return self._storage_uuid_map_engurl[fs_uuid]
+
+    def _probe_storage_fs_uuid(self, engurl):
+        storage_dbinfo = self.engine_registry.get_engine(
+            engurl,
+            entities.DatabaseScope.Storage
+        ).select_entity(entities.CosmicDB_StorageDatabaseInfo)
+        assert storage_dbinfo is not None, f"{engurl} has no StorageDatabaseInfo record."
+        return storage_dbinfo.filesystem_uuid
+
+    def _discover_storage_concurrently(
+        self,
+        storage_engurls: list,
+        workers: int,
+        probe_timeout_s: float = None,
+        timeout_s: float = None
+    ):
+        """
+        Probe the Storage databases from a pool of daemon threads. Probes past their deadline,
+        or outstanding when the budget is spent, are abandoned as problematic, as are those yet
+        to start once every worker is held by an abandoned probe.
+        """
+        probe_queue = queue.Queue()
+        for engurl_index in range(len(storage_engurls)):
+            probe_queue.put(engurl_index)
+        result_queue = queue.Queue()
+        probe_starts = {}
+
+        def probe_worker():
+            while True:
+                try:
+                    engurl_index = probe_queue.get_nowait()
+                except queue.Empty:
+                    return
+                probe_starts[engurl_index] = time.monotonic()
+                try:
+                    result_queue.put((engurl_index, self._probe_storage_fs_uuid(storage_engurls[engurl_index]), None))
+                except BaseException as err:
+                    result_queue.put((engurl_index, None, err))
+
+        worker_count = min(workers, len(storage_engurls))
+        for _ in range(worker_count):
+            threading.Thread(target=probe_worker, daemon=True).start()
+
+        deadline = None if timeout_s is None else time.monotonic() + timeout_s
+        unresolved = set(range(len(storage_engurls)))
+        # abandoned probes that are still running
+        held_engurl_indices = set()
+        while len(unresolved) > 0:
+            now = time.monotonic()
+            wait_until = [] if deadline is None else [deadline]
+            if probe_timeout_s is not None:
+                wait_until += [
+                    probe_starts.get(engurl_index, now) + probe_timeout_s
+                    for engurl_index in unresolved
+                ]
+            try:
+                engurl_index, fs_uuid, err = result_queue.get(
+                    timeout = None if len(wait_until) == 0 else max(0, min(wait_until) - now)
+                )
+                held_engurl_indices.discard(engurl_index)
+                if engurl_index in unresolved:
+                    unresolved.remove(engurl_index)
+                    engurl = storage_engurls[engurl_index]
+                    if err is None:
+                        self._storage_uuid_map_engurl[fs_uuid] = engurl
+                    else:
+                        print(f"Failed to access CosmicDB_StorageDatabaseInfo.filesystem_uuid at {engurl}:\n{err}")
+                        self.problematic_storage_engurls.append(engurl)
+            except queue.Empty:
+                pass
+
+            now = time.monotonic()
+            for engurl_index in sorted(unresolved):
+                engurl = storage_engurls[engurl_index]
+                if deadline is not None and now >= deadline:
+                    print(f"Abandoned access of CosmicDB_StorageDatabaseInfo.filesystem_uuid at {engurl}: discovery exceeded {timeout_s} s.")
+                elif (probe_timeout_s is not None
+                  and engurl_index in probe_starts
+                  and now >= probe_starts[engurl_index] + probe_timeout_s
+                ):
+                    print(f"Abandoned access of CosmicDB_StorageDatabaseInfo.filesystem_uuid at {engurl}: probe exceeded {probe_timeout_s} s.")
+                else:
+                    continue
+                unresolved.remove(engurl_index)
+                if engurl_index in probe_starts:
+                    held_engurl_indices.add(engurl_index)
+                self.problematic_storage_engurls.append(engurl)
+
+            if len(held_engurl_indices) >= worker_count:
+                while True:
+                    try:
+                        engurl_index = probe_queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if engurl_index not in unresolved:
+                        continue
+                    engurl = storage_engurls[engurl_index]
+                    print(f"Abandoned access of CosmicDB_StorageDatabaseInfo.filesystem_uuid at {engurl}: all {worker_count} discovery workers are held by abandoned probes.")
+                    unresolved.remove(engurl_index)
+                    self.problematic_storage_engurls.append(engurl)
+
+        # stop idle workers from starting abandoned probes
+        while True:
+            try:
+                probe_queue.get_nowait()
+            except queue.Empty:
+                break
 
     def _get_fs_uuid_by_label(self, label):
         if self.operation_engurl is not None and label not in self.storage_label_map_uuid:
@@ -74,52 +595,61 @@ class CosmicDB_EngineMultiConfig:
             )
             if filesystem_entity is not None:
                 self.storage_label_map_uuid[label] = filesystem_entity.uuid
+                self._save_discovery_cache()
         return self.storage_label_map_uuid[label]
 
     def get_dbengine_url(self, scope: entities.DatabaseScope, storage_fs_uuid: str = None, storage_fs_label: str = None):
         if scope == entities.DatabaseScope.Operation:
             return self.operation_engurl
         if scope == entities.DatabaseScope.Storage:
-            if len(self.storage_uuid_map_engurl) == 1:
-                return next(iter(self.storage_uuid_map_engurl.values()))
-            if len(self.storage_uuid_map_engurl) == 0 and len(self.problematic_storage_engurls):
-                return self.problematic_storage_engurls[0]
+            if len(self.storage_engurls) == 1:
+                return self.storage_engurls[0]
+            if len(self._unresolved_storage_engurls) == 0:
+                if len(self._storage_uuid_map_engurl) == 1:
+                    return next(iter(self._storage_uuid_map_engurl.values()))
+                if len(self._storage_uuid_map_engurl) == 0 and len(self.problematic_storage_engurls):
+                    return self.problematic_storage_engurls[0]
 
             if storage_fs_uuid is None and storage_fs_label is not None:
-                return self.storage_uuid_map_engurl[self._get_fs_uuid_by_label(storage_fs_label)]
+                return self._resolve_storage_fs_uuid(self._get_fs_uuid_by_label(storage_fs_label))
             if storage_fs_uuid is not None:
-                return self.storage_uuid_map_engurl[
+                return self._resolve_storage_fs_uuid(
                     storage_fs_uuid
-                ]
+                )
             
-            return self.storage_uuid_map_engurl[
+            return self._resolve_storage_fs_uuid(
                 self.get_active_storage_dbuuid()
-            ]
+            )
 
-    def get_dbengine(self, scope: entities.DatabaseScope, storage_fs_uuid: str = None, storage_fs_label: str = None):
-        return CosmicDB_Engine(
-            engine_url = self.get_dbengine_url(
+    def get_dbengine(self, scope: entities.DatabaseScope, storage_fs_uuid: str = None, storage_fs_label: str = None, **engine_kwargs):
+        return self.engine_registry.get_engine(
+            self.get_dbengine_url(
                 scope,
                 storage_fs_uuid,
                 storage_fs_label
             ),
-            scope = scope
+            scope,
+            **engine_kwargs
         )
     
-    def get_operation_dbengine(self):
-        return CosmicDB_Engine(
-            engine_url = self.operation_engurl,
-            scope = entities.DatabaseScope.Operation
+    def get_operation_dbengine(self, **engine_kwargs):
+        if self.operation_engurl is None:
+            raise ValueError("No Operation scoped database in the configuration.")
+        return self.engine_registry.get_engine(
+            self.operation_engurl,
+            entities.DatabaseScope.Operation,
+            **engine_kwargs
         )
 
-    def get_storage_dbengine(self, uuid: str = None, label: str = None):
-        return CosmicDB_Engine(
-            engine_url = self.get_dbengine_url(
+    def get_storage_dbengine(self, uuid: str = None, label: str = None, **engine_kwargs):
+        return self.engine_registry.get_engine(
+            self.get_dbengine_url(
                 entities.DatabaseScope.Storage,
                 uuid,
                 label
             ),
-            scope = entities.DatabaseScope.Storage
+            entities.DatabaseScope.Storage,
+            **engine_kwargs
         )
 
     def get_active_storage_dbuuid(self, operations_dbengine = None):
@@ -136,6 +666,405 @@ class CosmicDB_EngineMultiConfig:
             self.get_active_storage_dbuuid(operations_dbengine)
         )
 
+    def get_storage_fs_labels(self, fs_uuids: list) -> dict:
+        """
+        Returns
+        -------
+        dict: the filesystem label of each of the UUIDs, from a single Operation database query.
+        UUIDs without a Filesystem entity are omitted.
+        """
+        uuid_map_label = {
+            fs_uuid: label
+            for label, fs_uuid in self.storage_label_map_uuid.items()
+            if fs_uuid in fs_uuids
+        }
+        missing_fs_uuids = [
+            fs_uuid
+            for fs_uuid in fs_uuids
+            if fs_uuid not in uuid_map_label
+        ]
+        if len(missing_fs_uuids) > 0:
+            with self.get_operation_dbengine().session() as session:
+                for filesystem_entity in session.scalars(
+                    sqlalchemy.select(
+                        entities.CosmicDB_Filesystem
+                    ).where(
+                        entities.CosmicDB_Filesystem.uuid.in_(missing_fs_uuids)
+                    )
+                ):
+                    uuid_map_label[filesystem_entity.uuid] = filesystem_entity.label
+                    self.storage_label_map_uuid[filesystem_entity.label] = filesystem_entity.uuid
+        return uuid_map_label
+
+    def fanout_storage(self, call, workers: int = 8, fs_uuids: list = None, criteria: list = None, **engine_kwargs):
+        """
+        Concurrently call `call(fs_uuid, engine)` against each Storage database (those that
+        may satisfy the `criteria`, see `plan_storage_fs_uuids`), yielding
+        `(fs_uuid, return_value, exception)` as each call completes.
+        """
+        if fs_uuids is None:
+            fs_uuids = list(self.storage_uuid_map_engurl.keys())
+        if criteria is not None:
+            fs_uuids = self.plan_storage_fs_uuids(criteria, fs_uuids, workers)
+        if len(fs_uuids) == 0:
+            return
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, min(workers, len(fs_uuids)))) as executor:
+            future_uuid_map = {
+                executor.submit(
+                    lambda fs_uuid: call(fs_uuid, self.get_storage_dbengine(fs_uuid, **engine_kwargs)),
+                    fs_uuid
+                ): fs_uuid
+                for fs_uuid in fs_uuids
+            }
+            for future in concurrent.futures.as_completed(future_uuid_map):
+                try:
+                    yield future_uuid_map[future], future.result(), None
+                except Exception as err:
+                    yield future_uuid_map[future], None, err
+
+    def merge_ordered_storage(
+        self,
+        sql_query,
+        order_column,
+        descending: bool = False,
+        limit: int = None,
+        fs_uuids: list = None,
+        orm: bool = True,
+        row_transform = None,
+        batch_size: int = 1000,
+        prefetch_batches: int = 2
+    ):
+        """
+        Query each Storage database ordered by `order_column`, yielding `(fs_uuid, row)` in
+        global order. Each database is read by its own thread, `prefetch_batches` batches ahead
+        of the merge, until `limit` rows are yielded. `row_transform` is applied in the thread,
+        while the session is open.
+        """
+        if fs_uuids is None:
+            fs_uuids = list(self.storage_uuid_map_engurl.keys())
+        order_key_label = "_cosmicdb_merge_order_key"
+        def merge_query_for(dialect_name):
+            # NULLs order first ascending and last descending, as the merge
+            # below expects. MySQL already does so and lacks NULLS FIRST/LAST.
+            if dialect_name in ("mysql", "mariadb"):
+                ordering = order_column.desc() if descending else order_column.asc()
+            else:
+                ordering = order_column.desc().nulls_last() if descending else order_column.asc().nulls_first()
+            return (sql_query
+                .add_columns(order_column.label(order_key_label))
+                .order_by(None)
+                .order_by(ordering)
+                .limit(limit)
+                .execution_options(yield_per=batch_size)
+            )
+
+        stop_event = threading.Event()
+        def put_until_stopped(out_queue, item):
+            while not stop_event.is_set():
+                try:
+                    out_queue.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def stream_rows(fs_uuid, out_queue):
+            try:
+                engine = self.get_storage_dbengine(fs_uuid)
+                merge_query = merge_query_for(engine.engine.dialect.name)
+                with (engine.session() if orm else engine.engine.connect()) as conn:
+                    for partition in conn.execute(merge_query).partitions():
+                        if not put_until_stopped(out_queue, [
+                            (
+                                row[-1],
+                                fs_uuid,
+                                tuple(row[:-1]) if row_transform is None else row_transform(tuple(row[:-1]))
+                            )
+                            for row in partition
+                        ]):
+                            return
+            except BaseException as err:
+                put_until_stopped(out_queue, err)
+            put_until_stopped(out_queue, None)
+
+        def drain(out_queue):
+            while True:
+                batch = out_queue.get()
+                if batch is None:
+                    return
+                if isinstance(batch, BaseException):
+                    raise batch
+                yield from batch
+
+        queues = []
+        for fs_uuid in fs_uuids:
+            out_queue = queue.Queue(maxsize=prefetch_batches)
+            threading.Thread(target=stream_rows, args=(fs_uuid, out_queue), daemon=True).start()
+            queues.append(out_queue)
+
+        try:
+            for item_enum, item in enumerate(heapq.merge(
+                *map(drain, queues),
+                key=lambda item: (item[0] is not None, item[0]),
+                reverse=descending
+            )):
+                if limit is not None and item_enum >= limit:
+                    break
+                yield item[1], item[2]
+        finally:
+            stop_event.set()
+
+    def sync_hit_summaries(self, workers: int = 8, fs_uuids: list = None, chunk_size: int = 500):
+        """
+        Synchronise the `CosmicDB_ObservationHitSummary` entities of the observations with hits
+        or stamps added to each Storage database since the last synchronisation (see
+        `CosmicDB_HitSummarySync`), yielding as `fanout_storage`.
+        """
+        operation_engine = self.get_operation_dbengine()
+        summary_table = entities.CosmicDB_ObservationHitSummary.__table__
+        sync_table = entities.CosmicDB_HitSummarySync.__table__
+        key_table = entities.CosmicDB_ObservationKey.__table__
+        hit_table = entities.CosmicDB_ObservationHit.__table__
+        stamp_table = entities.CosmicDB_ObservationStamp.__table__
+
+        def sync(fs_uuid, engine):
+            with operation_engine.engine.connect() as conn:
+                synced_ids = conn.execute(
+                    sqlalchemy.select(sync_table.c.hit_id, sync_table.c.stamp_id)
+                    .where(sync_table.c.filesystem_uuid == fs_uuid)
+                ).one_or_none()
+                summarised_observation_ids = set(conn.execute(
+                    sqlalchemy.select(summary_table.c.observation_id)
+                    .where(summary_table.c.filesystem_uuid == fs_uuid)
+                ).scalars())
+            synced_hit_id, synced_stamp_id = (0, 0) if synced_ids is None else synced_ids
+
+            with engine.engine.connect() as conn:
+                max_hit_id = conn.execute(sqlalchemy.select(sqlalchemy.func.max(hit_table.c.id))).scalar_one()
+                max_stamp_id = conn.execute(sqlalchemy.select(sqlalchemy.func.max(stamp_table.c.id))).scalar_one()
+                observation_ids = set(conn.execute(
+                    sqlalchemy.select(key_table.c.observation_id)
+                ).scalars()).difference(summarised_observation_ids)
+                observation_ids.update(conn.execute(
+                    sqlalchemy.select(hit_table.c.observation_id).distinct()
+                    .where(hit_table.c.id > synced_hit_id)
+                ).scalars())
+                observation_ids.update(conn.execute(
+                    sqlalchemy.select(stamp_table.c.observation_id).distinct()
+                    .where(stamp_table.c.id > synced_stamp_id)
+                ).scalars())
+                observation_ids = sorted(observation_ids)
+                summaries = planning.select_observation_hit_summaries(conn, observation_ids, chunk_size)
+
+            with operation_engine.engine.begin() as conn:
+                for chunk_start in range(0, len(observation_ids), chunk_size):
+                    conn.execute(
+                        sqlalchemy.delete(summary_table)
+                        .where(
+                            summary_table.c.filesystem_uuid == fs_uuid,
+                            summary_table.c.observation_id.in_(observation_ids[chunk_start:chunk_start+chunk_size])
+                        )
+                    )
+                if len(summaries) > 0:
+                    conn.execute(
+                        sqlalchemy.insert(summary_table),
+                        [
+                            {"observation_id": observation_id, "filesystem_uuid": fs_uuid, **summary}
+                            for observation_id, summary in summaries.items()
+                        ]
+                    )
+
+                sync_values = {
+                    "hit_id": synced_hit_id if max_hit_id is None else max_hit_id,
+                    "stamp_id": synced_stamp_id if max_stamp_id is None else max_stamp_id,
+                    "synchronised": datetime.now(),
+                }
+                if conn.execute(
+                    sqlalchemy.update(sync_table)
+                    .where(sync_table.c.filesystem_uuid == fs_uuid)
+                    .values(sync_values)
+                ).rowcount == 0:
+                    conn.execute(
+                        sqlalchemy.insert(sync_table)
+                        .values(filesystem_uuid=fs_uuid, **sync_values)
+                    )
+            return len(summaries)
+
+        yield from self.fanout_storage(sync, workers, fs_uuids)
+
+    def plan_storage_fs_uuids(self, criteria: list, fs_uuids: list = None, workers: int = 8, use_hit_summaries: bool = False) -> list:
+        """
+        The filesystem UUIDs of the Storage databases (in `fs_uuids` order) that may hold rows
+        satisfying the criteria, per their cached manifests and, with `use_hit_summaries`, their
+        last synchronised `CosmicDB_ObservationHitSummary` entities. The active Storage database
+        is always included.
+        """
+        if fs_uuids is None:
+            fs_uuids = list(self.storage_uuid_map_engurl.keys())
+        planned_fs_uuids = set(fs_uuids)
+
+        manifest_criteria = [
+            manifest_criterion
+            for manifest_criterion in map(planning.manifest_criterion, criteria)
+            if manifest_criterion is not None
+        ]
+        if len(manifest_criteria) > 0 and self.storage_manifest_filepath is not None:
+            might_satisfy = lambda manifest: all(
+                any(
+                    manifest["filters"][fieldname].might_contain(value)
+                    for value in values
+                )
+                for fieldname, values in manifest_criteria
+            )
+            if self._storage_manifests is None:
+                self._storage_manifests = self._load_storage_manifests()
+            active_fs_uuid = None
+            if self.operation_engurl is not None:
+                try:
+                    active_fs_uuid = self.get_active_storage_dbuuid(self.get_operation_dbengine())
+                except sqlalchemy.exc.NoResultFound:
+                    pass
+            # only the databases that the cached manifests rule out need be validated,
+            # the active one is always planned
+            manifests = self.get_storage_manifests(
+                [
+                    fs_uuid
+                    for fs_uuid in fs_uuids
+                    if fs_uuid != active_fs_uuid and (
+                        fs_uuid not in self._storage_manifests
+                        or not might_satisfy(self._storage_manifests[fs_uuid])
+                    )
+                ],
+                workers,
+                max_age_s=self.storage_manifest_ttl_s
+            )
+            planned_fs_uuids = {
+                fs_uuid
+                for fs_uuid in planned_fs_uuids
+                if fs_uuid not in manifests or might_satisfy(manifests[fs_uuid])
+            }
+
+        summary_criteria = [
+            summary_criterion
+            for summary_criterion in map(planning.hit_summary_criterion, criteria if use_hit_summaries else [])
+            if summary_criterion is not None
+        ]
+        operation_engine = None if self.operation_engurl is None else self.get_operation_dbengine()
+        summary_table = entities.CosmicDB_ObservationHitSummary.__table__
+        sync_table = entities.CosmicDB_HitSummarySync.__table__
+        if (len(summary_criteria) > 0
+          and operation_engine is not None
+          and sqlalchemy.inspect(operation_engine.engine).has_table(sync_table.name)
+        ):
+            with operation_engine.engine.connect() as conn:
+                synced_fs_uuids = set(conn.execute(
+                    sqlalchemy.select(sync_table.c.filesystem_uuid)
+                ).scalars())
+                summarised_fs_uuids = set(conn.execute(
+                    sqlalchemy.select(summary_table.c.filesystem_uuid).distinct()
+                    .where(
+                        summary_table.c.filesystem_uuid.in_(fs_uuids),
+                        *summary_criteria
+                    )
+                ).scalars())
+            planned_fs_uuids.intersection_update(
+                summarised_fs_uuids.union(set(fs_uuids).difference(synced_fs_uuids))
+            )
+
+        if len(planned_fs_uuids) < len(fs_uuids) and operation_engine is not None:
+            try:
+                planned_fs_uuids.add(self.get_active_storage_dbuuid(operation_engine))
+            except sqlalchemy.exc.NoResultFound:
+                pass
+
+        return [
+            fs_uuid
+            for fs_uuid in fs_uuids
+            if fs_uuid in planned_fs_uuids
+        ]
+
+    def select_federated(
+        self,
+        operation_query,
+        storage_query,
+        bridges: list = None,
+        fs_uuids: list = None,
+        workers: int = 8,
+        key_chunk_size: int = 1000
+    ):
+        """
+        Join the rows of an Operation database query with those of a Storage database query
+        across the `bridges` (defaulting to those of `entities.SCOPE_BRIDGES` between the
+        queries' tables), yielding `(fs_uuid, operation_row, storage_row)`. The Operation rows
+        are hashed by key, and the keys shipped in chunks to the Storage databases that may
+        hold them.
+
+        e.g. the hits of observations with a calibration grade above 0.8, in beams on a source:
+        ```
+            multi_config.select_federated(
+                sqlalchemy.select(CosmicDB_ObservationBeam.source, CosmicDB_Calibration.overall_grade)
+                    .select_from(CosmicDB_ObservationBeam)
+                    .join(CosmicDB_Observation)
+                    .join(CosmicDB_Calibration, CosmicDB_Observation.calibration_id == CosmicDB_Calibration.id)
+                    .where(CosmicDB_Calibration.overall_grade > 0.8, CosmicDB_ObservationBeam.source == "Y"),
+                sqlalchemy.select(CosmicDB_ObservationHit)
+            )
+        ```
+        """
+        if bridges is None:
+            bridges = federation.scope_bridges(operation_query, storage_query)
+        if len(bridges) == 0:
+            raise ValueError("No bridge (see `entities.SCOPE_BRIDGES`) joins the tables of the queries.")
+        storage_columns = [storage_column for operation_column, storage_column in bridges]
+
+        operation_column_count = len(operation_query.selected_columns)
+        operation_rows = {}
+        with self.get_operation_dbengine().engine.connect() as conn:
+            for row in conn.execute(operation_query.add_columns(*[
+                operation_column.label(f"_cosmicdb_bridge_{bridge_index}")
+                for bridge_index, (operation_column, storage_column) in enumerate(bridges)
+            ])):
+                key = tuple(row[operation_column_count:])
+                if None not in key:
+                    operation_rows.setdefault(key, []).append(row[:operation_column_count])
+
+        keys = list(operation_rows.keys())
+        storage_column_count = len(storage_query.selected_columns)
+        storage_query = storage_query.add_columns(*[
+            storage_column.label(f"_cosmicdb_bridge_{bridge_index}")
+            for bridge_index, storage_column in enumerate(storage_columns)
+        ])
+        for chunk_start in range(0, len(keys), key_chunk_size):
+            keys_chunk = keys[chunk_start:chunk_start+key_chunk_size]
+            if len(storage_columns) == 1:
+                key_criterion = storage_columns[0].in_([key[0] for key in keys_chunk])
+            else:
+                key_criterion = sqlalchemy.tuple_(*storage_columns).in_(keys_chunk)
+            chunk_query = storage_query.where(key_criterion)
+
+            def select_chunk(fs_uuid, engine):
+                with engine.engine.connect() as conn:
+                    return conn.execute(chunk_query).all()
+
+            for fs_uuid, rows, err in self.fanout_storage(
+                select_chunk,
+                workers,
+                self.plan_storage_fs_uuids(
+                    [
+                        storage_column.in_(list({key[bridge_index] for key in keys_chunk}))
+                        for bridge_index, storage_column in enumerate(storage_columns)
+                    ],
+                    fs_uuids,
+                    workers
+                )
+            ):
+                if err is not None:
+                    raise RuntimeError(f"Storage DB with filesystem UUID '{fs_uuid}' failed.") from err
+                for row in rows:
+                    for operation_row in operation_rows[tuple(row[storage_column_count:])]:
+                        yield fs_uuid, operation_row, row[:storage_column_count]
+
 
 class CosmicDB_Engine:
 
@@ -171,10 +1100,14 @@ class CosmicDB_Engine:
             self.engine_url,
             **kwargs
         )
+        # see `value_tables.in_values`
+        sqlalchemy.event.listen(self.engine, "before_execute", value_tables.create_value_tables)
+        sqlalchemy.event.listen(self.engine, "rollback", value_tables.forget_value_tables)
+        sqlalchemy.event.listen(self.engine, "checkin", value_tables.drop_value_tables)
     
     @staticmethod
     def _create_url(engine_conf_yaml_filepath, scope: entities.DatabaseScope = None, storage_fs_uuid: str = None):
-        multi_config = CosmicDB_EngineMultiConfig(engine_conf_yaml_filepath)
+        multi_config = CosmicDB_EngineMultiConfig(engine_conf_yaml_filepath, lazy_storage_discovery=True)
         if storage_fs_uuid is not None:
             scope = entities.DatabaseScope.Storage
 
@@ -196,9 +1129,27 @@ class CosmicDB_Engine:
         """
         return sqlalchemy.orm.Session(self.engine)
 
+    def dispose(self):
+        """Close all pooled connections of the engine."""
+        self.engine.dispose()
+
+    def pool_statistics(self) -> dict:
+        pool = self.engine.pool
+        stats = {
+            "pool_class": pool.__class__.__name__,
+            "status": pool.status(),
+        }
+        for statistic in ["size", "checkedin", "checkedout", "overflow"]:
+            if hasattr(pool, statistic):
+                stats[statistic] = getattr(pool, statistic)()
+        return stats
+
     def create_all_tables(self):
-        """Setup schema according to all tables within scope under `cosmic_database.entities`."""
-        return entities.Base.metadata.create_all(
+        """
+        Setup schema according to all tables within scope under `cosmic_database.entities`.
+        Pre-existing tables are left as they are, see `create_missing_indexes`.
+        """
+        entities.Base.metadata.create_all(
             self.engine,
             tables = [
                 entities.Base.metadata.tables[entity.__tablename__]
@@ -206,6 +1157,28 @@ class CosmicDB_Engine:
             ]
         )
 
+    def create_missing_indexes(self) -> list:
+        """
+        Create the declared indexes missing from the scope's existing tables and columns, returning their names.
+        Building an index on a populated table can take long and lock it, so this is never implied.
+        """
+        inspector = sqlalchemy.inspect(self.engine)
+        created_index_names = []
+        for entity in entities.DATABASE_SCOPES[self.scope]:
+            table = entity.__table__
+            if not inspector.has_table(table.name):
+                continue
+            existing_index_names = {index["name"] for index in inspector.get_indexes(table.name)}
+            existing_colnames = {col["name"] for col in inspector.get_columns(table.name)}
+            for index in table.indexes:
+                if index.name in existing_index_names:
+                    continue
+                if not all(col.name in existing_colnames for col in index.columns):
+                    continue
+                index.create(self.engine)
+                created_index_names.append(index.name)
+        return created_index_names
+
     def commit_entity(self, entity):
         with self.session() as session:
             session.add(entity)
@@ -217,17 +1190,115 @@ class CosmicDB_Engine:
             session.add_all(entities)
             session.commit()
 
+    def bulk_insert(
+        self,
+        entity_class,
+        rows,
+        columns: list = None,
+        batch_size: int = 10000,
+        return_ids: bool = False
+    ):
+        """
+        Insert dicts, tuples (of `columns`) or a NumPy structured array of rows in Core
+        `executemany` batches, in a single transaction. NaN in an array's float fields is
+        inserted as NULL. Returns the count of rows, or with `return_ids` their primary keys.
+        """
+        table = entity_class.__table__
+        if columns is None:
+            columns = list(table.columns.keys())
+
+        if getattr(rows, "dtype", None) is not None and rows.dtype.names is not None:
+            field_names = rows.dtype.names
+            unknown_fields = set(field_names).difference(table.columns.keys())
+            if len(unknown_fields) > 0:
+                raise ValueError(f"Structured array fields are not columns of '{table}': {unknown_fields}")
+            # NaN is NULL in float fields (see `arrays.structured_dtype`), which
+            # also carry nullable integers and booleans
+            float_field_types = {
+                field_name: table.columns[field_name].type.python_type
+                for field_name in field_names
+                if rows.dtype[field_name].kind == "f"
+            }
+            def field_value(field_name, value):
+                if field_name not in float_field_types:
+                    return value
+                if value != value:
+                    return None
+                if float_field_types[field_name] in [int, bool]:
+                    return float_field_types[field_name](value)
+                return value
+            batches = (
+                [
+                    {
+                        field_name: field_value(field_name, value)
+                        for field_name, value in zip(field_names, row)
+                    }
+                    for row in rows[batch_start:batch_start+batch_size].tolist()
+                ]
+                for batch_start in range(0, len(rows), batch_size)
+            )
+        else:
+            def batch_rows():
+                batch = []
+                for row in rows:
+                    batch.append(row if isinstance(row, dict) else dict(zip(columns, row)))
+                    if len(batch) == batch_size:
+                        yield batch
+                        batch = []
+                if len(batch) > 0:
+                    yield batch
+            batches = batch_rows()
+
+        statement = sqlalchemy.insert(table)
+        if return_ids:
+            primary_key_columns = list(table.primary_key.columns)
+            if len(primary_key_columns) != 1:
+                raise ValueError(f"Can only return the generated ids of tables with a single primary key column, not '{table}'.")
+            if self.engine.dialect.insert_executemany_returning:
+                statement = statement.returning(primary_key_columns[0], sort_by_parameter_order=True)
+
+        inserted_ids = []
+        inserted_count = 0
+        with self.engine.begin() as conn:
+            for batch in batches:
+                if not return_ids:
+                    conn.execute(statement, batch)
+                elif self.engine.dialect.insert_executemany_returning:
+                    inserted_ids += conn.execute(statement, batch).scalars().all()
+                else:
+                    for params in batch:
+                        inserted_ids.append(conn.execute(statement, params).inserted_primary_key[0])
+                inserted_count += len(batch)
+
+        return inserted_ids if return_ids else inserted_count
+
     def select_entity(self, entity_class, session=None, create_missing_entity = False, **criteria_kwargs):
         if session is None:
             with self.session() as session:
                 return self.select_entity(entity_class, session, create_missing_entity, **criteria_kwargs)
 
-        ret = session.scalars(
-            sqlalchemy.select(entity_class)
+        # `None` criteria compare with IS NULL, so form part of the statement's shape
+        criteria_shape = tuple(sorted(
+            (colname, colval is None)
+            for colname, colval in criteria_kwargs.items()
+        ))
+        statement = STATEMENT_CACHE.get(
+            ("select_entity", entity_class, criteria_shape),
+            lambda: sqlalchemy.select(entity_class)
             .where(*[
-                getattr(entity_class, colname) == colval
-                for colname, colval in criteria_kwargs.items()
+                getattr(entity_class, colname).is_(None)
+                if colval_is_none else
+                getattr(entity_class, colname) == sqlalchemy.bindparam(f"criterion_{colname}")
+                for colname, colval_is_none in criteria_shape
             ])
+        )
+        ret = session.scalars(
+            statement,
+            {
+                f"criterion_{colname}": colval
+                for colname, colval in criteria_kwargs.items()
+                if colval is not None
+            }
         ).one_or_none()
         if create_missing_entity and ret is None:
             ret = entity_class(
@@ -239,6 +1310,573 @@ class CosmicDB_Engine:
 
         return ret
 
+    def select_structured_array(
+        self,
+        entity_class,
+        columns: list = None,
+        criteria: list = None,
+        order_by = None,
+        limit: int = None,
+        chunk_size: int = 100000
+    ):
+        """
+        Select columns of the entity's table into a NumPy structured array (see
+        `arrays.structured_dtype`), preallocated from a count and filled chunk by chunk
+        from a server-side cursor.
+        """
+        import numpy
+
+        table = entity_class.__table__
+        if columns is None:
+            columns = list(table.columns.keys())
+        try:
+            selected_columns = [table.columns[colname] for colname in columns]
+        except KeyError as err:
+            raise KeyError(f"{err.args[0]} not found as a column in the table ('{table}') for {entity_class}.") from None
+        criteria = [] if criteria is None else criteria
+        order_by = [] if order_by is None else (order_by if isinstance(order_by, (list, tuple)) else [order_by])
+
+        dtype = arrays.structured_dtype(selected_columns)
+        with self.engine.connect() as conn:
+            row_count = conn.execute(
+                sqlalchemy.select(sqlalchemy.func.count())
+                .select_from(table)
+                .where(*criteria)
+            ).scalar_one()
+            if limit is not None:
+                row_count = min(row_count, limit)
+            array = numpy.empty(row_count, dtype=dtype)
+
+            filled = 0
+            for rows in conn.execute(
+                sqlalchemy.select(*selected_columns)
+                .where(*criteria)
+                .order_by(*order_by)
+                .limit(limit)
+                .execution_options(yield_per=chunk_size)
+            ).partitions():
+                if filled + len(rows) > len(array):
+                    # rows were inserted since the count
+                    array = numpy.concatenate([array, numpy.empty(filled + len(rows) - len(array), dtype=dtype)])
+                # NULLs assign as NaN (and NaT) to float (and datetime) fields
+                array[filled:filled+len(rows)] = list(map(tuple, rows))
+                filled += len(rows)
+
+        return array[:filled]
+
+    def select_records(
+        self,
+        entity_class,
+        criteria: list = None,
+        order_by = None,
+        limit: int = None,
+        chunk_size: int = 10000
+    ) -> list:
+        """Select rows as read-only `entity_class.record_class()` records, without a session."""
+        make_record = entity_class.record_class()._make
+        criteria = [] if criteria is None else criteria
+        order_by = [] if order_by is None else (order_by if isinstance(order_by, (list, tuple)) else [order_by])
+
+        records = []
+        with self.engine.connect() as conn:
+            for rows in conn.execute(
+                sqlalchemy.select(*entity_class.__table__.columns)
+                .where(*criteria)
+                .order_by(*order_by)
+                .limit(limit)
+                .execution_options(yield_per=chunk_size)
+            ).partitions():
+                records.extend(map(make_record, rows))
+        return records
+
+    def cone_search(
+        self,
+        entity_class,
+        ra_radians: float,
+        dec_radians: float,
+        radius_radians: float,
+        columns: list = None,
+        criteria: list = None,
+        chunk_size: int = 100000
+    ):
+        """
+        Select the rows of a sky-pixelated entity (see `entities.SKY_COORDINATE_COLUMNS`)
+        within the cone, by the `sky_pixel` ranges covering it and then by angular distance.
+        Returns the structured array of rows and the array of their distances in radians.
+        Rows without a `sky_pixel` are not found, see `update_sky_pixels`.
+        """
+        try:
+            (ra_column, ra_unit), (dec_column, dec_unit) = entities.SKY_COORDINATE_COLUMNS[entity_class]
+        except KeyError:
+            raise ValueError(f"{entity_class} is not sky-pixelated, expected one of {list(entities.SKY_COORDINATE_COLUMNS.keys())}.") from None
+
+        if columns is not None:
+            columns = list(columns) + [
+                col.key
+                for col in [ra_column, dec_column]
+                if col.key not in columns
+            ]
+        criteria = [] if criteria is None else list(criteria)
+
+        array = self.select_structured_array(
+            entity_class,
+            columns=columns,
+            criteria=criteria + [
+                sqlalchemy.or_(*[
+                    entity_class.sky_pixel.between(first_pixel, last_pixel)
+                    for first_pixel, last_pixel in sky.cone_sky_pixel_ranges(ra_radians, dec_radians, radius_radians)
+                ])
+            ],
+            chunk_size=chunk_size
+        )
+        separations = sky.angular_separation(
+            sky.to_radians(array[ra_column.key], ra_unit),
+            sky.to_radians(array[dec_column.key], dec_unit),
+            ra_radians,
+            dec_radians
+        )
+        within = separations <= radius_radians
+        return array[within], separations[within]
+
+    def update_sky_pixels(self, entity_class, batch_size: int = 10000) -> int:
+        """Populate the NULL `sky_pixel` values of a sky-pixelated entity's rows, returning the count updated."""
+        import numpy
+
+        try:
+            (ra_column, ra_unit), (dec_column, dec_unit) = entities.SKY_COORDINATE_COLUMNS[entity_class]
+        except KeyError:
+            raise ValueError(f"{entity_class} is not sky-pixelated, expected one of {list(entities.SKY_COORDINATE_COLUMNS.keys())}.") from None
+
+        table = entity_class.__table__
+        primary_key_columns = list(table.primary_key.columns)
+        statement = (
+            sqlalchemy.update(table)
+            .where(*[
+                col == sqlalchemy.bindparam(f"key_{col.name}")
+                for col in primary_key_columns
+            ])
+            .values(sky_pixel=sqlalchemy.bindparam("new_sky_pixel"))
+        )
+
+        updated_count = 0
+        while True:
+            with self.engine.begin() as conn:
+                rows = conn.execute(
+                    sqlalchemy.select(*primary_key_columns, ra_column, dec_column)
+                    .where(table.c.sky_pixel.is_(None))
+                    .limit(batch_size)
+                ).all()
+                if len(rows) == 0:
+                    break
+
+                coordinates = numpy.array([row[-2:] for row in rows], dtype=numpy.float64)
+                pixels = sky.sky_pixels(
+                    sky.to_radians(coordinates[:, 0], ra_unit),
+                    sky.to_radians(coordinates[:, 1], dec_unit)
+                )
+                conn.execute(
+                    statement,
+                    [
+                        {
+                            **{
+                                f"key_{col.name}": key_value
+                                for col, key_value in zip(primary_key_columns, row)
+                            },
+                            "new_sky_pixel": int(pixel)
+                        }
+                        for row, pixel in zip(rows, pixels)
+                    ]
+                )
+                updated_count += len(rows)
+
+        return updated_count
+
+    def update_sky_coverage(
+        self,
+        footprint_radius_radians: float = 0.0,
+        observation_ids: list = None,
+        batch_size: int = 1000
+    ) -> int:
+        """
+        Index the sky pixels covered by the beams of the observations not yet indexed (or of
+        `observation_ids`, replacing their coverage) in `CosmicDB_SkyCoverage`, returning the
+        count of observations indexed. A `footprint_radius_radians` of 0 covers just the pixel
+        of each beam's position.
+        """
+        beam_table = entities.CosmicDB_ObservationBeam.__table__
+        subband_table = entities.CosmicDB_ObservationSubband.__table__
+        coverage_table = entities.CosmicDB_SkyCoverage.__table__
+
+        with self.engine.begin() as conn:
+            if observation_ids is None:
+                observation_ids = conn.execute(
+                    sqlalchemy.select(beam_table.c.observation_id)
+                    .distinct()
+                    .where(
+                        ~sqlalchemy.exists()
+                        .where(coverage_table.c.observation_id == beam_table.c.observation_id)
+                    )
+                ).scalars().all()
+            else:
+                observation_ids = list(dict.fromkeys(observation_ids))
+                for batch_start in range(0, len(observation_ids), batch_size):
+                    conn.execute(
+                        sqlalchemy.delete(coverage_table)
+                        .where(coverage_table.c.observation_id.in_(observation_ids[batch_start:batch_start+batch_size]))
+                    )
+
+        for batch_start in range(0, len(observation_ids), batch_size):
+            batch_observation_ids = observation_ids[batch_start:batch_start+batch_size]
+            with self.engine.begin() as conn:
+                tuning_spans = {}
+                for observation_id, tuning, frequency_lower, bandwidth in conn.execute(
+                    sqlalchemy.select(
+                        subband_table.c.observation_id,
+                        subband_table.c.tuning,
+                        subband_table.c.subband_frequency_lower_MHz,
+                        subband_table.c.subband_bandwidth_MHz,
+                    )
+                    .where(
+                        subband_table.c.observation_id.in_(batch_observation_ids),
+                        subband_table.c.successful_participation.is_(True)
+                    )
+                ):
+                    lower, upper = sorted([frequency_lower, frequency_lower + bandwidth])
+                    span = tuning_spans.setdefault(observation_id, {}).setdefault(tuning, [lower, upper])
+                    span[0] = min(span[0], lower)
+                    span[1] = max(span[1], upper)
+
+                pixel_spans = {}
+                for observation_id, ra, dec, start, end in conn.execute(
+                    sqlalchemy.select(
+                        beam_table.c.observation_id,
+                        beam_table.c.ra_radians,
+                        beam_table.c.dec_radians,
+                        beam_table.c.start,
+                        beam_table.c.end,
+                    )
+                    .where(beam_table.c.observation_id.in_(batch_observation_ids))
+                ):
+                    if footprint_radius_radians > 0:
+                        pixels = sky.cone_sky_pixels(ra, dec, footprint_radius_radians).tolist()
+                    else:
+                        pixels = [sky.sky_pixel(ra, dec)]
+                    for pixel in pixels:
+                        span = pixel_spans.setdefault((pixel, observation_id), [start, end])
+                        span[0] = min(span[0], start)
+                        span[1] = max(span[1], end)
+
+                rows = [
+                    {
+                        "sky_pixel": pixel,
+                        "observation_id": observation_id,
+                        "tuning": tuning,
+                        "start": start,
+                        "end": end,
+                        "frequency_lower_MHz": frequency_span[0],
+                        "frequency_upper_MHz": frequency_span[1],
+                    }
+                    for (pixel, observation_id), (start, end) in pixel_spans.items()
+                    for tuning, frequency_span in tuning_spans.get(observation_id, {"": (None, None)}).items()
+                ]
+                for rows_start in range(0, len(rows), 10000):
+                    conn.execute(sqlalchemy.insert(coverage_table), rows[rows_start:rows_start+10000])
+
+        return len(observation_ids)
+
+    def select_sky_coverage(self, ra_radians: float, dec_radians: float, radius_radians: float = 0.0) -> list:
+        """
+        The coverage of the sky pixel of the position, or of the pixels with centres within the
+        radius, as a dict per pixel of its centre, exposure, merged frequency ranges and
+        observation IDs.
+        """
+        import numpy
+
+        coverage_table = entities.CosmicDB_SkyCoverage.__table__
+        pixels = sky.cone_sky_pixels(ra_radians, dec_radians, radius_radians)
+        if len(pixels) == 1:
+            pixel_criterion = coverage_table.c.sky_pixel == int(pixels[0])
+        else:
+            pixel_criterion = sqlalchemy.or_(*[
+                coverage_table.c.sky_pixel.between(first_pixel, last_pixel)
+                for first_pixel, last_pixel in sky.cone_sky_pixel_ranges(ra_radians, dec_radians, radius_radians)
+            ])
+
+        pixel_observation_spans = {}
+        pixel_frequency_spans = {}
+        with self.engine.connect() as conn:
+            for pixel, observation_id, start, end, frequency_lower, frequency_upper in conn.execute(
+                sqlalchemy.select(
+                    coverage_table.c.sky_pixel,
+                    coverage_table.c.observation_id,
+                    coverage_table.c.start,
+                    coverage_table.c.end,
+                    coverage_table.c.frequency_lower_MHz,
+                    coverage_table.c.frequency_upper_MHz,
+                )
+                .where(pixel_criterion)
+            ):
+                pixel_observation_spans.setdefault(pixel, {})[observation_id] = (start, end)
+                if frequency_lower is not None:
+                    pixel_frequency_spans.setdefault(pixel, []).append((frequency_lower, frequency_upper))
+
+        covered_pixels = numpy.array(sorted(pixel_observation_spans.keys()), dtype=numpy.int64)
+        covered_pixels = covered_pixels[numpy.isin(covered_pixels, pixels)]
+        ra_centres, dec_centres = sky.sky_pixel_centres(covered_pixels)
+
+        coverage = []
+        for pixel, ra_centre, dec_centre in zip(covered_pixels.tolist(), ra_centres.tolist(), dec_centres.tolist()):
+            frequency_ranges = []
+            for lower, upper in sorted(pixel_frequency_spans.get(pixel, [])):
+                if len(frequency_ranges) > 0 and lower <= frequency_ranges[-1][1]:
+                    frequency_ranges[-1] = (frequency_ranges[-1][0], max(frequency_ranges[-1][1], upper))
+                else:
+                    frequency_ranges.append((lower, upper))
+
+            observation_spans = pixel_observation_spans[pixel]
+            coverage.append({
+                "sky_pixel": pixel,
+                "ra_radians": ra_centre,
+                "dec_radians": dec_centre,
+                "exposure_s": sum(
+                    (end - start).total_seconds()
+                    for start, end in observation_spans.values()
+                ),
+                "frequency_ranges_MHz": frequency_ranges,
+                "observation_ids": sorted(observation_spans.keys()),
+            })
+        return coverage
+
+    def count_hit_windows(
+        self,
+        windows: list,
+        criteria: list = None,
+        window_chunk_size: int = 100
+    ) -> list:
+        """
+        Count the hits within each window (see `hit_windows`), by range scans of the
+        (signal_frequency, signal_drift_rate) index, `window_chunk_size` windows per
+        `UNION ALL` statement.
+        """
+        hit_table = entities.CosmicDB_ObservationHit.__table__
+        window_criteria = [hit_windows.window_criterion(window) for window in windows]
+        criteria = [] if criteria is None else criteria
+
+        counts = [0]*len(windows)
+        with self.engine.connect() as conn:
+            for chunk_start in range(0, len(window_criteria), window_chunk_size):
+                for window_index, count in conn.execute(
+                    sqlalchemy.union_all(*[
+                        sqlalchemy.select(
+                            sqlalchemy.literal(window_index).label("window"),
+                            sqlalchemy.func.count().label("count")
+                        )
+                        .select_from(hit_table)
+                        .where(window_criterion, *criteria)
+                        for window_index, window_criterion in enumerate(
+                            window_criteria[chunk_start:chunk_start+window_chunk_size],
+                            start=chunk_start
+                        )
+                    ])
+                ):
+                    counts[window_index] = count
+        return counts
+
+    def select_hit_windows(
+        self,
+        windows: list,
+        columns: list = None,
+        criteria: list = None,
+        window_chunk_size: int = 100,
+        chunk_size: int = 100000
+    ) -> list:
+        """
+        Select the hits within each window as a structured array per window, selecting
+        `window_chunk_size` windows' hits at once and partitioning them by binary search.
+        """
+        import numpy
+
+        hit = entities.CosmicDB_ObservationHit
+        if columns is not None:
+            columns = list(columns) + [
+                colname
+                for colname in ["signal_frequency", "signal_drift_rate"]
+                if colname not in columns
+            ]
+        criteria = [] if criteria is None else list(criteria)
+        bounds = [hit_windows.window_bounds(window) for window in windows]
+
+        window_hits = []
+        for chunk_start in range(0, len(windows), window_chunk_size):
+            chunk_bounds = bounds[chunk_start:chunk_start+window_chunk_size]
+            hits = self.select_structured_array(
+                hit,
+                columns=columns,
+                criteria=criteria + [
+                    sqlalchemy.or_(*[
+                        hit_windows.window_criterion(window)
+                        for window in windows[chunk_start:chunk_start+window_chunk_size]
+                    ])
+                ],
+                order_by=hit.signal_frequency,
+                chunk_size=chunk_size
+            )
+            frequencies = hits["signal_frequency"]
+            for frequency_lower, frequency_upper, drift_rate_lower, drift_rate_upper in chunk_bounds:
+                window_slice = hits[
+                    0 if frequency_lower is None else numpy.searchsorted(frequencies, frequency_lower, side="left"):
+                    len(hits) if frequency_upper is None else numpy.searchsorted(frequencies, frequency_upper, side="right")
+                ]
+                drift_rates = window_slice["signal_drift_rate"]
+                within = numpy.ones(len(window_slice), dtype=bool)
+                if drift_rate_lower is not None:
+                    within &= drift_rates >= drift_rate_lower
+                if drift_rate_upper is not None:
+                    within &= drift_rates <= drift_rate_upper
+                window_hits.append(window_slice[within])
+        return window_hits
+
+    def update_hit_rollups(self, id_batch_size: int = 1000000, observation_ids: list = None) -> int:
+        """
+        Roll up the hits and stamps beyond the watermarks (see `rollups`), or rebuild those of
+        `observation_ids`, committing each batch of `id_batch_size` IDs. Returns the count of
+        hits rolled up. Updates should not be run concurrently.
+        """
+        hit_table = entities.CosmicDB_ObservationHit.__table__
+        stamp_table = entities.CosmicDB_ObservationStamp.__table__
+        rollup_table = entities.CosmicDB_HitRollup.__table__
+        watermark_tables = {
+            "hit_rollup.hit_id": hit_table,
+            "hit_rollup.stamp_id": stamp_table,
+        }
+
+        if observation_ids is not None:
+            observation_ids = list(dict.fromkeys(observation_ids))
+            with self.engine.begin() as conn:
+                conn.execute(
+                    sqlalchemy.delete(rollup_table)
+                    .where(rollup_table.c.observation_id.in_(observation_ids))
+                )
+                partials = rollups.select_partials(
+                    conn,
+                    hit_criteria = [
+                        hit_table.c.observation_id.in_(observation_ids),
+                        hit_table.c.id <= rollups.get_watermark(conn, "hit_rollup.hit_id"),
+                    ],
+                    stamp_criteria = [
+                        stamp_table.c.observation_id.in_(observation_ids),
+                        stamp_table.c.id <= rollups.get_watermark(conn, "hit_rollup.stamp_id"),
+                    ]
+                )
+                rollups.merge_partials(conn, partials)
+            return sum(key_partial["hit_count"] for key_partial in partials.values())
+
+        rolled_up_hit_count = 0
+        for watermark_name, table in watermark_tables.items():
+            with self.engine.connect() as conn:
+                watermark = rollups.get_watermark(conn, watermark_name)
+                max_id = conn.execute(sqlalchemy.select(sqlalchemy.func.max(table.c.id))).scalar_one()
+
+            while max_id is not None and watermark < max_id:
+                batch_end = min(watermark + id_batch_size, max_id)
+                criteria = [table.c.id > watermark, table.c.id <= batch_end]
+                with self.engine.begin() as conn:
+                    partials = rollups.select_partials(
+                        conn,
+                        hit_criteria = criteria if table is hit_table else None,
+                        stamp_criteria = criteria if table is stamp_table else None
+                    )
+                    rollups.merge_partials(conn, partials)
+                    rollups.set_watermark(conn, watermark_name, batch_end)
+                rolled_up_hit_count += sum(key_partial["hit_count"] for key_partial in partials.values())
+                watermark = batch_end
+
+        return rolled_up_hit_count
+
+    def select_entities(
+        self,
+        entity_class,
+        keys: list,
+        session=None,
+        create_missing_entities: bool = False,
+        chunk_size: int = 500,
+        missing_entity_values = None
+    ):
+        """
+        Select many entities by primary key (tuples of composite keys) in chunked `IN` queries,
+        or joining a temporary table of more than `value_tables.IN_VALUES_TEMPORARY_TABLE_THRESHOLD`
+        keys, returning the entities keyed by primary key and the keys not found. With
+        `create_missing_entities`, those are inserted with the `missing_entity_values` (a dict,
+        or a callable of the key) of the columns that are neither nullable nor defaulted.
+        """
+        if session is None:
+            with self.session() as session:
+                return self.select_entities(entity_class, keys, session, create_missing_entities, chunk_size, missing_entity_values)
+
+        primary_key_columns = list(entity_class.__table__.primary_key.columns)
+        composite = len(primary_key_columns) > 1
+        if composite:
+            entity_key = lambda entity: tuple(getattr(entity, col.key) for col in primary_key_columns)
+        else:
+            entity_key = lambda entity: getattr(entity, primary_key_columns[0].key)
+
+        keys = list(dict.fromkeys(tuple(key) if composite else key for key in keys))
+        if len(keys) > value_tables.IN_VALUES_TEMPORARY_TABLE_THRESHOLD:
+            chunk_size = len(keys)
+        def select_chunks(keys):
+            entity_map = {}
+            for chunk_start in range(0, len(keys), chunk_size):
+                for entity in session.scalars(
+                    sqlalchemy.select(entity_class)
+                    .where(value_tables.in_values(primary_key_columns, keys[chunk_start:chunk_start+chunk_size]))
+                ):
+                    entity_map[entity_key(entity)] = entity
+            return entity_map
+
+        entity_map = select_chunks(keys)
+        missing_keys = [
+            key
+            for key in keys
+            if key not in entity_map
+        ]
+        if create_missing_entities and len(missing_keys) > 0:
+            if missing_entity_values is None:
+                missing_entity_values = {}
+            if not callable(missing_entity_values):
+                missing_entity_values = lambda key, values=missing_entity_values: values
+            missing_rows = [
+                {
+                    **missing_entity_values(key),
+                    **dict(zip(
+                        [col.name for col in primary_key_columns],
+                        key if composite else (key,)
+                    ))
+                }
+                for key in missing_keys
+            ]
+            required_colnames = {
+                col.name
+                for col in entity_class.__table__.columns
+                if not col.nullable
+                and not col.primary_key
+                and col.default is None
+                and col.server_default is None
+            }
+            for row in missing_rows:
+                if not required_colnames.issubset(row.keys()):
+                    raise ValueError(
+                        f"Missing {entity_class.__name__} entities need values for {sorted(required_colnames.difference(row.keys()))} (see `missing_entity_values`)."
+                    )
+            session.execute(
+                sqlalchemy.insert(entity_class.__table__),
+                missing_rows
+            )
+            session.commit()
+            # the commit expires the entities already selected
+            entity_map = select_chunks(keys)
+
+        return entity_map, missing_keys
+
     def update_entity(self,
         session,
         entity,
@@ -247,8 +1885,8 @@ class CosmicDB_Engine:
     ):
         # Returns 
         remote_entity = self.select_entity(
-            session,
             entity.__class__,
+            session,
             **{
                col.name: getattr(entity, col.name)
                 for col in entity.__table__.columns
@@ -268,6 +1906,177 @@ class CosmicDB_Engine:
             setattr(remote_entity, col.name, getattr(entity, col.name))
         return False, remote_entity
 
+    def upsert_entities(
+        self,
+        entities_: list,
+        field_update_filter=None,
+        batch_size: int = 1000,
+        conflict_colnames: list = None
+    ):
+        """
+        Insert the entities (or (entity_class, dict) tuples), updating the
+        `field_update_filter` columns of those whose key exists, in a transaction of
+        `INSERT ... ON DUPLICATE KEY UPDATE`/`ON CONFLICT DO UPDATE` statements. The key is
+        the primary key when provided, else the first unique key that is, or `conflict_colnames`.
+        Returns the `(inserted_count, updated_count)`.
+        """
+        dialect_name = self.engine.dialect.name
+        if dialect_name == "mysql":
+            from sqlalchemy.dialects.mysql import insert as dialect_insert
+        elif dialect_name == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        elif dialect_name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            raise ValueError(f"Upserting is not supported for the '{dialect_name}' dialect.")
+
+        # group rows by table and by the set of columns provided,
+        # omitting unset primary keys so that they are generated
+        groups = {}
+        for entity in entities_:
+            if isinstance(entity, tuple):
+                entity_class, values = entity
+            else:
+                entity_class = entity.__class__
+                values = {
+                    col.name: getattr(entity, col.name)
+                    for col in entity.__table__.columns
+                }
+            # unset columns derived by a callable default (e.g. `sky_pixel`) are omitted so that they are generated
+            values = {
+                colname: colval
+                for colname, colval in values.items()
+                if not (colval is None and _column_is_generated(entity_class.__table__.columns[colname]))
+            }
+            groups.setdefault((entity_class.__table__, tuple(sorted(values.keys()))), []).append(values)
+
+        inserted_count = 0
+        updated_count = 0
+        with self.engine.begin() as conn:
+            for (table, colnames), rows in groups.items():
+                if conflict_colnames is not None:
+                    missing_colnames = set(conflict_colnames).difference(colnames)
+                    if len(missing_colnames) > 0:
+                        raise ValueError(f"The conflict columns {sorted(missing_colnames)} of {table.name} are not provided.")
+                    key_columns = [table.columns[colname] for colname in conflict_colnames]
+                else:
+                    key_columns = next(
+                        (
+                            candidate_columns
+                            for candidate_columns in [
+                                list(table.primary_key.columns),
+                                *[
+                                    list(constraint.columns)
+                                    for constraint in table.constraints
+                                    if isinstance(constraint, sqlalchemy.UniqueConstraint)
+                                ],
+                                *[
+                                    list(index.columns)
+                                    for index in table.indexes
+                                    if index.unique
+                                ],
+                            ]
+                            if len(candidate_columns) > 0 and all(col.name in colnames for col in candidate_columns)
+                        ),
+                        None
+                    )
+                if key_columns is None:
+                    for batch_start in range(0, len(rows), batch_size):
+                        conn.execute(sqlalchemy.insert(table), rows[batch_start:batch_start+batch_size])
+                    inserted_count += len(rows)
+                    continue
+
+                key_colnames = [col.name for col in key_columns]
+                update_colnames = [
+                    colname
+                    for colname in colnames
+                    if not table.columns[colname].primary_key
+                    and colname not in key_colnames
+                    and (field_update_filter is None or colname in field_update_filter)
+                ]
+                if len(update_colnames) > 0:
+                    # keep derived columns consistent with the updated columns
+                    update_colnames += [
+                        col.name
+                        for col in table.columns
+                        if col.name not in colnames
+                        and not col.primary_key
+                        and _column_is_generated(col)
+                    ]
+                row_key = lambda row: tuple(row[colname] for colname in key_colnames)
+
+                for batch_start in range(0, len(rows), batch_size):
+                    batch = rows[batch_start:batch_start+batch_size]
+
+                    if dialect_name == "mysql":
+                        # locks the keys (and, for those missing, their gaps) until the commit
+                        existing_count = len(conn.execute(
+                            sqlalchemy.select(*key_columns)
+                            .where(sqlalchemy.tuple_(*key_columns).in_(list(set(map(row_key, batch)))))
+                            .with_for_update()
+                        ).all())
+                        statement = dialect_insert(table).values(batch)
+                        conn.execute(
+                            statement.on_duplicate_key_update({
+                                colname: statement.inserted[colname]
+                                for colname in (update_colnames if len(update_colnames) > 0 else key_colnames[:1])
+                            })
+                        )
+                        batch_inserted_count = len(batch) - existing_count
+
+                    elif dialect_name == "postgresql":
+                        statement = dialect_insert(table).values(batch)
+                        if len(update_colnames) == 0:
+                            statement = statement.on_conflict_do_nothing(index_elements=key_columns)
+                        else:
+                            statement = statement.on_conflict_do_update(
+                                index_elements = key_columns,
+                                set_ = {
+                                    colname: statement.excluded[colname]
+                                    for colname in update_colnames
+                                }
+                            )
+                        # only a row that was inserted has no deleting transaction
+                        batch_inserted_count = sum(conn.execute(
+                            statement.returning(sqlalchemy.literal_column("xmax = 0"))
+                        ).scalars())
+
+                    else:
+                        # inserting those without a conflict first returns which they were,
+                        # while holding the database's write lock for the update of the rest
+                        statement = dialect_insert(table).values(batch)
+                        inserted_keys = set(
+                            tuple(row)
+                            for row in conn.execute(
+                                statement.on_conflict_do_nothing(index_elements=key_columns)
+                                .returning(*key_columns)
+                            )
+                        )
+                        batch_inserted_count = len(inserted_keys)
+                        # the first row of each inserted key was inserted, later ones update it
+                        remaining_rows = []
+                        for row in batch:
+                            if row_key(row) in inserted_keys:
+                                inserted_keys.remove(row_key(row))
+                            else:
+                                remaining_rows.append(row)
+                        if len(update_colnames) > 0 and len(remaining_rows) > 0:
+                            statement = dialect_insert(table).values(remaining_rows)
+                            conn.execute(
+                                statement.on_conflict_do_update(
+                                    index_elements = key_columns,
+                                    set_ = {
+                                        colname: statement.excluded[colname]
+                                        for colname in update_colnames
+                                    }
+                                )
+                            )
+
+                    inserted_count += batch_inserted_count
+                    updated_count += len(batch) - batch_inserted_count
+
+        return inserted_count, updated_count
+
     def update_entity_and_commit(self,
         session,
         entity,
@@ -291,7 +2100,7 @@ class CosmicDB_Engine:
 def get_storage_filesystem_latest_mount(
     engine_conf_yaml_filepath: str
 ):
-    engine_multiconf = CosmicDB_EngineMultiConfig(engine_conf_yaml_filepath)
+    engine_multiconf = CosmicDB_EngineMultiConfig(engine_conf_yaml_filepath, lazy_storage_discovery=True)
     cosmicdb_operation_engine = engine_multiconf.get_operation_dbengine()
     cosmicdb_storage_engine = engine_multiconf.get_active_storage_dbengine(cosmicdb_operation_engine)
     storage_filesystem_uuid = cosmicdb_storage_engine.select_entity(
@@ -322,6 +2131,47 @@ def cli_add_engine_arguments(parser, add_scope_argument: bool = True, add_storag
         default=os.environ.get("COSMICDB_CONFPATH", "/home/cosmic/conf/cosmicdb_v2.1_conf.yaml"),
         help="The YAML file path containing the instantiation arguments for the SQLAlchemy.engine.url.URL instance specifying the database."
     )
+    parser.add_argument(
+        "--discovery-workers",
+        type=int,
+        default=int(os.environ.get("COSMICDB_DISCOVERY_WORKERS", 8)),
+        help="The number of Storage DBs probed concurrently when loading the configuration."
+    )
+    parser.add_argument(
+        "--discovery-probe-timeout",
+        type=float,
+        default=None,
+        help="Seconds after which an unresponsive Storage DB probe is abandoned."
+    )
+    parser.add_argument(
+        "--discovery-timeout",
+        type=float,
+        default=None,
+        help="Seconds after which all outstanding Storage DB probes are abandoned."
+    )
+    parser.add_argument(
+        "--discovery-cache-dir",
+        type=str,
+        default=os.environ.get("COSMICDB_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "cosmic_database")),
+        help="The directory caching the discovered Storage DB filesystem UUIDs and labels, and the Storage DB manifests."
+    )
+    parser.add_argument(
+        "--discovery-cache-ttl",
+        type=float,
+        default=86400,
+        help="Seconds after which the Storage DB discovery cache is disregarded."
+    )
+    parser.add_argument(
+        "--storage-manifest-ttl",
+        type=float,
+        default=300,
+        help="Seconds after which a cached Storage DB manifest is validated again before it skips its Storage DB."
+    )
+    parser.add_argument(
+        "--no-discovery-cache",
+        action="store_true",
+        help="Neither read nor write the Storage DB discovery cache, nor the Storage DB manifests."
+    )
     if add_scope_argument is not False:
         parser.add_argument(
             "--scope",
@@ -347,6 +2197,18 @@ def cli_add_engine_arguments(parser, add_scope_argument: bool = True, add_storag
             help="The identifying FileSystem label in the scoped case of a Storage DB. Inferior to the UUID.",
         )
 
+def cli_create_engine_multiconfig(args):
+    return CosmicDB_EngineMultiConfig(
+        args.engine_configuration,
+        discovery_workers=args.discovery_workers,
+        discovery_probe_timeout_s=args.discovery_probe_timeout,
+        discovery_timeout_s=args.discovery_timeout,
+        lazy_storage_discovery=True,
+        discovery_cache_dirpath=None if args.no_discovery_cache else args.discovery_cache_dir,
+        discovery_cache_ttl_s=args.discovery_cache_ttl,
+        storage_manifest_ttl_s=args.storage_manifest_ttl
+    )
+
 def cli_parse_engine_scope_argument(args):
     if hasattr(args, "scope") and args.scope is not None:
         args.scope = entities.DatabaseScope(args.scope)
@@ -370,17 +2232,26 @@ def cli_create_all_tables():
         formatter_class=argparse.ArgumentDefaultsHelpFormatter,
     )
     cli_add_engine_arguments(parser)
+    parser.add_argument(
+        "--create-missing-indexes",
+        action="store_true",
+        help="Also create the indexes that pre-existing tables lack (which can take long on populated tables)."
+    )
 
     args = parser.parse_args()
     cli_parse_engine_scope_argument(args)
     
-    CosmicDB_EngineMultiConfig(
-        args.engine_configuration
+    dbengine = cli_create_engine_multiconfig(
+        args
     ).get_dbengine(
         args.scope,
         args.storagedb_uuid,
         args.storagedb_fslabel
-    ).create_all_tables()
+    )
+    dbengine.create_all_tables()
+    if args.create_missing_indexes:
+        for index_name in dbengine.create_missing_indexes():
+            print(f"Created index {index_name}")
 
 
 def cli_create_engine_url():
@@ -399,17 +2270,26 @@ def cli_create_engine_url():
     print(f"{scope.value}: '{url}'")
 
 
-def _in_csv_tolist(rhs: str):
-    import pandas
+def _in_csv_values(rhs: str, value_conversion = None):
+    """
+    Yield the values of a column of a CSV file ('<filepath>:<column>'), streaming the
+    file a row at a time, converted by `value_conversion` and omitting empty values.
+    """
+    import csv
     try:
         filepath, column = rhs.split(":")
     except ValueError:
         raise ValueError(f"The in_csv operator expects the column specification after a colon (':').") from None
-    df = pandas.read_csv(filepath)
-    try:
-        return df[column].tolist()
-    except KeyError:
-        raise KeyError(f"CSV file '{filepath}' has no column '{column}'.") from None
+    with open(filepath, "r", newline="") as csv_fio:
+        reader = csv.reader(csv_fio)
+        try:
+            column_index = next(reader, []).index(column)
+        except ValueError:
+            raise KeyError(f"CSV file '{filepath}' has no column '{column}'.") from None
+        for row in reader:
+            if column_index >= len(row) or row[column_index] == "":
+                continue
+            yield row[column_index] if value_conversion is None else value_conversion(row[column_index])
 
 
 criterion_operations = {
@@ -421,9 +2301,9 @@ criterion_operations = {
     "lt": lambda lhs, rhs: lhs < rhs,
     "leq": lambda lhs, rhs: lhs <= rhs,
     "neq": lambda lhs, rhs: lhs != rhs,
-    "not_in": lambda lhs, rhs: lhs.not_in(rhs),
-    "in": lambda lhs, rhs: lhs.in_(rhs),
-    "in_csv": lambda lhs, rhs: lhs.in_(_in_csv_tolist(rhs)),
+    "not_in": lambda lhs, rhs: sqlalchemy.not_(value_tables.in_values(lhs, rhs)),
+    "in": lambda lhs, rhs: value_tables.in_values(lhs, rhs),
+    "in_csv": lambda lhs, rhs: value_tables.in_values(lhs, _in_csv_values(rhs, value_conversions.get(lhs.type.python_type))),
     "like": lambda lhs, rhs: lhs.like(rhs),
     "ilike": lambda lhs, rhs: lhs.ilike(rhs),
     "contains": lambda lhs, rhs: lhs.contains(rhs),
@@ -453,12 +2333,14 @@ def cli_replace_fieldnames_with_column_instances(
     element_getter = lambda element: element,
     element_setter = lambda element, replacement: replacement
 ):
-    entity_col_map = {
-        entity: {
-            col.name: col
-            for col in entity_class.__table__.columns
-
-        }
+    entity_col_map = {
+        entity: STATEMENT_CACHE.get(
+            ("entity_columns", entity_class),
+            lambda: {
+                col.name: col
+                for col in entity_class.__table__.columns
+            }
+        )
         for entity, entity_class in entity_class_map.items()
     }
 
@@ -505,6 +2387,8 @@ def cli_add_where_argument(parser):
             Instance selection field criterion.
             The comparison value is an element of {', '.join(criterion_operations.keys())}.
             Only the 'in' operator supports multiple values, which are semi-colon delimited.
+            The 'in_csv' operator takes the values of a column of a CSV file, as '<filepath>:<column>'.
+            More than {value_tables.IN_VALUES_TEMPORARY_TABLE_THRESHOLD} values are joined from a temporary table.
             DateTime values must be given as ISO formatted strings.
         """,
     )
@@ -521,7 +2405,9 @@ def cli_parse_where_criterion(operand, operator: str, value:str):
     elif isinstance(operand, list):
         raise ValueError("Where criterion for a list is not supported.")
 
-    if operator in [
+    if operator == "in_csv":
+        pass
+    elif operator in [
         "in",
         "not_in",
     ]:
@@ -625,7 +2511,7 @@ def cli_alter_db():
     args.entity = getattr(entities, entity_name)
     cli_parse_engine_scope_argument(args)
 
-    engine = CosmicDB_EngineMultiConfig(args.engine_configuration).get_dbengine(args.scope, args.storagedb_uuid, args.storagedb_fslabel)
+    engine = cli_create_engine_multiconfig(args).get_dbengine(args.scope, args.storagedb_uuid, args.storagedb_fslabel)
     assert args.entity in entities.DATABASE_SCOPES[engine.scope]
     if args.field is None:
         if args.create:
@@ -671,146 +2557,498 @@ def cli_write_filesystem_mount():
         help="The host of the filesystem.",
     )
     parser.add_argument(
-        "--label",
+        "--label",
+        type=str,
+        default=None,
+        help="The filesystem's label, see `$ lsblk -o name,size,mountpoint,label,uuid`. Optional for existing Filesystems.",
+    )
+    parser.add_argument(
+        "--time",
+        type=str,
+        default=now_str,
+        help="The start time of mount (ISO format, `date -Iseconds`). Is also set as the end time of the prior mount. Defaults to now.",
+    )
+    parser.add_argument(
+        "--first-mount",
+        action='store_true',
+        help="Expect no previous mount history.",
+    )
+    parser.add_argument(
+        "--prompt",
+        action='store_true',
+        help="Prompt before committing.",
+    )
+
+    args = parser.parse_args()
+
+
+    engine = cli_create_engine_multiconfig(args).get_operation_dbengine()
+    with engine.session() as session:
+        filesystem_entity = session.scalars(
+            sqlalchemy.select(
+                entities.CosmicDB_Filesystem
+            ).where(
+                entities.CosmicDB_Filesystem.uuid == args.uuid
+            )
+        ).one_or_none()
+        if filesystem_entity is None:
+            assert args.first_mount, f"Filesystem is new to the database."
+
+            filesystem_entity = entities.CosmicDB_Filesystem(
+                uuid=args.uuid,
+                label=args.label,
+            )
+            session.add(filesystem_entity)
+            print(f"Committing: {filesystem_entity}")
+            if args.prompt:
+                assert input("Continue (Y/n)? ") in ["Y", "y", "yes", ""]
+            session.commit()
+        else:
+            last_mount = filesystem_entity.get_latest_mount(session)
+            if args.first_mount:
+                assert last_mount is None, f"Unexpected previous mount for existing filesystem: {last_mount}.\nRemove `--first-mount`."
+            else:
+                assert last_mount is not None, f"No previous mount to close for existing: {filesystem_entity}.\nConsider `--first-mount`."
+
+                assert last_mount.is_current()
+                last_mount.end = value_conversions[datetime](args.time)
+                print(f"Updated: {last_mount}")
+                if args.prompt:
+                    assert input("Continue (Y/n)? ") in ["Y", "y", "yes", ""]
+                session.commit()
+        
+        filesystem_mount_entity = entities.CosmicDB_FilesystemMount(
+            filesystem_uuid=args.uuid,
+            host=args.host,
+            host_mountpoint=f"/srv/{filesystem_entity.label}",
+            network_uri=f"/mnt/{args.host}/{filesystem_entity.label}",
+            start=value_conversions[datetime](args.time)
+        )
+
+        print(f"Committing: {filesystem_mount_entity}")
+        if args.prompt:
+            assert input("Continue (Y/n)? ") in ["Y", "y", "yes", ""]
+        session.add(filesystem_mount_entity)
+        session.commit()
+
+
+def cli_write_changelog():
+    import argparse
+    from datetime import datetime
+    now = datetime.now()
+
+    parser = argparse.ArgumentParser(
+        description="Minor interface to write COSMIC ChangelogEntry entity.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    cli_add_engine_arguments(parser, add_scope_argument=False, add_storagedb_uuid_argument=False)
+    
+    parser.add_argument(
+        "description",
+        type=str,
+        help="The changlog entry.",
+    )
+    
+    args = parser.parse_args()
+
+    engine = cli_create_engine_multiconfig(args).get_operation_dbengine()
+    with engine.session() as session:
+        changelog_entry = entities.CosmicDB_ChangelogEntry(
+            timestamp=now,
+            description=args.description
+        )
+        session.add(changelog_entry)
+        session.commit()
+
+
+def cli_write_operation_dbinfo():
+    import argparse
+    from datetime import datetime
+    now = datetime.now()
+
+    parser = argparse.ArgumentParser(
+        description="Minor interface to write COSMIC OperationDatabaseInfo entity.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    cli_add_engine_arguments(parser, add_scope_argument=False, add_storagedb_uuid_argument=False)
+    
+    parser.add_argument(
+        "archival_filesystem_mount_id",
+        type=int,
+        help="The now active FilesystemMount ID.",
+    )
+    
+    args = parser.parse_args()
+
+    engine = cli_create_engine_multiconfig(args).get_operation_dbengine()
+    with engine.session() as session:
+        prior = session.scalars(
+            sqlalchemy.select(entities.CosmicDB_OperationDatabaseInfo)
+            .where(
+                entities.CosmicDB_OperationDatabaseInfo.end is None
+            )
+        ).one_or_none()
+        dbinfo_entry = entities.CosmicDB_OperationDatabaseInfo(
+            start=now,
+            archival_filesystem_mount_id=args.archival_filesystem_mount_id
+        )
+        session.add(dbinfo_entry)
+        session.commit()
+        if prior is not None:
+            prior.end = now
+            session.commit()
+
+
+def cli_sky_coverage():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Query (and update) the index of the sky coverage of COSMIC observations.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    cli_add_engine_arguments(parser, add_scope_argument=False, add_storagedb_uuid_argument=False)
+
+    parser.add_argument(
+        "ra",
+        nargs="?",
+        type=float,
+        default=None,
+        help="The right ascension of the position queried.",
+    )
+    parser.add_argument(
+        "dec",
+        nargs="?",
+        type=float,
+        default=None,
+        help="The declination of the position queried.",
+    )
+    parser.add_argument(
+        "--ra-unit",
+        type=str,
+        default="degrees",
+        choices=["radians", "degrees", "hours"],
+        help="The unit of the right ascension.",
+    )
+    parser.add_argument(
+        "--dec-unit",
+        type=str,
+        default="degrees",
+        choices=["radians", "degrees"],
+        help="The unit of the declination, and of the radii.",
+    )
+    parser.add_argument(
+        "-r", "--radius",
+        type=float,
+        default=0.0,
+        help="The radius of the region queried, or 0 to query the pixel of the position.",
+    )
+    parser.add_argument(
+        "-u", "--update",
+        action="store_true",
+        help="Index the observations not yet indexed, before querying.",
+    )
+    parser.add_argument(
+        "--reindex-observation-ids",
+        type=int,
+        nargs="+",
+        default=None,
+        help="Replace the coverage of these observations when updating.",
+    )
+    parser.add_argument(
+        "--footprint-radius",
+        type=float,
+        default=0.0,
+        help="The radius of each beam's footprint when updating, or 0 to cover the pixel of each beam's position.",
+    )
+
+    args = parser.parse_args()
+    assert (args.ra is None) == (args.dec is None), "Specify both the RA and declination of the position queried."
+    assert args.update or args.ra is not None, "Specify a position to query, or --update."
+
+    engine = cli_create_engine_multiconfig(args).get_operation_dbengine()
+    if args.update:
+        indexed_count = engine.update_sky_coverage(
+            footprint_radius_radians=sky.to_radians(args.footprint_radius, args.dec_unit),
+            observation_ids=args.reindex_observation_ids
+        )
+        print(f"Indexed the sky coverage of {indexed_count} observation(s).")
+    if args.ra is None:
+        return
+
+    coverage = engine.select_sky_coverage(
+        sky.to_radians(args.ra, args.ra_unit),
+        sky.to_radians(args.dec, args.dec_unit),
+        sky.to_radians(args.radius, args.dec_unit)
+    )
+    radians_to_ra_unit = 1/sky.to_radians(1.0, args.ra_unit)
+    radians_to_dec_unit = 1/sky.to_radians(1.0, args.dec_unit)
+    observation_ids = set()
+    for pixel_coverage in coverage:
+        observation_ids.update(pixel_coverage["observation_ids"])
+        frequency_ranges = ", ".join(
+            f"{lower}-{upper}"
+            for lower, upper in pixel_coverage["frequency_ranges_MHz"]
+        )
+        print(
+            f"Pixel {pixel_coverage['sky_pixel']}"
+            f" (RA {pixel_coverage['ra_radians']*radians_to_ra_unit:0.6f} {args.ra_unit},"
+            f" Dec {pixel_coverage['dec_radians']*radians_to_dec_unit:0.6f} {args.dec_unit}):"
+            f" {pixel_coverage['exposure_s']:0.1f} s,"
+            f" {frequency_ranges if len(frequency_ranges) > 0 else 'no'} MHz,"
+            f" observation(s) {pixel_coverage['observation_ids']}"
+        )
+    print(f"{len(coverage)} pixel(s) covered by {len(observation_ids)} observation(s).")
+
+
+def cli_hit_windows():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Count, or select, the COSMIC hits within frequency/drift-rate windows.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    cli_add_engine_arguments(parser, add_scope_argument=False, add_storagedb_uuid_argument=False)
+    parser.add_argument(
+        "--storagedb-uuid",
+        type=str,
+        default=None,
+        help="The identifying filesystem UUID of a Storage DB. Default is to query all Storage DBs.",
+    )
+    parser.add_argument(
+        "--storagedb-fslabel",
+        type=str,
+        default=None,
+        help="The identifying FileSystem label of a Storage DB. Inferior to the UUID.",
+    )
+    parser.add_argument(
+        "-W",
+        "--window",
+        type=str,
+        nargs="+",
+        action="append",
+        default=[],
+        metavar="bound",
+        help="A window's inclusive frequency bounds, optionally followed by its drift-rate bounds: 'lower upper [lower upper]'. A bound of 'none' is unbounded.",
+    )
+    parser.add_argument(
+        "--windows-csv",
+        type=str,
+        default=None,
+        help="A CSV file of windows, with a header of 'frequency_lower,frequency_upper[,drift_rate_lower,drift_rate_upper]'. Empty bounds are unbounded.",
+    )
+    cli_add_where_argument(parser)
+    parser.add_argument(
+        "--rows-output-filepath",
+        type=str,
+        default=None,
+        help="Select the hits of each window into this file (with a 'window' column, and a 'storage_fslabel' column when querying all Storage DBs), formatted by extension as per cosmicdb_inspect's --pandas-output-filepath.",
+    )
+    parser.add_argument(
+        "--fanout-workers",
+        type=int,
+        default=8,
+        help="The number of Storage DBs queried concurrently when no particular Storage DB is specified."
+    )
+    parser.add_argument(
+        "--no-storage-planning",
+        action="store_true",
+        help="Query all Storage DBs, instead of only those that the Storage DB manifests show may satisfy the where criteria.",
+    )
+    parser.add_argument(
+        "--hit-summary-planning",
+        action="store_true",
+        help="Also skip the Storage DBs that the Operation DB's hit summaries show cannot satisfy the where criteria, missing the rows of inactive Storage DBs added since the last cosmicdb_sync_hit_summaries.",
+    )
+
+    args = parser.parse_args()
+
+    parse_bound = lambda bound: None if bound in ["", "null", "none", "None", "NULL"] else float(bound)
+    windows = [
+        tuple(map(parse_bound, window))
+        for window in args.window
+    ]
+    if args.windows_csv is not None:
+        import csv
+        with open(args.windows_csv, "r", newline="") as windows_csv_fio:
+            for row in csv.DictReader(windows_csv_fio):
+                windows.append(tuple(
+                    parse_bound(row.get(fieldname, ""))
+                    for fieldname in (
+                        ["frequency_lower", "frequency_upper", "drift_rate_lower", "drift_rate_upper"]
+                        if "drift_rate_lower" in row else
+                        ["frequency_lower", "frequency_upper"]
+                    )
+                ))
+    assert len(windows) > 0, "Specify windows with --window or --windows-csv."
+    for window in windows:
+        hit_windows.window_bounds(window)
+
+    criteria = cli_parse_where_arguments(
+        {None: entities.CosmicDB_ObservationHit},
+        args.where_criteria
+    )
+
+    if args.rows_output_filepath is None:
+        call = lambda uuid, engine: engine.count_hit_windows(windows, criteria=criteria)
+    else:
+        call = lambda uuid, engine: engine.select_hit_windows(windows, criteria=criteria)
+
+    engine_multi_config = cli_create_engine_multiconfig(args)
+    fanout = (args.storagedb_uuid or args.storagedb_fslabel) is None
+    uuid_map_label = {}
+    if fanout:
+        fs_uuids = list(engine_multi_config.storage_uuid_map_engurl.keys())
+        if not args.no_storage_planning:
+            fs_uuids = engine_multi_config.plan_storage_fs_uuids(criteria, fs_uuids, workers=args.fanout_workers, use_hit_summaries=args.hit_summary_planning)
+        try:
+            uuid_map_label = engine_multi_config.get_storage_fs_labels(fs_uuids)
+        except ValueError:
+            pass
+        results = engine_multi_config.fanout_storage(call, workers=args.fanout_workers, fs_uuids=fs_uuids)
+    else:
+        engine = engine_multi_config.get_dbengine(entities.DatabaseScope.Storage, args.storagedb_uuid, args.storagedb_fslabel)
+        results = [(args.storagedb_uuid or args.storagedb_fslabel, call(None, engine), None)]
+
+    window_counts = [0]*len(windows)
+    dfs = []
+    for uuid, result, err in results:
+        fs_name = uuid_map_label.get(uuid, uuid)
+        if err is not None:
+            print(f"Storage DB '{fs_name}' failed: {err}")
+            continue
+        if args.rows_output_filepath is None:
+            window_counts = [total + count for total, count in zip(window_counts, result)]
+            continue
+
+        import pandas
+
+        for window_index, window_hits in enumerate(result):
+            window_counts[window_index] += len(window_hits)
+            if len(window_hits) == 0:
+                continue
+            df = pandas.DataFrame(window_hits)
+            df.insert(0, "window", window_index)
+            if fanout:
+                df["storage_fslabel"] = fs_name
+            dfs.append(df)
+
+    for window_index, (window, count) in enumerate(zip(windows, window_counts)):
+        print(f"Window #{window_index} {hit_windows.window_bounds(window)}: {count} hit(s)")
+
+    if args.rows_output_filepath is not None and len(dfs) > 0:
+        import pandas
+
+        _output_pandas_dfs(
+            [pandas.concat(dfs, ignore_index=True)],
+            args.rows_output_filepath,
+            print_fn = lambda *print_args: None,
+            column_types = {
+                "window": sqlalchemy.Integer(),
+                **{
+                    colname: col.type
+                    for colname, col in entities.CosmicDB_ObservationHit.__table__.columns.items()
+                }
+            }
+        )
+        print(f"Output: {args.rows_output_filepath}")
+
+
+def cli_update_hit_rollups():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Roll up the COSMIC hits and stamps added since the last update into the HitRollup statistics.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    cli_add_engine_arguments(parser, add_scope_argument=False, add_storagedb_uuid_argument=False)
+    parser.add_argument(
+        "--storagedb-uuid",
+        type=str,
+        default=None,
+        help="The identifying filesystem UUID of a Storage DB. Default is to update all Storage DBs.",
+    )
+    parser.add_argument(
+        "--storagedb-fslabel",
         type=str,
         default=None,
-        help="The filesystem's label, see `$ lsblk -o name,size,mountpoint,label,uuid`. Optional for existing Filesystems.",
+        help="The identifying FileSystem label of a Storage DB. Inferior to the UUID.",
     )
     parser.add_argument(
-        "--time",
-        type=str,
-        default=now_str,
-        help="The start time of mount (ISO format, `date -Iseconds`). Is also set as the end time of the prior mount. Defaults to now.",
+        "--id-batch-size",
+        type=int,
+        default=1000000,
+        help="The number of hit (or stamp) IDs rolled up per transaction.",
     )
     parser.add_argument(
-        "--first-mount",
-        action='store_true',
-        help="Expect no previous mount history.",
+        "--rebuild-observation-ids",
+        type=int,
+        nargs="+",
+        default=None,
+        help="Rebuild the rollups of these observations instead.",
     )
     parser.add_argument(
-        "--prompt",
-        action='store_true',
-        help="Prompt before committing.",
+        "--fanout-workers",
+        type=int,
+        default=8,
+        help="The number of Storage DBs updated concurrently when no particular Storage DB is specified."
     )
 
     args = parser.parse_args()
 
+    call = lambda uuid, engine: engine.update_hit_rollups(
+        id_batch_size=args.id_batch_size,
+        observation_ids=args.rebuild_observation_ids
+    )
+    engine_multi_config = cli_create_engine_multiconfig(args)
+    if (args.storagedb_uuid or args.storagedb_fslabel) is not None:
+        results = [(
+            args.storagedb_uuid or args.storagedb_fslabel,
+            call(None, engine_multi_config.get_dbengine(entities.DatabaseScope.Storage, args.storagedb_uuid, args.storagedb_fslabel)),
+            None
+        )]
+    else:
+        results = engine_multi_config.fanout_storage(call, workers=args.fanout_workers)
 
-    engine = CosmicDB_EngineMultiConfig(args.engine_configuration).get_operation_dbengine()
-    with engine.session() as session:
-        filesystem_entity = session.scalars(
-            sqlalchemy.select(
-                entities.CosmicDB_Filesystem
-            ).where(
-                entities.CosmicDB_Filesystem.uuid == args.uuid
-            )
-        ).one_or_none()
-        if filesystem_entity is None:
-            assert args.first_mount, f"Filesystem is new to the database."
-
-            filesystem_entity = entities.CosmicDB_Filesystem(
-                uuid=args.uuid,
-                label=args.label,
-            )
-            session.add(filesystem_entity)
-            print(f"Committing: {filesystem_entity}")
-            if args.prompt:
-                assert input("Continue (Y/n)? ") in ["Y", "y", "yes", ""]
-            session.commit()
+    for uuid, rolled_up_hit_count, err in results:
+        if err is not None:
+            print(f"Storage DB '{uuid}' failed: {err}")
         else:
-            last_mount = filesystem_entity.get_latest_mount(session)
-            if args.first_mount:
-                assert last_mount is None, f"Unexpected previous mount for existing filesystem: {last_mount}.\nRemove `--first-mount`."
-            else:
-                assert last_mount is not None, f"No previous mount to close for existing: {filesystem_entity}.\nConsider `--first-mount`."
-
-                assert last_mount.is_current()
-                last_mount.end = value_conversions[datetime](args.time)
-                print(f"Updated: {last_mount}")
-                if args.prompt:
-                    assert input("Continue (Y/n)? ") in ["Y", "y", "yes", ""]
-                session.commit()
-        
-        filesystem_mount_entity = entities.CosmicDB_FilesystemMount(
-            filesystem_uuid=args.uuid,
-            host=args.host,
-            host_mountpoint=f"/srv/{filesystem_entity.label}",
-            network_uri=f"/mnt/{args.host}/{filesystem_entity.label}",
-            start=value_conversions[datetime](args.time)
-        )
-
-        print(f"Committing: {filesystem_mount_entity}")
-        if args.prompt:
-            assert input("Continue (Y/n)? ") in ["Y", "y", "yes", ""]
-        session.add(filesystem_mount_entity)
-        session.commit()
+            print(f"Storage DB '{uuid}': rolled up {rolled_up_hit_count} hit(s).")
 
 
-def cli_write_changelog():
+def cli_sync_hit_summaries():
     import argparse
-    from datetime import datetime
-    now = datetime.now()
 
     parser = argparse.ArgumentParser(
-        description="Minor interface to write COSMIC ChangelogEntry entity.",
+        description="Synchronise the per-observation hit summaries of the Storage DBs into the Operation DB, with which queries contact only the Storage DBs that may satisfy them.",
         formatter_class=argparse.ArgumentDefaultsHelpFormatter,
     )
     cli_add_engine_arguments(parser, add_scope_argument=False, add_storagedb_uuid_argument=False)
-    
     parser.add_argument(
-        "description",
+        "--storagedb-uuid",
         type=str,
-        help="The changlog entry.",
-    )
-    
-    args = parser.parse_args()
-
-    engine = CosmicDB_EngineMultiConfig(args.engine_configuration).get_operation_dbengine()
-    with engine.session() as session:
-        changelog_entry = entities.CosmicDB_ChangelogEntry(
-            timestamp=now,
-            description=args.description
-        )
-        session.add(changelog_entry)
-        session.commit()
-
-
-def cli_write_operation_dbinfo():
-    import argparse
-    from datetime import datetime
-    now = datetime.now()
-
-    parser = argparse.ArgumentParser(
-        description="Minor interface to write COSMIC OperationDatabaseInfo entity.",
-        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+        nargs="+",
+        default=None,
+        help="The identifying filesystem UUIDs of the Storage DBs. Default is to synchronise all Storage DBs.",
     )
-    cli_add_engine_arguments(parser, add_scope_argument=False, add_storagedb_uuid_argument=False)
-    
     parser.add_argument(
-        "archival_filesystem_mount_id",
+        "--fanout-workers",
         type=int,
-        help="The now active FilesystemMount ID.",
+        default=8,
+        help="The number of Storage DBs read concurrently."
     )
-    
+
     args = parser.parse_args()
 
-    engine = CosmicDB_EngineMultiConfig(args.engine_configuration).get_operation_dbengine()
-    with engine.session() as session:
-        prior = session.scalars(
-            sqlalchemy.select(entities.CosmicDB_OperationDatabaseInfo)
-            .where(
-                entities.CosmicDB_OperationDatabaseInfo.end is None
-            )
-        ).one_or_none()
-        dbinfo_entry = entities.CosmicDB_OperationDatabaseInfo(
-            start=now,
-            archival_filesystem_mount_id=args.archival_filesystem_mount_id
-        )
-        session.add(dbinfo_entry)
-        session.commit()
-        if prior is not None:
-            prior.end = now
-            session.commit()
+    engine_multi_config = cli_create_engine_multiconfig(args)
+    for uuid, summarised_observation_count, err in engine_multi_config.sync_hit_summaries(
+        workers=args.fanout_workers,
+        fs_uuids=args.storagedb_uuid
+    ):
+        if err is not None:
+            print(f"Storage DB '{uuid}' failed: {err}")
+        else:
+            print(f"Storage DB '{uuid}': summarised {summarised_observation_count} observation(s).")
 
 
 def cli_write():
@@ -868,7 +3106,7 @@ def cli_write():
     
     entity = args.entity(**field_values)
 
-    engine = CosmicDB_EngineMultiConfig(args.engine_configuration).get_dbengine(args.scope, args.storagedb_uuid, args.storagedb_fslabel)
+    engine = cli_create_engine_multiconfig(args).get_dbengine(args.scope, args.storagedb_uuid, args.storagedb_fslabel)
     with engine.session() as session:
         session.add(entity)
         try:
@@ -889,19 +3127,113 @@ def _inspect_pandas_df(
     engine,
     chunksize,
     output_filepath,
-    prindent: str = ''
+    prindent: str = '',
+    print_fn = print
 ):
     import pandas
 
+    with engine.engine.connect() as conn:
+        _output_pandas_dfs(
+            pandas.read_sql_query(
+                sql = sql_query,
+                con = conn,
+                chunksize=chunksize
+            ),
+            output_filepath,
+            prindent,
+            print_fn,
+            column_types = _selected_column_types(sql_query)
+        )
+
+ARROW_FILE_EXTENSIONS = [".parquet", ".feather", ".arrow"]
+
+def _selected_column_types(sql_query) -> dict:
+    return {
+        colname: col.type
+        for colname, col in sql_query.selected_columns.items()
+    }
+
+def _arrow_type(sqlalchemy_type):
+    import pyarrow
+
+    python_type = None
+    try:
+        python_type = sqlalchemy_type.python_type
+    except NotImplementedError:
+        pass
+    return {
+        bool: pyarrow.bool_(),
+        int: pyarrow.int64(),
+        float: pyarrow.float64(),
+        str: pyarrow.string(),
+        datetime: pyarrow.timestamp("us"),
+    }.get(python_type, None)
+
+def _arrow_schema(colnames, column_types: dict):
+    """
+    The Arrow schema for the named columns, typed according to their SQLAlchemy
+    column types. Columns of unknown type are presumed to be strings.
+    """
+    import pyarrow
+
+    return pyarrow.schema([
+        pyarrow.field(
+            colname,
+            (_arrow_type(column_types[colname]) if colname in column_types else None)
+            or pyarrow.string()
+        )
+        for colname in colnames
+    ])
+
+def _arrow_file_writer(output_filepath, schema):
+    """
+    Returns
+    -------
+    A writer with `write_table` and `close` methods: a `pyarrow.parquet.ParquetWriter`
+    for '.parquet' files, else an Arrow IPC (Feather v2) file writer.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(output_filepath)), exist_ok=True)
+    if os.path.splitext(output_filepath)[1] == ".parquet":
+        import pyarrow.parquet
+        return pyarrow.parquet.ParquetWriter(output_filepath, schema)
+
+    import pyarrow.ipc
+    return pyarrow.ipc.new_file(output_filepath, schema)
+
+def _output_pandas_dfs(
+    dfs,
+    output_filepath,
+    prindent: str = '',
+    print_fn = print,
+    column_types: dict = None
+):
+    """
+    Print each dataframe, writing them to the output file according to its extension:
+    '.csv' appends, '.parquet' and '.feather'/'.arrow' stream into a single file typed
+    per `column_types` (the SQLAlchemy type of each column), and otherwise each
+    dataframe is pickled to a numbered file.
+    """
     output_filepath_splitext = None
-    for chunk_i, df in enumerate(pandas.read_sql_query(
-        sql = sql_query,
-        con = engine.engine.connect(),
-        chunksize=chunksize
-    )):
-        print(f"{prindent}dataframe #{chunk_i}\n", df)
-        if output_filepath is not None:
-            if os.path.splitext(output_filepath)[1] == ".csv":
+    arrow_writer = None
+    try:
+        for chunk_i, df in enumerate(dfs):
+            print_fn(f"{prindent}dataframe #{chunk_i}\n", df)
+            if output_filepath is None:
+                continue
+
+            if os.path.splitext(output_filepath)[1] in ARROW_FILE_EXTENSIONS:
+                import pyarrow
+
+                table = pyarrow.Table.from_pandas(
+                    df,
+                    schema = _arrow_schema(df.columns, {} if column_types is None else column_types),
+                    preserve_index = False
+                )
+                if arrow_writer is None:
+                    print_fn(f"{prindent}Output: {output_filepath}")
+                    arrow_writer = _arrow_file_writer(output_filepath, table.schema)
+                arrow_writer.write_table(table)
+            elif os.path.splitext(output_filepath)[1] == ".csv":
                 df.to_csv(
                     output_filepath,
                     mode='w' if chunk_i == 0 else 'a',
@@ -914,27 +3246,395 @@ def _inspect_pandas_df(
                     output_filepath_splitext = os.path.splitext(output_filepath)
                 if chunk_i > 0:
                     output_filepath = f"{output_filepath_splitext[0]}.{chunk_i}{output_filepath_splitext[1]}"
-                print(f"{prindent}Output: {output_filepath}")
+                print_fn(f"{prindent}Output: {output_filepath}")
                 df.to_pickle(output_filepath)
+    finally:
+        if arrow_writer is not None:
+            arrow_writer.close()
+
+def _inspect_merged_storage(
+    sql_query,
+    engine_multi_config,
+    order_column,
+    descending,
+    limit,
+    fs_uuid_map_label,
+    verbosity,
+    chunksize,
+    output_filepath,
+    as_dataframe,
+    fs_uuids = None
+):
+    if not as_dataframe:
+        result_num_str_len = 0 if limit is None else len(str(limit))
+        for result_enum, (fs_uuid, result_str) in enumerate(engine_multi_config.merge_ordered_storage(
+            _with_str_load_options(sql_query, verbosity),
+            order_column,
+            descending = descending,
+            limit = limit,
+            fs_uuids = fs_uuids,
+            orm = True,
+            row_transform = lambda row: row[0]._get_str(verbosity)
+        )):
+            print(f"#{str(result_enum+1).ljust(result_num_str_len)} [{fs_uuid_map_label.get(fs_uuid, fs_uuid)}] {result_str}")
+        return
+
+    import pandas
+
+    columns = list(sql_query.selected_columns.keys()) + ["storage_fslabel"]
+    def merged_dfs():
+        rows = []
+        for fs_uuid, row in engine_multi_config.merge_ordered_storage(
+            sql_query,
+            order_column,
+            descending = descending,
+            limit = limit,
+            fs_uuids = fs_uuids,
+            orm = False
+        ):
+            rows.append((*row, fs_uuid_map_label.get(fs_uuid, fs_uuid)))
+            if len(rows) == chunksize:
+                yield pandas.DataFrame(rows, columns=columns)
+                rows = []
+        if len(rows) > 0:
+            yield pandas.DataFrame(rows, columns=columns)
+
+    _output_pandas_dfs(
+        merged_dfs(),
+        output_filepath,
+        column_types = _selected_column_types(sql_query)
+    )
+
+def _with_str_load_options(sql_query, verbosity):
+    """Eagerly load the relationships rendered for the query's primary entity at the verbosity."""
+    primary_entity = sql_query.column_descriptions[0]["entity"]
+    if primary_entity is None or verbosity < 2:
+        return sql_query
+    return sql_query.options(
+        *primary_entity.get_str_load_options(verbosity)
+    )
+
+def _result_str(result, verbosity):
+    try:
+        return "\n\t" + "\n\t".join(
+            res._get_str(verbosity)
+            for res in result
+        )
+    except TypeError:
+        return result._get_str(verbosity)
 
 def _inspect_scalars(
     sql_query,      
     engine,
     verbosity,
-    prindent: str = ''
+    prindent: str = '',
+    print_fn = print,
+    stream_batch_size: int = None
 ):  
+    """
+    Print the entities selected by the query. With a `stream_batch_size` the results
+    are fetched from a server-side cursor in batches, each printed and then expunged
+    from the session (with its eagerly loaded relationships), so that memory use does
+    not grow with the number of results.
+    """
     with engine.session() as session:
-        results = session.scalars(sql_query).all()
+        if stream_batch_size is not None:
+            result_enum = 0
+            for results in session.scalars(
+                _with_str_load_options(sql_query, verbosity)
+                .execution_options(yield_per=stream_batch_size)
+            ).partitions():
+                for result in results:
+                    result_enum += 1
+                    print_fn(f"{prindent}#{result_enum} {_result_str(result, verbosity)}")
+                # not `expunge_all`, which would invalidate the identity map the open result streams into
+                for instance in list(session):
+                    session.expunge(instance)
+            return
+
+        results = session.scalars(
+            _with_str_load_options(sql_query, verbosity)
+        ).all()
         result_num_str_len = len(str(len(results)))
         for result_enum, result in enumerate(results):
-            try:
-                result_str = "\n\t" + "\n\t".join(
-                    res._get_str(verbosity)
-                    for res in result
+            print_fn(f"{prindent}#{str(result_enum+1).ljust(result_num_str_len)} {_result_str(result, verbosity)}")
+
+AGGREGATE_FUNCTIONS = ["count", "sum", "min", "max", "avg", "p<percentile>"]
+# the most bins of a numeric field's percentile histograms, per database
+AGGREGATE_PERCENTILE_BINS = 10000
+
+def _aggregate_percentile(function: str):
+    """The percentile of a 'p<percentile>' aggregate function (e.g. 'p99'), else None."""
+    if not function.startswith("p"):
+        return None
+    try:
+        percentile = float(function[1:])
+    except ValueError:
+        return None
+    if not 0 <= percentile <= 100:
+        raise ValueError(f"The percentile of aggregate function '{function}' is not within [0, 100].")
+    return percentile
+
+def _aggregate_partial_functions(function: str) -> list:
+    """The functions of the partial aggregates (per database) that merge into the aggregate."""
+    if _aggregate_percentile(function) is not None:
+        return []
+    if function == "avg":
+        return ["sum", "count"]
+    return [function]
+
+def cli_parse_aggregate_argument(entity_class_map, aggregate: str):
+    field, separator, function = aggregate.rpartition(":")
+    if separator == "" or (function not in AGGREGATE_FUNCTIONS[:-1] and _aggregate_percentile(function) is None):
+        raise ValueError(f"Aggregate '{aggregate}' is not of the form 'field:function', with a function of {AGGREGATE_FUNCTIONS}.")
+    if field == "*":
+        if function != "count":
+            raise ValueError(f"Only the 'count' aggregate function applies to all fields ('*'), not '{function}'.")
+        return aggregate, None, function
+    return aggregate, cli_replace_fieldnames_with_column_instances(entity_class_map, [field])[0], function
+
+def _select_aggregate_partials(
+    engine,
+    selection,
+    group_columns: list,
+    aggregates: list,
+    percentile_bin_width: float = None,
+    exact_percentiles: bool = False
+):
+    """
+    Select the partial aggregates of each group, which merge across databases (see
+    `_merge_aggregate_partials`), and for percentiles the histograms of the field's values,
+    binned to `percentile_bin_width`, or to the power of ten spanning a numeric field's range
+    in `AGGREGATE_PERCENTILE_BINS` bins, unless `exact_percentiles` or the range is empty.
+
+    Returns (group values -> partial values, percentile label -> (bin exponent, group values -> [(bin, count)])).
+    """
+    import math
+
+    partial_columns = []
+    for label, column, function in aggregates:
+        for partial_function in _aggregate_partial_functions(function):
+            if column is None:
+                partial_columns.append(sqlalchemy.func.count())
+            else:
+                partial_columns.append(getattr(sqlalchemy.func, partial_function)(column))
+
+    group_partials = {}
+    group_histograms = {}
+    with engine.engine.connect() as conn:
+        if len(partial_columns) > 0:
+            for row in conn.execute(
+                selection(*group_columns, *partial_columns)
+                .group_by(*group_columns)
+            ):
+                group_partials[tuple(row[:len(group_columns)])] = list(row[len(group_columns):])
+
+        for label, column, function in aggregates:
+            field_label = label.rpartition(":")[0]
+            if _aggregate_percentile(function) is None or field_label in group_histograms:
+                continue
+            value_bin = column
+            bin_exponent = None
+            if exact_percentiles:
+                pass
+            elif percentile_bin_width is not None:
+                value_bin = sqlalchemy.func.floor(column/percentile_bin_width)*percentile_bin_width
+            elif column.type.python_type in [int, float]:
+                value_min, value_max = conn.execute(
+                    selection(sqlalchemy.func.min(column), sqlalchemy.func.max(column))
+                ).one()
+                # a single value is exact, so as not to widen the merged bins
+                if value_min is not None and value_max > value_min:
+                    bin_exponent = math.ceil(math.log10((value_max - value_min)/AGGREGATE_PERCENTILE_BINS))
+                    if column.type.python_type is int:
+                        bin_exponent = max(0, bin_exponent)
+                    # multiplying by an integer rounds less than dividing by a fraction
+                    value_bin = sqlalchemy.func.floor(column/10**bin_exponent if bin_exponent >= 0 else column*10**-bin_exponent)
+            histograms = {}
+            for row in conn.execute(
+                selection(*group_columns, value_bin, sqlalchemy.func.count())
+                .where(column.is_not(None))
+                .group_by(*group_columns, value_bin)
+            ):
+                value, count = row[len(group_columns):]
+                histograms.setdefault(tuple(row[:len(group_columns)]), []).append(
+                    (value if bin_exponent is None else int(value), count)
                 )
-            except TypeError:
-                result_str = result._get_str(verbosity)
-            print(f"{prindent}#{str(result_enum+1).ljust(result_num_str_len)} {result_str}")
+            group_histograms[field_label] = (bin_exponent, histograms)
+
+    return group_partials, group_histograms
+
+def _merge_aggregate_partials(partials: list, aggregates: list) -> list:
+    """
+    Merge the databases' partial aggregates into rows of the group values followed by the
+    aggregate values, in group order. Binned percentiles are the lower edge of the
+    nearest-rank bin, the bins being merged into the widest of the databases', into which
+    the exact values of a database with a single value fall.
+    """
+    import math
+
+    merge_functions = {
+        "count": lambda lhs, rhs: lhs + rhs,
+        "sum": lambda lhs, rhs: lhs + rhs,
+        "min": min,
+        "max": max,
+    }
+    partial_functions = [
+        partial_function
+        for label, column, function in aggregates
+        for partial_function in _aggregate_partial_functions(function)
+    ]
+
+    # the widest bins of each field, into which the others merge
+    merged_bin_exponents = {}
+    for group_partials, group_histograms in partials:
+        for field_label, (bin_exponent, histograms) in group_histograms.items():
+            if bin_exponent is not None:
+                merged_bin_exponents[field_label] = max(bin_exponent, merged_bin_exponents.get(field_label, bin_exponent))
+
+    merged_partials = {}
+    merged_histograms = {}
+    for group_partials, group_histograms in partials:
+        for group, values in group_partials.items():
+            if group not in merged_partials:
+                merged_partials[group] = list(values)
+                continue
+            merged_values = merged_partials[group]
+            for slot, (partial_function, value) in enumerate(zip(partial_functions, values)):
+                if value is None:
+                    continue
+                merged_values[slot] = value if merged_values[slot] is None else merge_functions[partial_function](merged_values[slot], value)
+
+        for field_label, (bin_exponent, histograms) in group_histograms.items():
+            for group, value_counts in histograms.items():
+                merged_histogram = merged_histograms.setdefault(field_label, {}).setdefault(group, {})
+                merged_bin_exponent = merged_bin_exponents.get(field_label)
+                for value, count in value_counts:
+                    if bin_exponent is not None:
+                        # bins of powers of ten nest
+                        value //= 10**(merged_bin_exponent - bin_exponent)
+                    elif merged_bin_exponent is not None:
+                        value = math.floor(value/10**merged_bin_exponent if merged_bin_exponent >= 0 else value*10**-merged_bin_exponent)
+                    merged_histogram[value] = merged_histogram.get(value, 0) + count
+
+    groups = set(merged_partials.keys())
+    for histograms in merged_histograms.values():
+        groups.update(histograms.keys())
+
+    rows = []
+    for group in sorted(groups, key=lambda group: tuple((value is not None, value) for value in group)):
+        values = merged_partials.get(group, [0 if partial_function == "count" else None for partial_function in partial_functions])
+        aggregate_values = []
+        slot = 0
+        for label, column, function in aggregates:
+            percentile = _aggregate_percentile(function)
+            if percentile is not None:
+                value_counts = sorted(merged_histograms[label.rpartition(":")[0]].get(group, {}).items())
+                total_count = sum(count for value, count in value_counts)
+                aggregate_value = None
+                rank = max(1, math.ceil(percentile/100*total_count))
+                for value, count in value_counts:
+                    rank -= count
+                    if rank <= 0:
+                        aggregate_value = value
+                        break
+                bin_exponent = merged_bin_exponents.get(label.rpartition(":")[0])
+                if aggregate_value is not None and bin_exponent is not None:
+                    aggregate_value = aggregate_value*10**bin_exponent if bin_exponent >= 0 else aggregate_value/10**-bin_exponent
+                aggregate_values.append(aggregate_value)
+            elif function == "avg":
+                total, count = values[slot:slot+2]
+                aggregate_values.append(None if not count else total/count)
+                slot += 2
+            else:
+                aggregate_values.append(values[slot])
+                slot += 1
+        rows.append((*group, *aggregate_values))
+    return rows
+
+def _inspect_aggregates(
+    engine_multi_config,
+    scope,
+    storagedb_uuid,
+    storagedb_fslabel,
+    selection,
+    group_by: list,
+    group_columns: list,
+    aggregates: list,
+    percentile_bin_width: float,
+    exact_percentiles: bool,
+    orderby,
+    limit: int,
+    fanout_workers: int,
+    as_dataframe: bool,
+    output_filepath: str,
+    fs_uuids: list = None
+):
+    call = lambda uuid, engine: _select_aggregate_partials(
+        engine,
+        selection,
+        group_columns,
+        aggregates,
+        percentile_bin_width,
+        exact_percentiles
+    )
+    if scope == entities.DatabaseScope.Operation:
+        partials = [call(None, engine_multi_config.get_operation_dbengine())]
+    elif (storagedb_uuid or storagedb_fslabel) is not None:
+        partials = [call(None, engine_multi_config.get_dbengine(scope, storagedb_uuid, storagedb_fslabel))]
+    else:
+        partials = []
+        for uuid, partial, err in engine_multi_config.fanout_storage(
+            call,
+            workers=fanout_workers,
+            fs_uuids=fs_uuids
+        ):
+            if err is not None:
+                print(f"Storage DB with filesystem UUID '{uuid}' failed, and is excluded from the aggregates: {err}")
+                continue
+            partials.append(partial)
+
+    columns = list(group_by) + [label for label, column, function in aggregates]
+    rows = _merge_aggregate_partials(partials, aggregates)
+    if orderby is not None:
+        field, direction = orderby
+        if field not in columns:
+            raise ValueError(f"Aggregated results can only be ordered by one of {columns}, not '{field}'.")
+        if direction not in order_operations:
+            raise ValueError(f"Specified order-by direction '{direction}' is not known.")
+        column_index = columns.index(field)
+        rows.sort(
+            key=lambda row: (row[column_index] is not None, row[column_index]),
+            reverse=direction == "desc"
+        )
+    rows = rows[:limit]
+
+    if not as_dataframe:
+        for row in rows:
+            print(", ".join(
+                f"{column}={value}"
+                for column, value in zip(columns, row)
+            ))
+        return
+
+    import pandas
+
+    column_types = {
+        field: column.type
+        for field, column in zip(group_by, group_columns)
+    }
+    for label, column, function in aggregates:
+        if function == "count":
+            column_types[label] = sqlalchemy.Integer()
+        elif function == "avg":
+            column_types[label] = sqlalchemy.Double()
+        else:
+            column_types[label] = column.type
+    _output_pandas_dfs(
+        [pandas.DataFrame(rows, columns=columns)],
+        output_filepath,
+        column_types = column_types
+    )
 
 def cli_inspect():
     import argparse
@@ -961,7 +3661,12 @@ def cli_inspect():
         "--pandas-output-filepath",
         type=str,
         default=None,
-        help="The output file path to which a pandas-dataframe-pickle of the results are written.",
+        help="The output file path to which the results are written, formatted by extension: '.csv', '.parquet', '.feather' (or '.arrow'), else a pandas-dataframe-pickle.",
+    )
+    parser.add_argument(
+        "--partitioned-output",
+        action="store_true",
+        help="When querying all Storage DBs, treat the output file path as a dataset directory partitioned by 'storage_fslabel=<label>'.",
     )
     parser.add_argument(
         "entity",
@@ -1029,6 +3734,61 @@ def cli_inspect():
         action="store_true",
         help="Show the results as dataframe."
     )
+    parser.add_argument(
+        "--stream-batch-size",
+        type=int,
+        default=None,
+        help="Stream the selected entities from a server-side cursor in batches of this size, printing each as it arrives."
+    )
+    parser.add_argument(
+        "-g",
+        "--global-order",
+        action="store_true",
+        help="Merge the --orderby ordered (and --limit limited) results of all Storage DBs into one, instead of listing each Storage DB's results."
+    )
+    parser.add_argument(
+        "--fanout-workers",
+        type=int,
+        default=8,
+        help="The number of Storage DBs queried concurrently when no particular Storage DB is specified."
+    )
+    parser.add_argument(
+        "--group-by",
+        action="append",
+        type=str,
+        metavar="field",
+        default=None,
+        help="Aggregate the selection per group of this field's values, within the databases (defaults to a '*:count' aggregate)."
+    )
+    parser.add_argument(
+        "--aggregate",
+        action="append",
+        type=str,
+        metavar="field:function",
+        default=None,
+        help=f"Aggregate a field within the databases, merging across Storage DBs. The function is an element of {AGGREGATE_FUNCTIONS}, e.g. 'signal_snr:p99'. Only 'count' applies to '*'. Results can be ordered by a group-by field or an aggregate."
+    )
+    parser.add_argument(
+        "--percentile-bin-width",
+        type=float,
+        default=None,
+        help=f"Bin the values of percentile aggregates to this width (reporting each bin's lower edge). By default numeric values are binned to the power of ten spanning each Storage DB's range in at most {AGGREGATE_PERCENTILE_BINS} bins."
+    )
+    parser.add_argument(
+        "--exact-percentiles",
+        action="store_true",
+        help="Transfer every distinct value of percentile aggregates' fields, for exact percentiles, instead of binning them."
+    )
+    parser.add_argument(
+        "--no-storage-planning",
+        action="store_true",
+        help="Query all Storage DBs, instead of only those that the Storage DB manifests show may satisfy the where criteria.",
+    )
+    parser.add_argument(
+        "--hit-summary-planning",
+        action="store_true",
+        help="Also skip the Storage DBs that the Operation DB's hit summaries show cannot satisfy the where criteria, missing the rows of inactive Storage DBs added since the last cosmicdb_sync_hit_summaries.",
+    )
 
     args = parser.parse_args()
 
@@ -1094,6 +3854,51 @@ def cli_inspect():
             )
 
     criteria = cli_parse_where_arguments(entity_class_map, args.where_criteria)
+
+    if args.group_by is not None or args.aggregate is not None:
+        assert not any([
+            args.select is not None,
+            args.distinct,
+            args.stream_batch_size is not None,
+            args.global_order,
+            args.partitioned_output,
+        ]), "Aggregation does not combine with --select, --distinct, --stream-batch-size, --global-order or --partitioned-output."
+        assert not (args.exact_percentiles and args.percentile_bin_width is not None), "Percentiles are either exact or binned to --percentile-bin-width."
+
+        group_by = [] if args.group_by is None else args.group_by
+        def aggregate_selection(*columns):
+            sql_query = sqlalchemy.select(*columns).select_from(args.entity)
+            for relation in join:
+                sql_query = sql_query.join(relation)
+            return sql_query.where(*criteria)
+
+        engine_multi_config = cli_create_engine_multiconfig(args)
+        fs_uuids = None
+        if args.scope == entities.DatabaseScope.Storage and (args.storagedb_uuid or args.storagedb_fslabel) is None and not args.no_storage_planning:
+            fs_uuids = engine_multi_config.plan_storage_fs_uuids(criteria, workers=args.fanout_workers, use_hit_summaries=args.hit_summary_planning)
+        _inspect_aggregates(
+            engine_multi_config,
+            args.scope,
+            args.storagedb_uuid,
+            args.storagedb_fslabel,
+            aggregate_selection,
+            group_by,
+            cli_replace_fieldnames_with_column_instances(entity_class_map, list(group_by)),
+            [
+                cli_parse_aggregate_argument(entity_class_map, aggregate)
+                for aggregate in (["*:count"] if args.aggregate is None else args.aggregate)
+            ],
+            args.percentile_bin_width,
+            args.exact_percentiles,
+            args.orderby,
+            args.limit,
+            args.fanout_workers,
+            as_dataframe = args.show_dataframe or args.pandas_output_filepath is not None,
+            output_filepath = args.pandas_output_filepath,
+            fs_uuids = fs_uuids
+        )
+        return
+
     ordering = cli_parse_orderby_argument(entity_class_map, args.orderby)
 
     sql_query = sqlalchemy.select(*selection)
@@ -1107,25 +3912,28 @@ def cli_inspect():
     if args.distinct:
         sql_query = sql_query.distinct()
 
-    engine_multi_config = CosmicDB_EngineMultiConfig(args.engine_configuration)
+    engine_multi_config = cli_create_engine_multiconfig(args)
     
-    inspection_call = lambda engine, outfilepath, prindent: _inspect_scalars(
+    inspection_call = lambda engine, outfilepath, prindent, print_fn=print: _inspect_scalars(
         sql_query,      
         engine,
         args.verbosity,
-        prindent
+        prindent,
+        print_fn,
+        args.stream_batch_size
     )
 
     if (args.show_dataframe
       or args.pandas_output_filepath is not None
       or args.select is not None
     ):
-        inspection_call = lambda engine, outfilepath, prindent: _inspect_pandas_df(
+        inspection_call = lambda engine, outfilepath, prindent, print_fn=print: _inspect_pandas_df(
             sql_query,
             engine,
             args.pandas_chunksize,
             outfilepath,
-            prindent
+            prindent,
+            print_fn
         )
 
     if args.scope == entities.DatabaseScope.Operation:
@@ -1141,32 +3949,84 @@ def cli_inspect():
             ''
         )
     elif args.scope == entities.DatabaseScope.Storage and (args.storagedb_uuid or args.storagedb_fslabel) is None:
-        operation_engine = None
+        fs_uuids = list(engine_multi_config.storage_uuid_map_engurl.keys())
+        if not args.no_storage_planning:
+            fs_uuids = engine_multi_config.plan_storage_fs_uuids(criteria, fs_uuids, workers=args.fanout_workers, use_hit_summaries=args.hit_summary_planning)
+        uuid_map_label = None
         try:
-            operation_engine = engine_multi_config.get_operation_dbengine()
+            uuid_map_label = engine_multi_config.get_storage_fs_labels(fs_uuids)
         except ValueError:
             pass
+        if uuid_map_label is not None:
+            missing_fs_uuids = set(fs_uuids).difference(uuid_map_label.keys())
+            assert len(missing_fs_uuids) == 0, f"No Filesystem entity in Operations DB with UUID in {missing_fs_uuids}"
+
+        if args.global_order:
+            if args.orderby is None:
+                raise ValueError("A global order requires an --orderby field.")
+            _inspect_merged_storage(
+                sql_query,
+                engine_multi_config,
+                cli_replace_fieldnames_with_column_instances(
+                    entity_class_map,
+                    [args.orderby[0]]
+                )[0],
+                args.orderby[1] == "desc",
+                args.limit,
+                {} if uuid_map_label is None else uuid_map_label,
+                args.verbosity,
+                args.pandas_chunksize,
+                args.pandas_output_filepath,
+                as_dataframe = (
+                    args.show_dataframe
+                    or args.pandas_output_filepath is not None
+                    or args.select is not None
+                ),
+                fs_uuids = fs_uuids
+            )
+            return
 
         filepath_parts = None if args.pandas_output_filepath is None else os.path.splitext(args.pandas_output_filepath)
-        for uuid in engine_multi_config.storage_uuid_map_engurl.keys():
-            heading_str = f"Querying Storage DB with filesystem UUID '{uuid}':"
-            if operation_engine:
-                filesystem_entity = operation_engine.select_entity(
-                    entities.CosmicDB_Filesystem,
-                    uuid = uuid
-                )
-                assert filesystem_entity is not None, f"No Filesystem entity in Operations DB with UUID = {uuid}"
-                filepath = None if filepath_parts is None else f"{filepath_parts[0]}.{filesystem_entity.label}{filepath_parts[1]}"
-                heading_str = heading_str[0:-1] + f" (label = '{filesystem_entity.label}'): "
-            else:
-                filepath = None if filepath_parts is None else f"{filepath_parts[0]}.{uuid}{filepath_parts[1]}"
 
+        # output is printed as it arrives, each line attributed to its database
+        print_lock = threading.Lock()
+        def print_heading(uuid):
+            heading_str = f"Querying Storage DB with filesystem UUID '{uuid}':"
+            if uuid_map_label is not None:
+                heading_str = heading_str[0:-1] + f" (label = '{uuid_map_label[uuid]}'): "
             print("="*len(heading_str))
             print(heading_str)
             print("-"*len(heading_str))
+
+        def storage_inspection_call(uuid, engine):
+            fs_name = uuid if uuid_map_label is None else uuid_map_label[uuid]
+            filepath = None
+            if filepath_parts is not None and args.partitioned_output:
+                filepath = os.path.join(args.pandas_output_filepath, f"storage_fslabel={fs_name}", f"part-0{filepath_parts[1]}")
+            elif filepath_parts is not None:
+                filepath = f"{filepath_parts[0]}.{fs_name}{filepath_parts[1]}"
+
+            headed = []
+            def print_locked(*print_args):
+                with print_lock:
+                    if len(headed) == 0:
+                        print_heading(uuid)
+                        headed.append(True)
+                    print(*print_args)
+
             inspection_call(
-                engine_multi_config.get_storage_dbengine(uuid),
+                engine,
                 filepath,
-                '\t'
+                f"[{fs_name}] ",
+                print_locked
             )
-            print("="*len(heading_str), "\n")
+
+        for uuid, _, err in engine_multi_config.fanout_storage(
+            storage_inspection_call,
+            workers=args.fanout_workers,
+            fs_uuids=fs_uuids
+        ):
+            if err is not None:
+                with print_lock:
+                    print_heading(uuid)
+                    print(f"\tFailed: {err}")
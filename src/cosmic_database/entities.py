@@ -1,4 +1,5 @@
 import os
+from collections import namedtuple
 from datetime import datetime
 from enum import Enum
 
@@ -12,16 +13,36 @@ from sqlalchemy import String
 from sqlalchemy import Text
 from sqlalchemy import DateTime
 from sqlalchemy import Double
+from sqlalchemy import Index
 from sqlalchemy.orm import DeclarativeBase
 from sqlalchemy.orm import Mapped
 from sqlalchemy.orm import mapped_column
 from sqlalchemy.orm import relationship
+from sqlalchemy.orm import selectinload
 from sqlalchemy.orm import RelationshipDirection
 
 from sqlalchemy.dialects import mysql
 
+from cosmic_database import sky
+
 TABLE_SUFFIX = os.environ.get("COSMIC_DB_TABLE_SUFFIX", "")
 
+_RECORD_CLASSES = {}
+
+HIT_ROLLUP_SNR_BIN_WIDTH = 0.01 # log10 units, about 2.3%
+
+def _sky_pixel_default(ra_field: str, ra_unit: str, dec_field: str, dec_unit: str):
+    """A context-sensitive column default, computing the sky pixel of the inserted coordinates."""
+    def sky_pixel_default(context):
+        parameters = context.get_current_parameters()
+        if parameters.get(ra_field) is None or parameters.get(dec_field) is None:
+            return None
+        return sky.sky_pixel(
+            sky.to_radians(parameters[ra_field], ra_unit),
+            sky.to_radians(parameters[dec_field], dec_unit)
+        )
+    return sky_pixel_default
+
 class DatabaseScope(str, Enum):
     Operation = "Operation"
     Storage = "Storage"
@@ -35,6 +56,7 @@ String_URI = Annotated[str, 255]
 String_UUID = Annotated[str, 64]
 String_Tuning = Annotated[str, 10]
 String_SourceName = Annotated[str, 80]
+String_WatermarkName = Annotated[str, 64]
 
 class Base(DeclarativeBase):
     type_annotation_map = {
@@ -46,6 +68,7 @@ class Base(DeclarativeBase):
         String_UUID: String(String_UUID.__metadata__[0]),
         String_Tuning: String(String_Tuning.__metadata__[0]),
         String_SourceName: String(String_SourceName.__metadata__[0]),
+        String_WatermarkName: String(String_WatermarkName.__metadata__[0]),
         float: Double,
         datetime: DateTime().with_variant(
             mysql.DATETIME(fsp=6), "mysql"
@@ -153,6 +176,45 @@ class Base(DeclarativeBase):
         return "\n".join(attr_strs) if join_lines else attr_strs
 
 
+    @classmethod
+    def get_str_load_options(cls, verbosity: int = 0, _parent_load=None) -> list:
+        """
+        The `selectinload` options that load every relationship that `_get_str`
+        traverses at the given verbosity, so that rendering a whole result set issues
+        one query per relationship level instead of one per parent entity.
+        """
+        verbosity -= 2
+        if verbosity < 0:
+            return []
+
+        options = []
+        for attr_name, relationship in cls.__mapper__.relationships.items():
+            if relationship.direction == RelationshipDirection.MANYTOONE:
+                continue
+
+            relationship_load = (
+                selectinload if _parent_load is None else _parent_load.selectinload
+            )(getattr(cls, attr_name))
+            options += relationship.mapper.class_.get_str_load_options(
+                verbosity,
+                relationship_load
+            ) or [relationship_load]
+        return options
+
+    @classmethod
+    def record_class(cls):
+        """
+        A read-only record type of the entity's columns, for rows that need no ORM
+        session or change tracking. Records are tuples (`collections.namedtuple`),
+        so hold no per-instance dictionary and are constructed from a row with `_make`.
+        """
+        if cls not in _RECORD_CLASSES:
+            _RECORD_CLASSES[cls] = namedtuple(
+                f"{cls.__name__}Record",
+                cls.__table__.columns.keys()
+            )
+        return _RECORD_CLASSES[cls]
+
     def __repr__(self) -> str:
         return self._get_str(verbosity=0)
 
@@ -406,6 +468,13 @@ class CosmicDB_ObservationBeam(Base):
 
     ra_radians: Mapped[float] = mapped_column(index=True)
     dec_radians: Mapped[float] = mapped_column(index=True)
+    # see `cosmic_database.sky`, NULL for rows that predate the column until backfilled,
+    # deferred so that entities select from tables that predate it
+    sky_pixel: Mapped[Optional[int]] = mapped_column(
+        index=True,
+        deferred=True,
+        default=_sky_pixel_default("ra_radians", "radians", "dec_radians", "radians")
+    )
     source: Mapped[String_SourceName] = mapped_column(index=True)
     start: Mapped[datetime] = mapped_column(index=True)
     end: Mapped[datetime]
@@ -414,6 +483,63 @@ class CosmicDB_ObservationBeam(Base):
         back_populates="beams"
     )
 
+# Derived from ObservationBeam and ObservationSubband, see `CosmicDB_Engine.update_sky_coverage`
+class CosmicDB_SkyCoverage(Base):
+    __tablename__ = f"cosmic_sky_coverage{TABLE_SUFFIX}"
+
+    # see `cosmic_database.sky`
+    sky_pixel: Mapped[int] = mapped_column(primary_key=True)
+    observation_id: Mapped[int] = mapped_column(
+        ForeignKey(f"{CosmicDB_Observation.__tablename__}.id", ondelete="CASCADE"),
+        primary_key=True,
+        index=True
+    )
+    # '' when no subband of the observation successfully participated
+    tuning: Mapped[String_Tuning] = mapped_column(primary_key=True)
+
+    # the span of the observation's beams that cover the pixel
+    start: Mapped[datetime]
+    end: Mapped[datetime]
+    # the span of the tuning's successfully participating subbands
+    frequency_lower_MHz: Mapped[Optional[float]]
+    frequency_upper_MHz: Mapped[Optional[float]]
+
+# Synchronised from the Storage DBs, see `CosmicDB_EngineMultiConfig.sync_hit_summaries`
+class CosmicDB_ObservationHitSummary(Base):
+    __tablename__ = f"cosmic_observation_hit_summary{TABLE_SUFFIX}"
+
+    # Dislocated foreign key, that of the ObservationKey
+    observation_id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    filesystem_uuid: Mapped[String_UUID] = mapped_column(
+        ForeignKey(f"{CosmicDB_Filesystem.__tablename__}.uuid"),
+        primary_key=True,
+        index=True
+    )
+    # Dislocated foreign keys, of the ObservationKey too, NULL for hits or stamps without an ObservationKey
+    scan_id: Mapped[Optional[String_ScanID]] = mapped_column(index=True)
+    configuration_id: Mapped[Optional[int]] = mapped_column(index=True)
+
+    hit_count: Mapped[int]
+    stamp_count: Mapped[int]
+    # the extent of the hits, NULL without hits
+    tstart_min: Mapped[Optional[float]]
+    tstart_max: Mapped[Optional[float]]
+    signal_frequency_min: Mapped[Optional[float]]
+    signal_frequency_max: Mapped[Optional[float]]
+
+# The synchronisation of each Storage DB's ObservationHitSummary entities
+class CosmicDB_HitSummarySync(Base):
+    __tablename__ = f"cosmic_hit_summary_sync{TABLE_SUFFIX}"
+
+    filesystem_uuid: Mapped[String_UUID] = mapped_column(
+        ForeignKey(f"{CosmicDB_Filesystem.__tablename__}.uuid"),
+        primary_key=True
+    )
+    # the greatest hit and stamp IDs summarised
+    hit_id: Mapped[int]
+    stamp_id: Mapped[int]
+    synchronised: Mapped[datetime]
+
 ### Observation Products below ###
 # These are stored in a separate database that is local to the storage medium which can be physically relocated
 
@@ -565,6 +691,10 @@ class CosmicDB_ObservationStamp(Base):
 
 class CosmicDB_ObservationHit(Base):
     __tablename__ = f"cosmic_observation_hit{TABLE_SUFFIX}"
+    __table_args__ = (
+        # frequency/drift-rate window queries, see `CosmicDB_Engine.count_hit_windows`
+        Index(f"ix_{__tablename__}_signal_frequency_signal_drift_rate", "signal_frequency", "signal_drift_rate"),
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True)
 
@@ -615,6 +745,13 @@ class CosmicDB_ObservationHit(Base):
     ra_hours: Mapped[float] = mapped_column(index=True)
     # phase center DEC
     dec_degrees: Mapped[float] = mapped_column(index=True)
+    # phase center sky pixel, see `cosmic_database.sky`, NULL for rows that predate the column until backfilled,
+    # deferred so that entities select from tables that predate it
+    sky_pixel: Mapped[Optional[int]] = mapped_column(
+        index=True,
+        deferred=True,
+        default=_sky_pixel_default("ra_hours", "hours", "dec_degrees", "degrees")
+    )
     # telescope ID (Breakthrough listen convention???)
     telescope_id: Mapped[int]
     # spectra count
@@ -655,6 +792,38 @@ class CosmicDB_HitFlagSARFI(Base):
     )
 
 
+# Derived from ObservationHit, ObservationStamp and HitFlagSARFI, see `CosmicDB_Engine.update_hit_rollups`
+class CosmicDB_HitRollup(Base):
+    __tablename__ = f"cosmic_hit_rollup{TABLE_SUFFIX}"
+
+    observation_id: Mapped[int] = mapped_column(ForeignKey(f"{CosmicDB_ObservationKey.__tablename__}.observation_id"), primary_key=True)
+    # Dislocated foreign keys
+    tuning: Mapped[String_Tuning] = mapped_column(primary_key=True)
+    subband_offset: Mapped[int] = mapped_column(primary_key=True)
+    signal_beam: Mapped[int] = mapped_column(primary_key=True)
+
+    hit_count: Mapped[int]
+    stamp_count: Mapped[int]
+    # hits flagged at the time they were rolled up
+    sarfi_flagged_hit_count: Mapped[int]
+    signal_snr_min: Mapped[Optional[float]]
+    signal_snr_max: Mapped[Optional[float]]
+    # approximate, from the histogram (to within half of a bin), clamped to [signal_snr_min, signal_snr_max]
+    signal_snr_p50: Mapped[Optional[float]]
+    signal_snr_p90: Mapped[Optional[float]]
+    signal_snr_p99: Mapped[Optional[float]]
+    signal_frequency_min: Mapped[Optional[float]]
+    signal_frequency_max: Mapped[Optional[float]]
+    # {bin: count} of floor(log10(signal_snr)/HIT_ROLLUP_SNR_BIN_WIDTH), the bin of non-positive SNRs is "null"
+    signal_snr_histogram_json: Mapped[String_Unlimited]
+
+# The progress of incrementally maintained derivations, e.g. the greatest hit ID rolled up
+class CosmicDB_StorageWatermark(Base):
+    __tablename__ = f"cosmic_storage_watermark{TABLE_SUFFIX}"
+
+    name: Mapped[String_WatermarkName] = mapped_column(primary_key=True)
+    value: Mapped[int]
+
 class CosmicDB_PostprocessReceiptSETI(Base):
     __tablename__ = f"cosmic_postproc_receipt_seti{TABLE_SUFFIX}"
     
@@ -699,6 +868,9 @@ DATABASE_SCOPES = {
         CosmicDB_Observation,
         CosmicDB_ObservationSubband,
         CosmicDB_ObservationBeam,
+        CosmicDB_SkyCoverage,
+        CosmicDB_ObservationHitSummary,
+        CosmicDB_HitSummarySync,
         CosmicDB_Filesystem,
         CosmicDB_FilesystemMount,
         CosmicDB_ChangelogEntry,
@@ -712,6 +884,8 @@ DATABASE_SCOPES = {
         CosmicDB_ObservationStamp,
         CosmicDB_ObservationHit,
         CosmicDB_HitFlagSARFI,
+        CosmicDB_HitRollup,
+        CosmicDB_StorageWatermark,
         CosmicDB_PostprocessReceiptSETI,
         CosmicDB_StorageFlag,
     ]
@@ -733,4 +907,16 @@ SCOPE_BRIDGES = {
     CosmicDB_Observation.id: CosmicDB_ObservationKey.observation_id,
     CosmicDB_ObservationBeam.enumeration: CosmicDB_ObservationHit.signal_beam,
     CosmicDB_Filesystem.uuid: CosmicDB_StorageDatabaseInfo.filesystem_uuid,
+}
+
+# Sky-pixelated entities' coordinate columns, with their angular units
+SKY_COORDINATE_COLUMNS = {
+    CosmicDB_ObservationBeam: (
+        (CosmicDB_ObservationBeam.ra_radians, "radians"),
+        (CosmicDB_ObservationBeam.dec_radians, "radians"),
+    ),
+    CosmicDB_ObservationHit: (
+        (CosmicDB_ObservationHit.ra_hours, "hours"),
+        (CosmicDB_ObservationHit.dec_degrees, "degrees"),
+    ),
 }
\ No newline at end of file
@@ -0,0 +1,43 @@
+"""
+Bridging queries of the Operation and Storage databases, across the foreign keys
+(`entities.SCOPE_BRIDGES`) that the scopes being dislocated cannot enforce.
+"""
+import sqlalchemy
+
+from cosmic_database import entities
+
+
+def _query_tables(sql_query) -> set:
+    return {
+        table
+        for from_clause in sql_query.get_final_froms()
+        for table in sqlalchemy.sql.util.find_tables(from_clause)
+    }
+
+
+def _bridge_column(column, tables: set):
+    """The column if it is of the tables, else a column of the tables with a foreign key to it, else `None`."""
+    if column.table in tables:
+        return column
+    for table in sorted(tables, key=lambda table: table.name):
+        for table_column in table.columns:
+            if any(foreign_key.column is column for foreign_key in table_column.foreign_keys):
+                return table_column
+    return None
+
+
+def scope_bridges(operation_query, storage_query) -> list:
+    """
+    The (Operation column, Storage column) pairs of `entities.SCOPE_BRIDGES` between the
+    tables of the queries, bridging foreign keys to the bridged columns as the columns
+    themselves (e.g. `ObservationBeam.observation_id` for `Observation.id`).
+    """
+    operation_tables = _query_tables(operation_query)
+    storage_tables = _query_tables(storage_query)
+    bridges = []
+    for operation_attribute, storage_attribute in entities.SCOPE_BRIDGES.items():
+        operation_column = _bridge_column(operation_attribute.property.columns[0], operation_tables)
+        storage_column = _bridge_column(storage_attribute.property.columns[0], storage_tables)
+        if operation_column is not None and storage_column is not None:
+            bridges.append((operation_column, storage_column))
+    return bridges
@@ -0,0 +1,36 @@
+"""
+Windows of hits in frequency, and optionally drift rate, e.g. known RFI bands.
+
+A window is `(frequency_lower, frequency_upper[, drift_rate_lower, drift_rate_upper])`,
+where a `None` bound is unbounded.
+"""
+import sqlalchemy
+
+from cosmic_database import entities
+
+
+def window_bounds(window) -> tuple:
+    """The (frequency_lower, frequency_upper, drift_rate_lower, drift_rate_upper) bounds of a hit window."""
+    if len(window) not in [2, 4]:
+        raise ValueError(f"A window has frequency bounds, and optionally drift-rate bounds, not {window}.")
+    bounds = tuple(window) + (None, None)*(len(window) == 2)
+    for lower, upper in [bounds[0:2], bounds[2:4]]:
+        if lower is not None and upper is not None and lower > upper:
+            raise ValueError(f"The window {window} has a lower bound above its upper bound.")
+    return bounds
+
+
+def window_criterion(window):
+    """The where-clause expression of a hit window."""
+    frequency_lower, frequency_upper, drift_rate_lower, drift_rate_upper = window_bounds(window)
+    hit = entities.CosmicDB_ObservationHit
+    criteria = []
+    if frequency_lower is not None:
+        criteria.append(hit.signal_frequency >= frequency_lower)
+    if frequency_upper is not None:
+        criteria.append(hit.signal_frequency <= frequency_upper)
+    if drift_rate_lower is not None:
+        criteria.append(hit.signal_drift_rate >= drift_rate_lower)
+    if drift_rate_upper is not None:
+        criteria.append(hit.signal_drift_rate <= drift_rate_upper)
+    return sqlalchemy.and_(sqlalchemy.true(), *criteria)
@@ -0,0 +1,218 @@
+"""
+In-memory indices of the [start, end) intervals of Operation entities, for resolving
+which scan, configuration, observation or beam was active at many times at once.
+
+Intervals are kept sorted by start, alongside the running maximum of their ends, so
+that the intervals containing a time lie between two binary searches: those after the
+last interval whose running-maximum end precedes the time, and up to the last
+interval starting at or before it.
+"""
+from cosmic_database import entities
+
+MJD_UNIX_EPOCH = 40587.0
+
+
+def to_unix_seconds(times, time_format: str = "datetime"):
+    """
+    Convert times to float64 unix seconds.
+
+    Parameters
+    ----------
+    times:
+        A scalar or array of datetimes ('datetime', naive datetimes are taken to be
+        in UTC as stored), Modified Julian Dates ('mjd', as `CosmicDB_ObservationHit.tstart`)
+        or unix seconds ('unix').
+    time_format: str
+        One of 'datetime', 'mjd' or 'unix'.
+    """
+    import numpy
+
+    if time_format == "datetime":
+        return numpy.asarray(times, dtype="datetime64[us]").astype(numpy.int64)/1e6
+    if time_format == "mjd":
+        return (numpy.asarray(times, dtype=numpy.float64) - MJD_UNIX_EPOCH)*86400.0
+    if time_format == "unix":
+        return numpy.asarray(times, dtype=numpy.float64)
+    raise ValueError(f"Unknown time format '{time_format}', expected one of ['datetime', 'mjd', 'unix'].")
+
+
+class CosmicDB_IntervalIndex:
+    """
+    The intervals of an Operation entity, loaded from the Operation DB and refreshed
+    incrementally. Scans have no end, so a scan's interval ends at the start of the
+    next scan (the latest scan's interval is open).
+
+    Positions returned by queries index `keys`, `starts` and `ends`.
+    """
+
+    INTERVAL_ENTITIES = [
+        entities.CosmicDB_Scan,
+        entities.CosmicDB_Configuration,
+        entities.CosmicDB_Observation,
+        entities.CosmicDB_ObservationBeam,
+    ]
+
+    def __init__(self, engine, entity_class):
+        """
+        Parameters
+        ----------
+        engine: CosmicDB_Engine
+            The Operation DB engine.
+        entity_class:
+            One of `CosmicDB_IntervalIndex.INTERVAL_ENTITIES`.
+        """
+        if entity_class not in self.INTERVAL_ENTITIES:
+            raise ValueError(f"{entity_class} is not interval-indexable, expected one of {self.INTERVAL_ENTITIES}.")
+        self.engine = engine
+        self.entity_class = entity_class
+        self.key_columns = [col.key for col in entity_class.__table__.primary_key.columns]
+        self.has_end = "end" in entity_class.__table__.columns
+        self.load()
+
+    def load(self) -> int:
+        """Load all of the intervals, returning their count."""
+        import numpy
+
+        self._rows = None
+        self.starts = numpy.empty(0, dtype=numpy.float64)
+        self.ends = numpy.empty(0, dtype=numpy.float64)
+        self._running_max_ends = numpy.empty(0, dtype=numpy.float64)
+        return self.refresh()
+
+    def refresh(self) -> int:
+        """
+        Load the intervals starting at or after the latest start loaded (re-reading those
+        at the latest start). Intervals inserted with earlier starts, or updated after
+        being loaded, require `load()`.
+
+        Returns
+        -------
+        int: the number of intervals (re-)read.
+        """
+        import numpy
+
+        start_column = self.entity_class.__table__.columns["start"]
+        latest_start = None
+        if len(self.starts) > 0:
+            latest_start = self._rows["start"][-1].astype(object)
+
+        rows = self.engine.select_structured_array(
+            self.entity_class,
+            columns=self.key_columns + ["start"] + (["end"] if self.has_end else []),
+            criteria=[] if latest_start is None else [start_column >= latest_start],
+            order_by=[start_column] + [
+                self.entity_class.__table__.columns[colname]
+                for colname in self.key_columns
+            ]
+        )
+        read_count = len(rows)
+        if latest_start is not None:
+            rows = numpy.concatenate([
+                self._rows[:numpy.searchsorted(self._rows["start"], self._rows["start"][-1], side="left")],
+                rows
+            ])
+        self._rows = rows
+
+        self.starts = to_unix_seconds(rows["start"])
+        if self.has_end:
+            self.ends = to_unix_seconds(rows["end"])
+        else:
+            next_start_positions = numpy.searchsorted(self.starts, self.starts, side="right")
+            self.ends = numpy.append(self.starts, numpy.inf)[next_start_positions]
+        self._running_max_ends = numpy.maximum.accumulate(self.ends) if len(self.ends) > 0 else self.ends
+        return read_count
+
+    @property
+    def keys(self):
+        """The primary key of each interval: an array, or a structured array when the key is composite."""
+        if len(self.key_columns) == 1:
+            return self._rows[self.key_columns[0]]
+        return self._rows[self.key_columns]
+
+    def __len__(self):
+        return len(self.starts)
+
+    def _candidate_bounds(self, query_starts, query_ends, inclusive_end: bool):
+        import numpy
+
+        # intervals before `first` end at or before the query starts, intervals from `last` start after it ends
+        first = numpy.searchsorted(self._running_max_ends, query_starts, side="right")
+        last = numpy.searchsorted(self.starts, query_ends, side="right" if inclusive_end else "left")
+        return first, last
+
+    def _candidate_pairs(self, first, last):
+        import numpy
+
+        counts = numpy.maximum(last - first, 0)
+        query_positions = numpy.repeat(numpy.arange(len(first)), counts)
+        interval_positions = (
+            numpy.arange(counts.sum())
+            - numpy.repeat(numpy.cumsum(counts) - counts, counts)
+            + numpy.repeat(first, counts)
+        )
+        return query_positions, interval_positions
+
+    def locate(self, times, time_format: str = "datetime"):
+        """
+        The position of the latest-starting interval containing each time.
+
+        e.g. `observation_index.keys[observation_index.locate(hit_tstarts, "mjd")]`, after
+        excluding the times without an interval.
+
+        Returns
+        -------
+        numpy.ndarray: int64 positions, -1 where no interval contains the time.
+        """
+        import numpy
+
+        times = numpy.atleast_1d(to_unix_seconds(times, time_format))
+        first, last = self._candidate_bounds(times, times, inclusive_end=True)
+        positions = numpy.full(len(times), -1, dtype=numpy.int64)
+
+        # step back from the latest-starting candidate, for the unresolved times
+        unresolved = numpy.nonzero(last > first)[0]
+        candidates = last[unresolved] - 1
+        while len(unresolved) > 0:
+            contained = self.ends[candidates] > times[unresolved]
+            positions[unresolved[contained]] = candidates[contained]
+            remaining = ~contained & (candidates > first[unresolved])
+            unresolved = unresolved[remaining]
+            candidates = candidates[remaining] - 1
+        return positions
+
+    def stab(self, times, time_format: str = "datetime"):
+        """
+        All of the intervals containing each time.
+
+        Returns
+        -------
+        tuple: (numpy.ndarray of positions in `times`, numpy.ndarray of interval positions),
+        a pair per containment.
+        """
+        import numpy
+
+        times = numpy.atleast_1d(to_unix_seconds(times, time_format))
+        time_positions, interval_positions = self._candidate_pairs(
+            *self._candidate_bounds(times, times, inclusive_end=True)
+        )
+        contained = self.ends[interval_positions] > times[time_positions]
+        return time_positions[contained], interval_positions[contained]
+
+    def overlapping(self, starts, ends, time_format: str = "datetime"):
+        """
+        All of the intervals overlapping each [start, end) query interval.
+
+        Returns
+        -------
+        tuple: (numpy.ndarray of query positions, numpy.ndarray of interval positions),
+        a pair per overlap.
+        """
+        import numpy
+
+        starts = numpy.atleast_1d(to_unix_seconds(starts, time_format))
+        ends = numpy.atleast_1d(to_unix_seconds(ends, time_format))
+        query_positions, interval_positions = self._candidate_pairs(
+            *self._candidate_bounds(starts, ends, inclusive_end=False)
+        )
+        overlapped = self.ends[interval_positions] > starts[query_positions]
+        return query_positions[overlapped], interval_positions[overlapped]
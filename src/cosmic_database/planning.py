@@ -0,0 +1,227 @@
+"""
+Planning which Storage databases a query need contact.
+
+Each Storage database is summarised in the Operation database, per observation, by
+`CosmicDB_ObservationHitSummary` rows, and in a cached manifest of Bloom filters of
+its ObservationKeys. A Storage criterion is translated into a criterion of the
+summaries, or tested against the manifests, to rule databases out.
+"""
+import time
+
+import sqlalchemy
+
+from cosmic_database import entities
+from cosmic_database import value_tables
+from cosmic_database.bloom import CosmicDB_BloomFilter
+
+
+def select_observation_hit_summaries(conn, observation_ids: list, chunk_size: int = 500) -> dict:
+    """
+    The `CosmicDB_ObservationHitSummary` values of each of the observations in a Storage DB
+    with an ObservationKey, hits or stamps. Without an ObservationKey (its foreign keys
+    not being enforced) an observation's scan and configuration IDs are `None`.
+    """
+    key_table = entities.CosmicDB_ObservationKey.__table__
+    hit_table = entities.CosmicDB_ObservationHit.__table__
+    stamp_table = entities.CosmicDB_ObservationStamp.__table__
+
+    new_summary = lambda: {
+        "scan_id": None,
+        "configuration_id": None,
+        "hit_count": 0,
+        "stamp_count": 0,
+        "tstart_min": None,
+        "tstart_max": None,
+        "signal_frequency_min": None,
+        "signal_frequency_max": None,
+    }
+    summaries = {}
+    for chunk_start in range(0, len(observation_ids), chunk_size):
+        observation_ids_chunk = observation_ids[chunk_start:chunk_start+chunk_size]
+        for observation_id, scan_id, configuration_id in conn.execute(
+            sqlalchemy.select(key_table.c.observation_id, key_table.c.scan_id, key_table.c.configuration_id)
+            .where(key_table.c.observation_id.in_(observation_ids_chunk))
+        ):
+            summaries[observation_id] = new_summary()
+            summaries[observation_id].update(scan_id=scan_id, configuration_id=configuration_id)
+
+        for row in conn.execute(
+            sqlalchemy.select(
+                hit_table.c.observation_id,
+                sqlalchemy.func.count(),
+                sqlalchemy.func.min(hit_table.c.tstart),
+                sqlalchemy.func.max(hit_table.c.tstart),
+                sqlalchemy.func.min(hit_table.c.signal_frequency),
+                sqlalchemy.func.max(hit_table.c.signal_frequency),
+            )
+            .where(hit_table.c.observation_id.in_(observation_ids_chunk))
+            .group_by(hit_table.c.observation_id)
+        ):
+            summary = summaries.setdefault(row[0], new_summary())
+            (
+                summary["hit_count"],
+                summary["tstart_min"],
+                summary["tstart_max"],
+                summary["signal_frequency_min"],
+                summary["signal_frequency_max"],
+            ) = row[1:]
+
+        for observation_id, count in conn.execute(
+            sqlalchemy.select(stamp_table.c.observation_id, sqlalchemy.func.count())
+            .where(stamp_table.c.observation_id.in_(observation_ids_chunk))
+            .group_by(stamp_table.c.observation_id)
+        ):
+            summaries.setdefault(observation_id, new_summary())["stamp_count"] = count
+
+    return summaries
+
+
+def hit_summary_criterion(criterion):
+    """
+    A criterion of the `CosmicDB_ObservationHitSummary` entities of the Storage DBs that
+    may hold rows satisfying the Storage criterion, `None` if there is none to infer.
+
+    Criteria comparing an ObservationKey's `observation_id`, `scan_id` or `configuration_id`,
+    or a hit's `observation_id`, `tstart` or `signal_frequency` are inferred.
+    """
+    from sqlalchemy.sql import operators
+
+    if not isinstance(criterion, sqlalchemy.BinaryExpression):
+        return None
+    column, operator = criterion.left, criterion.operator
+    if not isinstance(column, sqlalchemy.Column):
+        return None
+    if (column.table, column.name) not in [
+        (entities.CosmicDB_ObservationKey.__table__, "observation_id"),
+        (entities.CosmicDB_ObservationKey.__table__, "scan_id"),
+        (entities.CosmicDB_ObservationKey.__table__, "configuration_id"),
+        (entities.CosmicDB_ObservationHit.__table__, "observation_id"),
+        (entities.CosmicDB_ObservationHit.__table__, "tstart"),
+        (entities.CosmicDB_ObservationHit.__table__, "signal_frequency"),
+    ]:
+        return None
+    value = value_tables.criterion_value(criterion)
+    if value is None or operator not in [operators.eq, operators.gt, operators.ge, operators.lt, operators.le, operators.in_op]:
+        return None
+    if operator == operators.in_op and len(value) == 0:
+        return None
+
+    summary_table = entities.CosmicDB_ObservationHitSummary.__table__
+    if column.name in ["observation_id", "scan_id", "configuration_id"] and operator == operators.in_op:
+        return value_tables.in_values(summary_table.c[column.name], value)
+    if column.name in ["observation_id", "scan_id", "configuration_id"]:
+        return operator(summary_table.c[column.name], value)
+
+    extent_min, extent_max = summary_table.c[f"{column.name}_min"], summary_table.c[f"{column.name}_max"]
+    if operator == operators.in_op:
+        return sqlalchemy.and_(extent_min <= max(value), extent_max >= min(value))
+    if operator == operators.eq:
+        return sqlalchemy.and_(extent_min <= value, extent_max >= value)
+    if operator in [operators.gt, operators.ge]:
+        return operator(extent_max, value)
+    return operator(extent_min, value)
+
+
+STORAGE_MANIFEST_FIELDS = ["observation_id", "scan_id"]
+STORAGE_MANIFEST_FALSE_POSITIVE_RATE = 0.01
+
+
+def _manifest_value(fieldname: str, value):
+    """The value normalised to the Python type of the ObservationKey field, so that it hashes alike, e.g. `5.0` and `numpy.int64(5)` as `5`."""
+    return entities.CosmicDB_ObservationKey.__table__.c[fieldname].type.python_type(value)
+
+
+def refresh_storage_manifest(conn, manifest: dict = None) -> dict:
+    """
+    The membership manifest of a Storage DB: Bloom filters of its ObservationKeys'
+    `STORAGE_MANIFEST_FIELDS`. The manifest given is returned as is if it accounts for
+    the ObservationKeys' count and greatest observation ID, otherwise it is extended with
+    the ObservationKeys of greater observation IDs, unless that does not account for all
+    of them (or would exceed the filters' capacity), in which case it is rebuilt. Either way
+    its `validated_unix` is now.
+    """
+    key_table = entities.CosmicDB_ObservationKey.__table__
+    key_columns = [key_table.c[fieldname] for fieldname in STORAGE_MANIFEST_FIELDS]
+
+    observation_count, observation_id_max = conn.execute(
+        sqlalchemy.select(sqlalchemy.func.count(), sqlalchemy.func.max(key_table.c.observation_id))
+    ).one()
+    if (manifest is not None
+      and manifest["observation_count"] == observation_count
+      and manifest["observation_id_max"] == observation_id_max
+    ):
+        manifest["validated_unix"] = time.time()
+        return manifest
+    if manifest is not None and observation_count <= manifest["capacity"]:
+        criteria = []
+        if manifest["observation_id_max"] is not None:
+            criteria.append(key_table.c.observation_id > manifest["observation_id_max"])
+        rows = conn.execute(sqlalchemy.select(*key_columns).where(*criteria)).all()
+        if manifest["observation_count"] + len(rows) == observation_count:
+            for row in rows:
+                for fieldname, value in zip(STORAGE_MANIFEST_FIELDS, row):
+                    manifest["filters"][fieldname].add(_manifest_value(fieldname, value))
+            manifest.update(
+                refreshed_unix = time.time(),
+                validated_unix = time.time(),
+                observation_count = observation_count,
+                observation_id_max = observation_id_max
+            )
+            return manifest
+
+    # leave room to be extended
+    capacity = max(1024, 2*observation_count)
+    manifest = {
+        "refreshed_unix": time.time(),
+        "validated_unix": time.time(),
+        "observation_count": 0,
+        "observation_id_max": None,
+        "capacity": capacity,
+        "filters": {
+            fieldname: CosmicDB_BloomFilter.for_capacity(capacity, STORAGE_MANIFEST_FALSE_POSITIVE_RATE)
+            for fieldname in STORAGE_MANIFEST_FIELDS
+        },
+    }
+    for row in conn.execute(sqlalchemy.select(*key_columns)):
+        for fieldname, value in zip(STORAGE_MANIFEST_FIELDS, row):
+            manifest["filters"][fieldname].add(_manifest_value(fieldname, value))
+        manifest["observation_count"] += 1
+        manifest["observation_id_max"] = row[0] if manifest["observation_id_max"] is None else max(row[0], manifest["observation_id_max"])
+    return manifest
+
+
+def manifest_criterion(criterion):
+    """
+    The (field, values) of a Storage criterion that requires one of the values of a
+    `STORAGE_MANIFEST_FIELDS` field, `None` if it does not (or a value does not convert
+    to the field's type).
+    """
+    from sqlalchemy.sql import operators
+
+    if not isinstance(criterion, sqlalchemy.BinaryExpression):
+        return None
+    column = criterion.left
+    if not isinstance(column, sqlalchemy.Column):
+        return None
+    if column.name == "observation_id":
+        if not any(
+            column.table is entity.__table__
+            for entity in entities.DATABASE_SCOPES[entities.DatabaseScope.Storage]
+        ):
+            return None
+    elif column.name != "scan_id" or column.table is not entities.CosmicDB_ObservationKey.__table__:
+        return None
+
+    value = value_tables.criterion_value(criterion)
+    if value is None:
+        return None
+    if criterion.operator == operators.eq:
+        values = [value]
+    elif criterion.operator == operators.in_op:
+        values = list(value)
+    else:
+        return None
+    try:
+        return column.name, [_manifest_value(column.name, value) for value in values]
+    except (TypeError, ValueError):
+        return None
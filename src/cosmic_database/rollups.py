@@ -0,0 +1,210 @@
+"""
+Incremental `CosmicDB_HitRollup` statistics of a Storage database's hits and stamps.
+
+Partial statistics are aggregated within the database per rollup key and merged into
+the stored rollups, so that rows are only ever read once: the hits and stamps already
+rolled up are those with IDs up to the `CosmicDB_StorageWatermark` values. SNR
+percentiles are approximated from a histogram of logarithmic SNR bins, stored as JSON.
+"""
+import json
+
+import sqlalchemy
+
+from cosmic_database import entities
+
+
+def get_watermark(conn, name: str) -> int:
+    """The value of the Storage DB's watermark, 0 if it is not set."""
+    watermark_table = entities.CosmicDB_StorageWatermark.__table__
+    value = conn.execute(
+        sqlalchemy.select(watermark_table.c.value)
+        .where(watermark_table.c.name == name)
+    ).scalar_one_or_none()
+    return 0 if value is None else value
+
+
+def set_watermark(conn, name: str, value: int):
+    watermark_table = entities.CosmicDB_StorageWatermark.__table__
+    if conn.execute(
+        sqlalchemy.update(watermark_table)
+        .where(watermark_table.c.name == name)
+        .values(value=value)
+    ).rowcount == 0:
+        conn.execute(
+            sqlalchemy.insert(watermark_table)
+            .values(name=name, value=value)
+        )
+
+
+HIT_ROLLUP_KEY_COLUMNS = ["observation_id", "tuning", "subband_offset", "signal_beam"]
+HIT_ROLLUP_PERCENTILES = [50, 90, 99]
+
+
+def histogram_percentile(histogram: dict, percentile: float, snr_min: float = None, snr_max: float = None):
+    """
+    The nearest-rank percentile of a `CosmicDB_HitRollup` SNR histogram, at the centre of its
+    bin, clamped to the SNR extent of the rollup when given.
+    """
+    import math
+
+    total_count = sum(histogram.values())
+    if total_count == 0:
+        return None
+    rank = max(1, math.ceil(percentile/100*total_count))
+    # the bin of non-positive SNRs (None) is the lowest
+    for snr_bin in sorted(histogram.keys(), key=lambda snr_bin: (snr_bin is not None, snr_bin)):
+        rank -= histogram[snr_bin]
+        if rank <= 0:
+            snr = 0.0 if snr_bin is None else 10**((snr_bin + 0.5)*entities.HIT_ROLLUP_SNR_BIN_WIDTH)
+            if snr_min is not None:
+                snr = max(snr, snr_min)
+            if snr_max is not None:
+                snr = min(snr, snr_max)
+            return snr
+
+
+def select_partials(conn, hit_criteria: list = None, stamp_criteria: list = None) -> dict:
+    """
+    The rollup statistics of the hits and stamps selected by the criteria (None skips
+    the table), keyed by the rollup key, aggregated within the database.
+    """
+    hit_table = entities.CosmicDB_ObservationHit.__table__
+    stamp_table = entities.CosmicDB_ObservationStamp.__table__
+    sarfi_table = entities.CosmicDB_HitFlagSARFI.__table__
+
+    partials = {}
+    def partial(key):
+        return partials.setdefault(tuple(key), {
+            "hit_count": 0,
+            "stamp_count": 0,
+            "sarfi_flagged_hit_count": 0,
+            "signal_snr_min": None,
+            "signal_snr_max": None,
+            "signal_frequency_min": None,
+            "signal_frequency_max": None,
+            "histogram": {},
+        })
+
+    if hit_criteria is not None:
+        key_columns = [hit_table.c[colname] for colname in HIT_ROLLUP_KEY_COLUMNS]
+        for row in conn.execute(
+            sqlalchemy.select(
+                *key_columns,
+                sqlalchemy.func.count(),
+                sqlalchemy.func.count(sarfi_table.c.hit_id),
+                sqlalchemy.func.min(hit_table.c.signal_snr),
+                sqlalchemy.func.max(hit_table.c.signal_snr),
+                sqlalchemy.func.min(hit_table.c.signal_frequency),
+                sqlalchemy.func.max(hit_table.c.signal_frequency),
+            )
+            .select_from(hit_table.outerjoin(sarfi_table, sarfi_table.c.hit_id == hit_table.c.id))
+            .where(*hit_criteria)
+            .group_by(*key_columns)
+        ):
+            key_partial = partial(row[:len(key_columns)])
+            (
+                key_partial["hit_count"],
+                key_partial["sarfi_flagged_hit_count"],
+                key_partial["signal_snr_min"],
+                key_partial["signal_snr_max"],
+                key_partial["signal_frequency_min"],
+                key_partial["signal_frequency_max"],
+            ) = row[len(key_columns):]
+
+        snr_bin = sqlalchemy.case(
+            (
+                hit_table.c.signal_snr > 0,
+                sqlalchemy.func.floor(sqlalchemy.func.log10(hit_table.c.signal_snr)/entities.HIT_ROLLUP_SNR_BIN_WIDTH)
+            ),
+            else_=None
+        )
+        for row in conn.execute(
+            sqlalchemy.select(*key_columns, snr_bin, sqlalchemy.func.count())
+            .where(*hit_criteria)
+            .group_by(*key_columns, snr_bin)
+        ):
+            snr_bin_value, count = row[len(key_columns):]
+            partial(row[:len(key_columns)])["histogram"][None if snr_bin_value is None else int(snr_bin_value)] = count
+
+    if stamp_criteria is not None:
+        key_columns = [stamp_table.c[colname] for colname in HIT_ROLLUP_KEY_COLUMNS]
+        for row in conn.execute(
+            sqlalchemy.select(*key_columns, sqlalchemy.func.count())
+            .where(*stamp_criteria)
+            .group_by(*key_columns)
+        ):
+            partial(row[:len(key_columns)])["stamp_count"] = row[-1]
+
+    return partials
+
+
+def merge_partials(conn, partials: dict, chunk_size: int = 500):
+    """Merge the partial statistics (see `select_partials`) into the stored rollups."""
+    rollup_table = entities.CosmicDB_HitRollup.__table__
+    key_columns = [rollup_table.c[colname] for colname in HIT_ROLLUP_KEY_COLUMNS]
+
+    keys = list(partials.keys())
+    existing_rollups = {}
+    for chunk_start in range(0, len(keys), chunk_size):
+        for row in conn.execute(
+            sqlalchemy.select(rollup_table)
+            .where(sqlalchemy.tuple_(*key_columns).in_(keys[chunk_start:chunk_start+chunk_size]))
+        ):
+            existing_rollups[tuple(getattr(row, colname) for colname in HIT_ROLLUP_KEY_COLUMNS)] = row
+
+    merge_optional = lambda function, lhs, rhs: lhs if rhs is None else rhs if lhs is None else function(lhs, rhs)
+    inserted_rollups = []
+    updated_rollups = []
+    for key, key_partial in partials.items():
+        existing = existing_rollups.get(key)
+        histogram = {}
+        if existing is not None:
+            histogram = {
+                None if snr_bin == "null" else int(snr_bin): count
+                for snr_bin, count in json.loads(existing.signal_snr_histogram_json).items()
+            }
+        for snr_bin, count in key_partial["histogram"].items():
+            histogram[snr_bin] = histogram.get(snr_bin, 0) + count
+
+        values = {
+            colname: key_partial[colname] + (0 if existing is None else getattr(existing, colname))
+            for colname in ["hit_count", "stamp_count", "sarfi_flagged_hit_count"]
+        }
+        for colname, function in [
+            ("signal_snr_min", min),
+            ("signal_snr_max", max),
+            ("signal_frequency_min", min),
+            ("signal_frequency_max", max),
+        ]:
+            values[colname] = merge_optional(function, key_partial[colname], None if existing is None else getattr(existing, colname))
+        for percentile in HIT_ROLLUP_PERCENTILES:
+            values[f"signal_snr_p{percentile}"] = histogram_percentile(histogram, percentile, values["signal_snr_min"], values["signal_snr_max"])
+        values["signal_snr_histogram_json"] = json.dumps({
+            "null" if snr_bin is None else str(snr_bin): count
+            for snr_bin, count in sorted(histogram.items(), key=lambda item: (item[0] is not None, item[0]))
+        })
+
+        if existing is None:
+            inserted_rollups.append({**dict(zip(HIT_ROLLUP_KEY_COLUMNS, key)), **values})
+        else:
+            updated_rollups.append({
+                **{f"key_{colname}": key_value for colname, key_value in zip(HIT_ROLLUP_KEY_COLUMNS, key)},
+                **{f"new_{colname}": value for colname, value in values.items()},
+            })
+
+    if len(inserted_rollups) > 0:
+        conn.execute(sqlalchemy.insert(rollup_table), inserted_rollups)
+    if len(updated_rollups) > 0:
+        conn.execute(
+            sqlalchemy.update(rollup_table)
+            .where(*[
+                col == sqlalchemy.bindparam(f"key_{col.name}")
+                for col in key_columns
+            ])
+            .values({
+                col.name: sqlalchemy.bindparam(f"new_{col.name}")
+                for col in rollup_table.columns
+                if col.name not in HIT_ROLLUP_KEY_COLUMNS
+            }),
+            updated_rollups
+        )
@@ -0,0 +1,176 @@
+"""
+Sky pixelisation for indexing coordinates.
+
+The sky is divided into declination bands of `SKY_PIXEL_BAND_DEGREES`, each
+divided into right-ascension cells of (about) the same width on the sky, so that
+pixels are of nearly equal area (an "igloo" pixelisation, similar in intent to
+HEALPix). Pixels are enumerated band by band from the south pole, and cell by
+cell from RA 0 within a band, so that the pixels of a band are contiguous and
+a cone is covered by at most two ranges of pixels per band.
+
+The scalar and vectorised (NumPy) functions perform identical arithmetic so that
+pixels computed on insertion match those computed in bulk.
+"""
+import math
+
+SKY_PIXEL_BAND_DEGREES = 0.05
+
+_RADIANS_TO_DEGREES = 180.0/math.pi
+_UNIT_TO_RADIANS = {
+    "radians": 1.0,
+    "degrees": math.pi/180.0,
+    "hours": math.pi/12.0,
+}
+
+_BAND_COUNT = int(round(180.0/SKY_PIXEL_BAND_DEGREES))
+_BAND_RA_CELLS = [
+    max(1, math.ceil(
+        360.0*math.cos(math.radians(-90.0 + (band + 0.5)*SKY_PIXEL_BAND_DEGREES))/SKY_PIXEL_BAND_DEGREES
+    ))
+    for band in range(_BAND_COUNT)
+]
+_BAND_OFFSETS = [0]
+for _band_ra_cells in _BAND_RA_CELLS[:-1]:
+    _BAND_OFFSETS.append(_BAND_OFFSETS[-1] + _band_ra_cells)
+
+SKY_PIXEL_COUNT = _BAND_OFFSETS[-1] + _BAND_RA_CELLS[-1]
+
+
+def to_radians(values, unit: str):
+    """Convert scalar or array angles from the unit ('radians', 'degrees' or 'hours') to radians."""
+    try:
+        return values*_UNIT_TO_RADIANS[unit]
+    except KeyError:
+        raise ValueError(f"Unknown angular unit '{unit}', expected one of {list(_UNIT_TO_RADIANS.keys())}.") from None
+
+
+def _band(dec_degrees: float) -> int:
+    return min(max(int(math.floor((dec_degrees + 90.0)/SKY_PIXEL_BAND_DEGREES)), 0), _BAND_COUNT - 1)
+
+
+def sky_pixel(ra_radians: float, dec_radians: float) -> int:
+    """The sky pixel of a single coordinate."""
+    band = _band(dec_radians*_RADIANS_TO_DEGREES)
+    ra_degrees = (ra_radians*_RADIANS_TO_DEGREES) % 360.0
+    band_ra_cells = _BAND_RA_CELLS[band]
+    return _BAND_OFFSETS[band] + min(int(math.floor(ra_degrees/360.0*band_ra_cells)), band_ra_cells - 1)
+
+
+def sky_pixels(ra_radians, dec_radians):
+    """The sky pixels of arrays of coordinates."""
+    import numpy
+
+    band = numpy.clip(
+        numpy.floor((numpy.asarray(dec_radians, dtype=numpy.float64)*_RADIANS_TO_DEGREES + 90.0)/SKY_PIXEL_BAND_DEGREES),
+        0,
+        _BAND_COUNT - 1
+    ).astype(numpy.int64)
+    ra_degrees = numpy.mod(numpy.asarray(ra_radians, dtype=numpy.float64)*_RADIANS_TO_DEGREES, 360.0)
+    band_ra_cells = numpy.asarray(_BAND_RA_CELLS, dtype=numpy.int64)[band]
+    return numpy.asarray(_BAND_OFFSETS, dtype=numpy.int64)[band] + numpy.minimum(
+        numpy.floor(ra_degrees/360.0*band_ra_cells).astype(numpy.int64),
+        band_ra_cells - 1
+    )
+
+
+def cone_sky_pixel_ranges(ra_radians: float, dec_radians: float, radius_radians: float) -> list:
+    """
+    The inclusive ranges of sky pixels that cover the cone, handling RA wrap-around
+    and cones that reach a pole.
+
+    Returns
+    -------
+    list of (first_pixel, last_pixel) tuples.
+    """
+    # pad against rounding at pixel edges
+    radius_degrees = radius_radians*_RADIANS_TO_DEGREES + 1e-9
+    if radius_degrees >= 180.0:
+        return [(0, SKY_PIXEL_COUNT - 1)]
+
+    ra_degrees = (ra_radians*_RADIANS_TO_DEGREES) % 360.0
+    dec_degrees = dec_radians*_RADIANS_TO_DEGREES
+    if abs(dec_degrees) + radius_degrees >= 90.0:
+        ra_halfwidth_degrees = 180.0
+    else:
+        ra_halfwidth_degrees = math.degrees(math.asin(
+            min(1.0, math.sin(math.radians(radius_degrees))/math.cos(math.radians(dec_degrees)))
+        )) + 1e-9
+
+    ranges = []
+    for band in range(_band(dec_degrees - radius_degrees), _band(dec_degrees + radius_degrees) + 1):
+        band_offset = _BAND_OFFSETS[band]
+        band_ra_cells = _BAND_RA_CELLS[band]
+        first_cell = int(math.floor((ra_degrees - ra_halfwidth_degrees)/360.0*band_ra_cells))
+        last_cell = int(math.floor((ra_degrees + ra_halfwidth_degrees)/360.0*band_ra_cells))
+        if ra_halfwidth_degrees >= 180.0 or last_cell - first_cell + 1 >= band_ra_cells:
+            band_ranges = [(0, band_ra_cells - 1)]
+        elif first_cell < 0:
+            band_ranges = [(first_cell + band_ra_cells, band_ra_cells - 1), (0, last_cell)]
+        elif last_cell >= band_ra_cells:
+            band_ranges = [(first_cell, band_ra_cells - 1), (0, last_cell - band_ra_cells)]
+        else:
+            band_ranges = [(first_cell, last_cell)]
+
+        for first, last in sorted(band_ranges):
+            first += band_offset
+            last += band_offset
+            if len(ranges) > 0 and ranges[-1][1] + 1 >= first:
+                ranges[-1] = (ranges[-1][0], max(ranges[-1][1], last))
+            else:
+                ranges.append((first, last))
+    return sorted(ranges)
+
+
+def sky_pixel_centres(pixels):
+    """
+    The centres of an array of sky pixels.
+
+    Returns
+    -------
+    tuple: (numpy.ndarray of RA in radians, numpy.ndarray of declination in radians)
+    """
+    import numpy
+
+    pixels = numpy.asarray(pixels, dtype=numpy.int64)
+    band = numpy.searchsorted(numpy.asarray(_BAND_OFFSETS, dtype=numpy.int64), pixels, side="right") - 1
+    cell = pixels - numpy.asarray(_BAND_OFFSETS, dtype=numpy.int64)[band]
+    ra_degrees = (cell + 0.5)/numpy.asarray(_BAND_RA_CELLS, dtype=numpy.int64)[band]*360.0
+    dec_degrees = -90.0 + (band + 0.5)*SKY_PIXEL_BAND_DEGREES
+    return ra_degrees/_RADIANS_TO_DEGREES, dec_degrees/_RADIANS_TO_DEGREES
+
+
+def cone_sky_pixels(ra_radians: float, dec_radians: float, radius_radians: float):
+    """
+    The sky pixels whose centres lie within the cone, and always the pixel of the
+    cone's centre.
+
+    Returns
+    -------
+    numpy.ndarray of the pixels, sorted.
+    """
+    import numpy
+
+    pixels = numpy.concatenate([
+        numpy.arange(first_pixel, last_pixel + 1, dtype=numpy.int64)
+        for first_pixel, last_pixel in cone_sky_pixel_ranges(ra_radians, dec_radians, radius_radians)
+    ])
+    ra_centres, dec_centres = sky_pixel_centres(pixels)
+    within = angular_separation(ra_centres, dec_centres, ra_radians, dec_radians) <= radius_radians
+    within |= pixels == sky_pixel(ra_radians, dec_radians)
+    return pixels[within]
+
+
+def angular_separation(ra_radians, dec_radians, ra_centre_radians, dec_centre_radians):
+    """
+    The angular separation (radians) of coordinates from a centre, by the haversine
+    formula, for scalars or NumPy arrays.
+    """
+    import numpy
+
+    sin_half_ddec = numpy.sin((dec_radians - dec_centre_radians)/2)
+    sin_half_dra = numpy.sin((ra_radians - ra_centre_radians)/2)
+    return 2*numpy.arcsin(numpy.sqrt(numpy.clip(
+        sin_half_ddec**2 + numpy.cos(dec_radians)*numpy.cos(dec_centre_radians)*sin_half_dra**2,
+        0.0,
+        1.0
+    )))
@@ -0,0 +1,120 @@
+"""
+Criteria matching many values, by `IN` lists or semi-joins of temporary tables.
+
+Values beyond a threshold are held by an uncreated temporary table, which the engine's
+event listeners create and populate on each connection that executes a statement with
+the criterion, and drop when the connection is returned to its pool.
+"""
+import uuid
+import weakref
+
+import sqlalchemy
+
+
+IN_VALUES_TEMPORARY_TABLE_THRESHOLD = 10000
+IN_VALUES_INSERT_CHUNK_SIZE = 10000
+
+# the temporary tables of the `in_values` criteria in use
+_VALUE_TABLES = weakref.WeakSet()
+
+
+def in_values(column, values, threshold: int = None):
+    """
+    The criterion that a column (or the tuple of a list of columns) is one of the values,
+    as an `IN` list, or a semi-join of a temporary table beyond `threshold` distinct values
+    (defaulting to `IN_VALUES_TEMPORARY_TABLE_THRESHOLD`).
+    """
+    columns = list(column) if isinstance(column, (list, tuple)) else [column]
+    composite = len(columns) > 1
+    # NULL is never IN anything
+    values = list(dict.fromkeys(
+        tuple(value) if composite else value
+        for value in values
+        if value is not None and not (composite and None in value)
+    ))
+    expression = sqlalchemy.tuple_(*columns) if composite else columns[0]
+    if len(values) <= (IN_VALUES_TEMPORARY_TABLE_THRESHOLD if threshold is None else threshold):
+        return expression.in_(values)
+
+    value_table = sqlalchemy.Table(
+        f"cosmicdb_values_{uuid.uuid4().hex}",
+        sqlalchemy.MetaData(),
+        *[
+            sqlalchemy.Column(f"value_{column_index}", col.type, primary_key=not isinstance(col.type, sqlalchemy.Text))
+            for column_index, col in enumerate(columns)
+        ],
+        prefixes=["TEMPORARY"],
+    )
+    value_table.info["cosmicdb_values"] = values
+    _VALUE_TABLES.add(value_table)
+    return expression.in_(sqlalchemy.select(*value_table.columns))
+
+
+def create_value_tables(conn, clauseelement, multiparams, params, execution_options):
+    """
+    A `before_execute` event listener, creating and populating the temporary tables of the
+    statement's `in_values` criteria that the connection does not have yet.
+    """
+    if len(_VALUE_TABLES) == 0 or not isinstance(clauseelement, (sqlalchemy.Select, sqlalchemy.Update, sqlalchemy.Delete)):
+        return
+    # the DROP statement of each table, for `drop_value_tables`
+    created_table_drops = conn.info.setdefault("cosmicdb_value_tables", {})
+    populated_table_names = conn.info.setdefault("cosmicdb_populated_value_tables", set())
+    for table in sqlalchemy.sql.util.find_tables(clauseelement):
+        if "cosmicdb_values" not in table.info or table.name in populated_table_names:
+            continue
+        # MySQL implicitly commits on DROP TABLE, but not on DROP TEMPORARY TABLE
+        created_table_drops[table.name] = "DROP {}TABLE IF EXISTS {}".format(
+            "TEMPORARY " if conn.dialect.name in ["mysql", "mariadb"] else "",
+            conn.dialect.identifier_preparer.quote(table.name)
+        )
+        populated_table_names.add(table.name)
+        # a rollback can leave the table without its values
+        conn.exec_driver_sql(created_table_drops[table.name])
+        table.create(conn)
+        values = table.info["cosmicdb_values"]
+        colnames = [col.name for col in table.columns]
+        for chunk_start in range(0, len(values), IN_VALUES_INSERT_CHUNK_SIZE):
+            conn.execute(
+                table.insert(),
+                [
+                    dict(zip(colnames, value if len(colnames) > 1 else (value,)))
+                    for value in values[chunk_start:chunk_start+IN_VALUES_INSERT_CHUNK_SIZE]
+                ]
+            )
+
+
+def forget_value_tables(conn):
+    """A `rollback` event listener, so that the temporary tables are repopulated."""
+    conn.info.pop("cosmicdb_populated_value_tables", None)
+
+
+def drop_value_tables(dbapi_connection, connection_record):
+    """A `checkin` pool event listener, dropping the connection's temporary tables."""
+    connection_record.info.pop("cosmicdb_populated_value_tables", None)
+    table_drops = connection_record.info.pop("cosmicdb_value_tables", None)
+    if not table_drops:
+        return
+    try:
+        cursor = dbapi_connection.cursor()
+        for table_drop in table_drops.values():
+            cursor.execute(table_drop)
+        cursor.close()
+        dbapi_connection.commit()
+    except Exception:
+        # the tables go with the connection
+        pass
+
+
+def criterion_value(criterion):
+    """The value a criterion compares its column to, bound or of an `in_values` temporary table, else `None`."""
+    if isinstance(criterion.right, sqlalchemy.BindParameter):
+        return criterion.right.value
+    value_tables = [
+        table
+        for table in sqlalchemy.sql.util.find_tables(criterion.right)
+        if "cosmicdb_values" in table.info
+    ]
+    if len(value_tables) == 1 and len(value_tables[0].columns) == 1:
+        return value_tables[0].info["cosmicdb_values"]
+    return None
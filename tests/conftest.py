@@ -0,0 +1,114 @@
+from datetime import datetime
+
+import pytest
+import yaml
+
+from cosmic_database import entities
+from cosmic_database.engine import CosmicDB_Engine, CosmicDB_EngineMultiConfig, CosmicDB_EngineRegistry
+
+# test_all.py is a script against a MySQL server
+collect_ignore = ["test_all.py"]
+
+STORAGE_DB_COUNT = 3
+
+
+@pytest.fixture
+def multiconfig_filepath(tmp_path):
+    """A multi-scope configuration of an Operation and `STORAGE_DB_COUNT` Storage SQLite databases, with filesystems 'uuid<i>' labelled 'label<i>'."""
+    conf = {
+        "Operation": {"drivername": "sqlite+pysqlite", "database": str(tmp_path / "operation.db")},
+        "Storage": [
+            {"drivername": "sqlite+pysqlite", "database": str(tmp_path / f"storage{i}.db")}
+            for i in range(STORAGE_DB_COUNT)
+        ],
+    }
+    filepath = tmp_path / "conf.yaml"
+    with open(filepath, "w") as yaml_fio:
+        yaml.safe_dump(conf, yaml_fio)
+
+    operation_engine = CosmicDB_Engine(engine_url=f"sqlite+pysqlite:///{conf['Operation']['database']}", scope=entities.DatabaseScope.Operation)
+    operation_engine.create_all_tables()
+    for i, storage_conf in enumerate(conf["Storage"]):
+        storage_engine = CosmicDB_Engine(engine_url=f"sqlite+pysqlite:///{storage_conf['database']}", scope=entities.DatabaseScope.Storage)
+        storage_engine.create_all_tables()
+        storage_engine.commit_entity(entities.CosmicDB_StorageDatabaseInfo(filesystem_uuid=f"uuid{i}"))
+        storage_engine.dispose()
+        operation_engine.commit_entity(entities.CosmicDB_Filesystem(uuid=f"uuid{i}", label=f"label{i}"))
+        operation_engine.commit_entity(entities.CosmicDB_FilesystemMount(
+            filesystem_uuid=f"uuid{i}",
+            host="host",
+            host_mountpoint="/mnt",
+            start=datetime(2023, 1, 1 + i)
+        ))
+    # the first Storage database is active
+    operation_engine.commit_entity(entities.CosmicDB_OperationDatabaseInfo(start=datetime(2023, 1, 1), archival_filesystem_mount_id=1))
+    operation_engine.dispose()
+    return str(filepath)
+
+
+@pytest.fixture
+def engine_registry():
+    registry = CosmicDB_EngineRegistry()
+    yield registry
+    registry.dispose()
+
+
+@pytest.fixture
+def engine_multi_config(multiconfig_filepath, engine_registry):
+    return CosmicDB_EngineMultiConfig(multiconfig_filepath, engine_registry=engine_registry)
+
+
+@pytest.fixture
+def storage_engine(tmp_path):
+    """A standalone Storage SQLite database."""
+    engine = CosmicDB_Engine(engine_url=f"sqlite+pysqlite:///{tmp_path}/standalone_storage.db", scope=entities.DatabaseScope.Storage)
+    engine.create_all_tables()
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def operation_engine(tmp_path):
+    """A standalone Operation SQLite database."""
+    engine = CosmicDB_Engine(engine_url=f"sqlite+pysqlite:///{tmp_path}/standalone_operation.db", scope=entities.DatabaseScope.Operation)
+    engine.create_all_tables()
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def new_observation_hit():
+    """A factory of `CosmicDB_ObservationHit` rows (as column dicts) of file 1, with overridable defaults."""
+    def new_observation_hit(**columns):
+        hit = {
+            "observation_id": 0,
+            "tuning": "AC",
+            "subband_offset": 0,
+            "file_id": 1,
+            "file_local_enumeration": 0,
+            "signal_frequency": 1000.0,
+            "signal_index": 0,
+            "signal_drift_steps": 1,
+            "signal_drift_rate": 0.0,
+            "signal_snr": 10.0,
+            "signal_coarse_channel": 0,
+            "signal_beam": 0,
+            "signal_num_timesteps": 16,
+            "signal_power": 1.0,
+            "signal_incoherent_power": None,
+            "source_name": "source",
+            "fch1_mhz": 1000.0,
+            "foff_mhz": 0.001,
+            "tstart": 60000.0,
+            "tsamp": 1.0,
+            "ra_hours": 1.0,
+            "dec_degrees": 10.0,
+            "telescope_id": 0,
+            "num_timesteps": 16,
+            "num_channels": 1024,
+            "coarse_channel": 0,
+            "start_channel": 0,
+        }
+        hit.update(columns)
+        return hit
+    return new_observation_hit
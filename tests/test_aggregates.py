@@ -0,0 +1,99 @@
+import math
+
+import pytest
+import sqlalchemy
+
+from cosmic_database import engine as cosmicdb_engine
+from cosmic_database import entities
+
+
+def _storage_engine(tmp_path, name, hits):
+    engine = cosmicdb_engine.CosmicDB_Engine(engine_url=f"sqlite+pysqlite:///{tmp_path}/{name}.db", scope=entities.DatabaseScope.Storage)
+    engine.create_all_tables()
+    engine.bulk_insert(entities.CosmicDB_ObservationHit, hits)
+    return engine
+
+
+def _nearest_rank(values, percentile):
+    values = sorted(values)
+    return values[max(1, math.ceil(percentile/100*len(values))) - 1]
+
+
+@pytest.fixture
+def storage_engines(tmp_path, new_observation_hit):
+    # snr ranges of ~1000 and ~10, binned to 0.1 and 0.01 respectively
+    snr_lists = [
+        [10.0 + i*0.997 for i in range(1000)],
+        [5.0 + i*0.0101 for i in range(1000)],
+    ]
+    engines = [
+        _storage_engine(tmp_path, f"storage{db_index}", [
+            new_observation_hit(signal_snr=snr, signal_beam=i % 2, signal_coarse_channel=i)
+            for i, snr in enumerate(snrs)
+        ])
+        for db_index, snrs in enumerate(snr_lists)
+    ]
+    yield engines, snr_lists
+    for engine in engines:
+        engine.dispose()
+
+
+def _aggregate(engines, aggregate_arguments, **kwargs):
+    hit = entities.CosmicDB_ObservationHit
+    aggregates = [
+        cosmicdb_engine.cli_parse_aggregate_argument({None: hit}, aggregate)
+        for aggregate in aggregate_arguments
+    ]
+    selection = lambda *columns: sqlalchemy.select(*columns).select_from(hit)
+    partials = [
+        cosmicdb_engine._select_aggregate_partials(engine, selection, [hit.signal_beam], aggregates, **kwargs)
+        for engine in engines
+    ]
+    return partials, cosmicdb_engine._merge_aggregate_partials(partials, aggregates)
+
+
+def test_percentiles_are_binned_by_default(storage_engines):
+    engines, snr_lists = storage_engines
+    partials, rows = _aggregate(engines, ["signal_snr:p50", "signal_snr:p99", "signal_snr:max", "signal_coarse_channel:p90"])
+
+    for group_partials, group_histograms in partials:
+        bin_exponent, histograms = group_histograms["signal_snr"]
+        assert bin_exponent in [-1, -2]
+        assert sum(len(value_counts) for value_counts in histograms.values()) <= cosmicdb_engine.AGGREGATE_PERCENTILE_BINS
+
+    for signal_beam, p50, p99, snr_max, channel_p90 in rows:
+        snrs = [snr for snrs in snr_lists for i, snr in enumerate(snrs) if i % 2 == signal_beam]
+        # within the widest bin (0.1), at its lower edge
+        assert _nearest_rank(snrs, 50) - 0.1 <= p50 <= _nearest_rank(snrs, 50) + 1e-9
+        assert _nearest_rank(snrs, 99) - 0.1 <= p99 <= _nearest_rank(snrs, 99) + 1e-9
+        assert snr_max == max(snrs)
+        # integers spanning fewer values than bins are exact
+        assert channel_p90 == _nearest_rank([i for i in range(1000) if i % 2 == signal_beam]*2, 90)
+
+
+def test_exact_percentiles_are_opt_in(storage_engines):
+    engines, snr_lists = storage_engines
+    partials, rows = _aggregate(engines, ["signal_snr:p50"], exact_percentiles=True)
+    for signal_beam, p50 in rows:
+        assert p50 == _nearest_rank([snr for snrs in snr_lists for i, snr in enumerate(snrs) if i % 2 == signal_beam], 50)
+
+    partials, rows = _aggregate(engines, ["signal_snr:p50"], percentile_bin_width=10)
+    assert all(p50 % 10 == 0 for signal_beam, p50 in rows)
+
+
+def test_single_values_do_not_widen_bins(storage_engines, tmp_path, new_observation_hit):
+    engines, snr_lists = storage_engines
+    single_engine = _storage_engine(tmp_path, "single", [new_observation_hit(signal_snr=7.123, signal_beam=0)])
+    partials, rows = _aggregate(engines + [single_engine], ["signal_snr:p50", "signal_snr:p1"])
+    assert partials[-1][1]["signal_snr"] == (None, {(0,): [(7.123, 1)]})
+
+    for signal_beam, p50, p1 in rows:
+        snrs = [snr for snrs in snr_lists for i, snr in enumerate(snrs) if i % 2 == signal_beam] + [7.123]*(signal_beam == 0)
+        # still within the widest bin (0.1)
+        assert _nearest_rank(snrs, 50) - 0.1 <= p50 <= _nearest_rank(snrs, 50) + 1e-9
+        assert _nearest_rank(snrs, 1) - 0.1 <= p1 <= _nearest_rank(snrs, 1) + 1e-9
+
+    # alone, the value is exact
+    partials, rows = _aggregate([single_engine], ["signal_snr:p50"])
+    assert rows == [(0, 7.123)]
+    single_engine.dispose()
@@ -25,7 +25,7 @@ with open(data_filepath, "r") as json_fio:
         assert session.scalars(
             sqlalchemy.select(entities.CosmicDB_Dataset).where(entities.CosmicDB_Dataset.id == json_data["datasets"][0]["id"])
         ).one_or_none() is None
-        assert engine.select_entity(session, entities.CosmicDB_Dataset, id = json_data["datasets"][0]["id"]) is None
+        assert engine.select_entity(entities.CosmicDB_Dataset, session, id = json_data["datasets"][0]["id"]) is None
 
     engine.commit_entities([
         entities.CosmicDB_Dataset(
@@ -38,7 +38,7 @@ with open(data_filepath, "r") as json_fio:
         assert session.scalars(
             sqlalchemy.select(entities.CosmicDB_Dataset).where(entities.CosmicDB_Dataset.id == json_data["datasets"][0]["id"])
         ).one_or_none() is not None
-        dataset = engine.select_entity(session, entities.CosmicDB_Dataset, id = json_data["datasets"][0]["id"])
+        dataset = engine.select_entity(entities.CosmicDB_Dataset, session, id = json_data["datasets"][0]["id"])
         assert dataset is not None
         print(dataset)
     
@@ -57,8 +57,8 @@ with open(data_filepath, "r") as json_fio:
             t = datetime.fromtimestamp(scan["time_start_unix"])
             print(t)
             scan = engine.select_entity(
-                session,
                 entities.CosmicDB_Scan,
+                session,
                 start = t
             ) 
             print(scan)
@@ -105,12 +105,14 @@ with open(data_filepath, "r") as json_fio:
     ])
 
     with engine.session() as session:
+        subband_scans, missing_scan_ids = engine.select_entities(
+            entities.CosmicDB_Scan,
+            [obs_subband["scan_id"] for obs_subband in json_data["observation_subbands"]],
+            session
+        )
+        assert len(missing_scan_ids) == 0
         for obs_subband in json_data["observation_subbands"]:
-            scan = engine.select_entity(
-                session,
-                entities.CosmicDB_Scan,
-                id = obs_subband.pop("scan_id")
-            )
+            scan = subband_scans[obs_subband.pop("scan_id")]
             session.add(
                 entities.CosmicDB_ObservationSubband(
                     observation_id = scan.observations[-1].id,
@@ -124,8 +126,8 @@ with open(data_filepath, "r") as json_fio:
         for obs_beam in json_data["observation_beams"]:
             if "observation_id" not in obs_beam:
                 obs_beam["observation_id"] = engine.select_entity(
-                    session,
                     entities.CosmicDB_Scan,
+                    session,
                     id = obs_beam.pop("scan_id")
                 ).observations[-1].id
             
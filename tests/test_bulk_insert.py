@@ -0,0 +1,70 @@
+import numpy
+import sqlalchemy
+
+from cosmic_database import entities
+
+
+def test_bulk_insert_dicts_and_tuples(storage_engine, new_observation_hit):
+    hits = [new_observation_hit(file_local_enumeration=i, signal_snr=10.0 + i) for i in range(5)]
+
+    assert storage_engine.bulk_insert(entities.CosmicDB_ObservationHit, hits[:2], batch_size=1) == 2
+    columns = list(hits[0].keys())
+    ids = storage_engine.bulk_insert(
+        entities.CosmicDB_ObservationHit,
+        [tuple(hit[column] for column in columns) for hit in hits[2:]],
+        columns=columns,
+        return_ids=True
+    )
+    assert ids == [3, 4, 5]
+
+    with storage_engine.session() as session:
+        snrs = session.scalars(
+            sqlalchemy.select(entities.CosmicDB_ObservationHit.signal_snr)
+            .order_by(entities.CosmicDB_ObservationHit.id)
+        ).all()
+    assert snrs == [hit["signal_snr"] for hit in hits]
+
+
+def test_bulk_insert_structured_array_nulls(storage_engine, new_observation_hit):
+    storage_engine.bulk_insert(
+        entities.CosmicDB_ObservationHit,
+        [
+            new_observation_hit(file_local_enumeration=i, stamp_id=None if i % 2 else i, signal_incoherent_power=None if i % 2 else 0.5)
+            for i in range(4)
+        ]
+    )
+    columns = [
+        column.name
+        for column in entities.CosmicDB_ObservationHit.__table__.columns
+        if column.name != "id"
+    ]
+    array = storage_engine.select_structured_array(entities.CosmicDB_ObservationHit, columns=columns)
+    # the nullable integer column is a float field, NULL as NaN
+    assert array.dtype["stamp_id"] == numpy.float64
+    assert numpy.isnan(array["stamp_id"][1::2]).all()
+
+    # the array inserts back with NULLs and integers, not NaN and floats
+    # (which SQLite would otherwise store as NULL regardless)
+    inserted_parameters = []
+    def record_parameters(conn, cursor, statement, parameters, context, executemany):
+        inserted_parameters.extend(parameters if executemany else [parameters])
+    sqlalchemy.event.listen(storage_engine.engine, "before_cursor_execute", record_parameters)
+    storage_engine.bulk_insert(entities.CosmicDB_ObservationHit, array)
+    sqlalchemy.event.remove(storage_engine.engine, "before_cursor_execute", record_parameters)
+    assert not any(
+        isinstance(value, float) and numpy.isnan(value)
+        for parameters in inserted_parameters
+        for value in parameters
+    )
+
+    with storage_engine.engine.connect() as conn:
+        rows = conn.execute(
+            sqlalchemy.select(
+                entities.CosmicDB_ObservationHit.stamp_id,
+                sqlalchemy.func.typeof(entities.CosmicDB_ObservationHit.stamp_id),
+                entities.CosmicDB_ObservationHit.signal_incoherent_power
+            )
+            .order_by(entities.CosmicDB_ObservationHit.id)
+        ).all()
+    assert rows[4:] == rows[:4]
+    assert rows[4:] == [(0, "integer", 0.5), (None, "null", None), (2, "integer", 0.5), (None, "null", None)]
@@ -0,0 +1,32 @@
+import numpy
+
+from cosmic_database import entities
+
+
+def test_select_structured_array(storage_engine, new_observation_hit):
+    hit = entities.CosmicDB_ObservationHit
+    storage_engine.bulk_insert(hit, [new_observation_hit(file_local_enumeration=i, signal_snr=float(i)) for i in range(10)])
+
+    array = storage_engine.select_structured_array(
+        hit,
+        columns=["file_local_enumeration", "signal_snr", "stamp_id"],
+        criteria=[hit.signal_snr >= 3],
+        order_by=hit.signal_snr.desc(),
+        limit=4,
+        chunk_size=3
+    )
+    assert array.dtype.names == ("file_local_enumeration", "signal_snr", "stamp_id")
+    assert array["file_local_enumeration"].tolist() == [9, 8, 7, 6]
+    # the nullable integer is NaN
+    assert numpy.isnan(array["stamp_id"]).all()
+    assert storage_engine.select_structured_array(hit, criteria=[hit.signal_snr > 100]).shape == (0,)
+
+
+def test_select_records(storage_engine, new_observation_hit):
+    hit = entities.CosmicDB_ObservationHit
+    storage_engine.bulk_insert(hit, [new_observation_hit(file_local_enumeration=i, signal_snr=float(i)) for i in range(10)])
+
+    records = storage_engine.select_records(hit, criteria=[hit.signal_snr < 2], order_by=hit.id, chunk_size=1)
+    assert [record.file_local_enumeration for record in records] == [0, 1]
+    assert isinstance(records[0], hit.record_class())
+    assert not hasattr(records[0], "__dict__")
@@ -0,0 +1,134 @@
+import threading
+import time
+
+import yaml
+
+from cosmic_database import entities
+from cosmic_database.engine import CosmicDB_EngineMultiConfig
+
+
+class HangingProbeMultiConfig(CosmicDB_EngineMultiConfig):
+    """Probes of the Storage databases in `hanging_databases` block forever."""
+    hanging_databases = set()
+
+    def _probe_storage_fs_uuid(self, engurl):
+        if engurl.database in self.hanging_databases:
+            threading.Event().wait()
+        return f"uuid-{engurl.database}"
+
+
+def _storage_only_config(tmp_path, databases: list) -> str:
+    filepath = tmp_path / "conf.yaml"
+    with open(filepath, "w") as yaml_fio:
+        yaml.safe_dump({
+            "Storage": [
+                {"drivername": "sqlite+pysqlite", "database": database}
+                for database in databases
+            ]
+        }, yaml_fio)
+    return str(filepath)
+
+
+def _discover_with_deadline(config: CosmicDB_EngineMultiConfig, deadline_s: float = 10):
+    discovery = threading.Thread(target=lambda: config.storage_uuid_map_engurl, daemon=True)
+    discovery.start()
+    discovery.join(deadline_s)
+    assert not discovery.is_alive(), "Discovery did not return."
+
+
+def test_hung_probes_holding_every_worker_abandon_queued_probes(tmp_path):
+    HangingProbeMultiConfig.hanging_databases = {"hang"}
+    config = HangingProbeMultiConfig(
+        _storage_only_config(tmp_path, ["hang", "a", "b"]),
+        discovery_workers=1,
+        discovery_probe_timeout_s=0.5,
+        lazy_storage_discovery=True,
+    )
+    _discover_with_deadline(config)
+
+    assert sorted(engurl.database for engurl in config.problematic_storage_engurls) == ["a", "b", "hang"]
+    assert config.storage_uuid_map_engurl == {}
+
+
+def test_hung_probe_does_not_block_free_workers(tmp_path):
+    HangingProbeMultiConfig.hanging_databases = {"hang"}
+    config = HangingProbeMultiConfig(
+        _storage_only_config(tmp_path, ["hang", "a", "b"]),
+        discovery_workers=2,
+        discovery_probe_timeout_s=0.5,
+        lazy_storage_discovery=True,
+    )
+    _discover_with_deadline(config)
+
+    assert [engurl.database for engurl in config.problematic_storage_engurls] == ["hang"]
+    assert sorted(config.storage_uuid_map_engurl.keys()) == ["uuid-a", "uuid-b"]
+
+
+def test_overall_timeout_abandons_outstanding_probes(tmp_path):
+    HangingProbeMultiConfig.hanging_databases = {"hang", "a"}
+    config = HangingProbeMultiConfig(
+        _storage_only_config(tmp_path, ["hang", "a", "b"]),
+        discovery_workers=2,
+        discovery_timeout_s=0.5,
+        lazy_storage_discovery=True,
+    )
+    _discover_with_deadline(config)
+
+    assert sorted(engurl.database for engurl in config.problematic_storage_engurls) == ["a", "b", "hang"]
+
+
+class CountingProbeMultiConfig(CosmicDB_EngineMultiConfig):
+    """Counts the probes of the Storage databases."""
+    probed_databases = []
+
+    def _probe_storage_fs_uuid(self, engurl):
+        self.probed_databases.append(engurl.database)
+        return f"uuid-{engurl.database}"
+
+
+def test_lazy_discovery_probes_only_as_needed(tmp_path):
+    CountingProbeMultiConfig.probed_databases = []
+    config = CountingProbeMultiConfig(
+        _storage_only_config(tmp_path, ["a", "b", "c"]),
+        lazy_storage_discovery=True,
+    )
+    assert CountingProbeMultiConfig.probed_databases == []
+
+    assert config.get_dbengine_url(entities.DatabaseScope.Storage, "uuid-a").database == "a"
+    assert CountingProbeMultiConfig.probed_databases == ["a"]
+
+    assert sorted(config.storage_uuid_map_engurl.keys()) == ["uuid-a", "uuid-b", "uuid-c"]
+    assert sorted(CountingProbeMultiConfig.probed_databases) == ["a", "b", "c"]
+
+
+
+def test_discovery_cache_skips_probes(tmp_path):
+    CountingProbeMultiConfig.probed_databases = []
+    config_filepath = _storage_only_config(tmp_path, ["a", "b"])
+    cache_dirpath = str(tmp_path / "cache")
+    for discovery_cache_ttl_s, probe_count in [(86400, 2), (86400, 2), (0, 4)]:
+        config = CountingProbeMultiConfig(config_filepath, discovery_cache_dirpath=cache_dirpath, discovery_cache_ttl_s=discovery_cache_ttl_s)
+        assert sorted(config.storage_uuid_map_engurl.keys()) == ["uuid-a", "uuid-b"]
+        assert len(CountingProbeMultiConfig.probed_databases) == probe_count
+
+class SlowProbeMultiConfig(CosmicDB_EngineMultiConfig):
+    def _probe_storage_fs_uuid(self, engurl):
+        time.sleep(0.05)
+        return f"uuid-{engurl.database}"
+
+
+def test_lazy_discovery_resolves_concurrently(tmp_path):
+    databases = ["a", "b", "c", "d"]
+    config = SlowProbeMultiConfig(
+        _storage_only_config(tmp_path, databases),
+        lazy_storage_discovery=True,
+    )
+    # each worker needs a database that the others may be probing
+    results = list(config.fanout_storage(
+        lambda fs_uuid, engine: engine.engine.url.database,
+        workers=len(databases),
+        fs_uuids=[f"uuid-{database}" for database in reversed(databases)]
+    ))
+    assert [err for fs_uuid, database, err in results] == [None]*len(databases)
+    assert sorted(database for fs_uuid, database, err in results) == databases
+    assert config.problematic_storage_engurls == []
@@ -0,0 +1,43 @@
+from cosmic_database import engine as cosmicdb_engine
+from cosmic_database import entities
+
+
+def test_engine_registry_shares_engines(engine_multi_config, engine_registry):
+    assert engine_multi_config.get_storage_dbengine("uuid1") is engine_multi_config.get_storage_dbengine(label="label1")
+    assert engine_multi_config.get_operation_dbengine() is engine_multi_config.get_operation_dbengine()
+    assert engine_multi_config.get_operation_dbengine(pool_recycle=60) is not engine_multi_config.get_operation_dbengine()
+
+    engine_count = len(engine_registry)
+    engine_registry.dispose(scope=entities.DatabaseScope.Operation)
+    assert len(engine_registry) == engine_count - 2
+    engine_registry.dispose()
+    assert len(engine_registry) == 0
+
+
+def test_statement_cache():
+    cache = cosmicdb_engine.CosmicDB_StatementCache(maxsize=2)
+    built = []
+    def build(value):
+        built.append(value)
+        return value
+
+    assert cache.get(("kind", 1), lambda: build(1)) == 1
+    assert cache.get(("kind", 1), lambda: build(-1)) == 1
+    assert cache.get(("kind", 2), lambda: build(2)) == 2
+    assert cache.get(("other", 3), lambda: build(3)) == 3
+    # the least recently used is evicted
+    assert cache.get(("kind", 1), lambda: build(1)) == 1
+    assert built == [1, 2, 3, 1]
+    assert cache.statistics() == {"size": 2, "kind": {"hits": 1, "misses": 3}, "other": {"hits": 0, "misses": 1}}
+
+
+def test_select_entity_reuses_statements(operation_engine):
+    operation_engine.commit_entities([
+        entities.CosmicDB_Filesystem(uuid=f"uuid{i}", label=f"label{i}")
+        for i in range(3)
+    ])
+    hits_before = cosmicdb_engine.STATEMENT_CACHE.statistics().get("select_entity", {"hits": 0})["hits"]
+    for i in range(3):
+        assert operation_engine.select_entity(entities.CosmicDB_Filesystem, uuid=f"uuid{i}").label == f"label{i}"
+    assert operation_engine.select_entity(entities.CosmicDB_Filesystem, uuid="missing") is None
+    assert cosmicdb_engine.STATEMENT_CACHE.statistics()["select_entity"]["hits"] >= hits_before + 3
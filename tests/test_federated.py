@@ -0,0 +1,65 @@
+from datetime import datetime
+
+import pytest
+import sqlalchemy
+
+from cosmic_database import entities
+from cosmic_database import federation
+
+
+@pytest.fixture
+def engine_multi_config(engine_multi_config, new_observation_hit):
+    # (observation_id, enumeration, source) of the beams
+    engine_multi_config.get_operation_dbengine().bulk_insert(entities.CosmicDB_ObservationBeam, [
+        {
+            "observation_id": observation_id,
+            "enumeration": enumeration,
+            "ra_radians": 0.0,
+            "dec_radians": 0.0,
+            "source": source,
+            "start": datetime(2024, 1, 1),
+            "end": datetime(2024, 1, 2),
+        }
+        for observation_id, enumeration, source in [(1, 0, "A"), (1, 1, "B"), (2, 0, "A"), (3, 0, "A")]
+    ])
+    # (observation_id, signal_beam, file_local_enumeration) of the hits
+    for fs_uuid, hits in {"uuid0": [(1, 0, 0), (1, 1, 1), (2, 1, 2)], "uuid1": [(2, 0, 3), (2, 0, 4), (4, 0, 5)]}.items():
+        engine_multi_config.get_storage_dbengine(fs_uuid).bulk_insert(entities.CosmicDB_ObservationHit, [
+            new_observation_hit(observation_id=observation_id, signal_beam=signal_beam, file_local_enumeration=enumeration)
+            for observation_id, signal_beam, enumeration in hits
+        ])
+    return engine_multi_config
+
+
+def test_scope_bridges_through_foreign_keys():
+    beam, hit = entities.CosmicDB_ObservationBeam, entities.CosmicDB_ObservationHit
+    bridges = federation.scope_bridges(sqlalchemy.select(beam.source), sqlalchemy.select(hit.id))
+    assert {
+        (operation_column.table.name, operation_column.name, storage_column.name)
+        for operation_column, storage_column in bridges
+    } == {
+        (beam.__table__.name, "observation_id", "observation_id"),
+        (beam.__table__.name, "enumeration", "signal_beam"),
+    }
+    assert federation.scope_bridges(sqlalchemy.select(entities.CosmicDB_Dataset.id), sqlalchemy.select(hit.id)) == []
+
+
+@pytest.mark.parametrize("key_chunk_size", [1, 1000])
+def test_select_federated_joins_across_scopes(engine_multi_config, key_chunk_size):
+    beam, hit = entities.CosmicDB_ObservationBeam, entities.CosmicDB_ObservationHit
+    joined = engine_multi_config.select_federated(
+        sqlalchemy.select(beam.source, beam.observation_id).where(beam.source == "A"),
+        sqlalchemy.select(hit.file_local_enumeration),
+        key_chunk_size=key_chunk_size
+    )
+    assert sorted((fs_uuid, tuple(operation_row), tuple(storage_row)) for fs_uuid, operation_row, storage_row in joined) == [
+        ("uuid0", ("A", 1), (0,)),
+        ("uuid1", ("A", 2), (3,)),
+        ("uuid1", ("A", 2), (4,)),
+    ]
+
+    with pytest.raises(ValueError):
+        list(engine_multi_config.select_federated(
+            sqlalchemy.select(entities.CosmicDB_Dataset.id),
+            sqlalchemy.select(hit.id)
+        ))
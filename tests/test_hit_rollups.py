@@ -0,0 +1,46 @@
+import math
+
+import sqlalchemy
+
+from cosmic_database import entities
+from cosmic_database import rollups
+
+
+def _nearest_rank(values, percentile):
+    values = sorted(values)
+    return values[max(1, math.ceil(percentile/100*len(values))) - 1]
+
+
+def test_rollups_update_incrementally(storage_engine, new_observation_hit):
+    # the highest SNR, the p99, is below the centre of its (logarithmic) bin
+    snrs = [5.0 + i*4.5 for i in range(20)] + [96.565]
+
+    def insert_hits(hit_snrs):
+        storage_engine.bulk_insert(entities.CosmicDB_ObservationHit, [
+            new_observation_hit(signal_snr=snr, signal_frequency=1000.0 + snr)
+            for snr in hit_snrs
+        ])
+
+    insert_hits(snrs[:10])
+    assert storage_engine.update_hit_rollups() == 10
+    insert_hits(snrs[10:])
+    assert storage_engine.update_hit_rollups() == len(snrs) - 10
+    assert storage_engine.update_hit_rollups() == 0
+
+    with storage_engine.session() as session:
+        rollup = session.scalars(sqlalchemy.select(entities.CosmicDB_HitRollup)).one()
+    assert rollup.hit_count == len(snrs)
+    assert rollup.signal_snr_min == min(snrs)
+    assert rollup.signal_snr_max == max(snrs)
+    assert rollup.signal_frequency_max == 1000.0 + max(snrs)
+    for percentile in rollups.HIT_ROLLUP_PERCENTILES:
+        snr_percentile = getattr(rollup, f"signal_snr_p{percentile}")
+        assert rollup.signal_snr_min <= snr_percentile <= rollup.signal_snr_max
+        # to within a bin
+        assert abs(math.log10(snr_percentile) - math.log10(_nearest_rank(snrs, percentile))) <= entities.HIT_ROLLUP_SNR_BIN_WIDTH
+
+    # rebuilding gives the same statistics
+    assert storage_engine.update_hit_rollups(observation_ids=[0]) == len(snrs)
+    with storage_engine.session() as session:
+        rebuilt_rollup = session.scalars(sqlalchemy.select(entities.CosmicDB_HitRollup)).one()
+    assert rebuilt_rollup.signal_snr_p99 == rollup.signal_snr_p99 == max(snrs)
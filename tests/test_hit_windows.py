@@ -0,0 +1,75 @@
+import sys
+
+import pytest
+import sqlalchemy
+
+from cosmic_database import engine as cosmicdb_engine
+from cosmic_database import entities
+
+WINDOWS = [
+    (1000.0, 1004.0),
+    (1003.0, 1006.0, 0.0, None),
+    (None, 1001.0, None, -2.0),
+    (2000.0, 3000.0),
+]
+# the `file_local_enumeration`s of the hits within each window
+WINDOW_ENUMERATIONS = [[0, 1, 2, 3, 4], [3, 4], [0], []]
+
+
+@pytest.fixture
+def hits_engine(storage_engine, new_observation_hit):
+    # frequencies 1000..1009 MHz, drift rates -2..2
+    storage_engine.bulk_insert(entities.CosmicDB_ObservationHit, [
+        new_observation_hit(file_local_enumeration=i, signal_frequency=1000.0 + i, signal_drift_rate=float(i % 5 - 2))
+        for i in range(10)
+    ])
+    return storage_engine
+
+
+@pytest.mark.parametrize("window_chunk_size", [1, 100])
+def test_hit_windows(hits_engine, window_chunk_size):
+    counts = hits_engine.count_hit_windows(WINDOWS, window_chunk_size=window_chunk_size)
+    assert counts == [len(enumerations) for enumerations in WINDOW_ENUMERATIONS]
+    counts = hits_engine.count_hit_windows(
+        WINDOWS,
+        criteria=[entities.CosmicDB_ObservationHit.file_local_enumeration != 4],
+        window_chunk_size=window_chunk_size
+    )
+    assert counts == [4, 1, 1, 0]
+
+    window_hits = hits_engine.select_hit_windows(WINDOWS, columns=["file_local_enumeration"], window_chunk_size=window_chunk_size)
+    assert [sorted(hits["file_local_enumeration"].tolist()) for hits in window_hits] == WINDOW_ENUMERATIONS
+
+    with pytest.raises(ValueError):
+        hits_engine.count_hit_windows([(1001.0, 1000.0)])
+
+
+def test_cli_hit_windows_counts_across_storage(engine_multi_config, multiconfig_filepath, new_observation_hit, monkeypatch, capsys):
+    for fs_index in range(3):
+        engine_multi_config.get_storage_dbengine(f"uuid{fs_index}").bulk_insert(
+            entities.CosmicDB_ObservationHit,
+            [new_observation_hit(signal_frequency=1000.0 + fs_index)]
+        )
+    monkeypatch.setattr(sys, "argv", [
+        "cosmicdb_hit_windows", "--engine-configuration", multiconfig_filepath, "--no-discovery-cache",
+        "-W", "999.5", "1001.5"
+    ])
+    cosmicdb_engine.cli_hit_windows()
+    assert "2 hit(s)" in capsys.readouterr().out
+
+
+def test_window_index_is_created_only_on_request(storage_engine):
+    window_index_name = next(
+        index.name
+        for index in entities.CosmicDB_ObservationHit.__table__.indexes
+        if [col.name for col in index.columns] == ["signal_frequency", "signal_drift_rate"]
+    )
+    with storage_engine.engine.begin() as conn:
+        conn.exec_driver_sql(f"DROP INDEX {window_index_name}")
+
+    storage_engine.create_all_tables()
+    inspector = sqlalchemy.inspect(storage_engine.engine)
+    assert window_index_name not in {index["name"] for index in inspector.get_indexes(entities.CosmicDB_ObservationHit.__tablename__)}
+
+    assert storage_engine.create_missing_indexes() == [window_index_name]
+    assert storage_engine.create_missing_indexes() == []
@@ -0,0 +1,95 @@
+import csv
+
+import pytest
+import sqlalchemy
+
+from cosmic_database import engine as cosmicdb_engine
+from cosmic_database import entities
+from cosmic_database import value_tables
+
+
+@pytest.fixture
+def storage_engine(storage_engine):
+    storage_engine.bulk_insert(entities.CosmicDB_ObservationKey, [
+        {"observation_id": observation_id, "scan_id": f"scan{observation_id % 7}", "configuration_id": observation_id % 3}
+        for observation_id in range(200)
+    ])
+    return storage_engine
+
+
+def _count(engine, criterion) -> int:
+    with engine.engine.connect() as conn:
+        return conn.execute(
+            sqlalchemy.select(sqlalchemy.func.count()).select_from(entities.CosmicDB_ObservationKey).where(criterion)
+        ).scalar()
+
+
+def _temporary_tables(engine) -> list:
+    with engine.engine.connect() as conn:
+        return conn.exec_driver_sql("SELECT name FROM sqlite_temp_master WHERE type = 'table'").scalars().all()
+
+
+def test_in_values_temporary_table_matches_in_list(storage_engine):
+    key_column = entities.CosmicDB_ObservationKey.observation_id
+    values = list(range(0, 400, 3)) + [None, 0]
+
+    in_list = value_tables.in_values(key_column, values, threshold=len(values))
+    semi_join = value_tables.in_values(key_column, values, threshold=10)
+    assert isinstance(in_list.right, sqlalchemy.BindParameter)
+    assert not isinstance(semi_join.right, sqlalchemy.BindParameter)
+
+    assert _count(storage_engine, in_list) == _count(storage_engine, semi_join) == 67
+    assert _count(storage_engine, sqlalchemy.not_(semi_join)) == 200 - 67
+    # the temporary table is dropped as the connection returns to the pool
+    assert _temporary_tables(storage_engine) == []
+
+
+def test_in_values_repopulates_after_rollback(storage_engine):
+    criterion = value_tables.in_values(entities.CosmicDB_ObservationKey.observation_id, range(50), threshold=10)
+    statement = sqlalchemy.select(sqlalchemy.func.count()).select_from(entities.CosmicDB_ObservationKey).where(criterion)
+    with storage_engine.engine.connect() as conn:
+        assert conn.execute(statement).scalar() == 50
+        conn.rollback()
+        assert conn.execute(statement).scalar() == 50
+
+
+def test_in_values_composite(storage_engine):
+    criterion = value_tables.in_values(
+        [entities.CosmicDB_ObservationKey.scan_id, entities.CosmicDB_ObservationKey.configuration_id],
+        [("scan0", 0), ("scan1", 1), ("scan0", 0), ("scan9", 0)],
+        threshold=1
+    )
+    # observation_id % 21 == 0 or observation_id % 21 == 1
+    assert _count(storage_engine, criterion) == 20
+
+
+def test_select_entities_beyond_threshold(storage_engine, monkeypatch):
+    monkeypatch.setattr(value_tables, "IN_VALUES_TEMPORARY_TABLE_THRESHOLD", 10)
+    entity_map, missing_keys = storage_engine.select_entities(entities.CosmicDB_ObservationKey, list(range(150, 250)))
+    assert sorted(entity_map.keys()) == list(range(150, 200))
+    assert missing_keys == list(range(200, 250))
+
+
+def test_in_csv_streams_column(storage_engine, tmp_path, monkeypatch):
+    monkeypatch.setattr(value_tables, "IN_VALUES_TEMPORARY_TABLE_THRESHOLD", 10)
+    csv_filepath = tmp_path / "ids.csv"
+    with open(csv_filepath, "w", newline="") as csv_fio:
+        csv_writer = csv.writer(csv_fio)
+        csv_writer.writerow(["other", "observation_id"])
+        for observation_id in range(100, 300):
+            csv_writer.writerow(["x", observation_id])
+        csv_writer.writerow(["x", ""])
+
+    criterion = cosmicdb_engine.cli_parse_where_criterion(
+        entities.CosmicDB_ObservationKey.__table__.c.observation_id,
+        "in_csv",
+        f"{csv_filepath}:observation_id"
+    )
+    assert _count(storage_engine, criterion) == 100
+
+    with pytest.raises(KeyError):
+        cosmicdb_engine.cli_parse_where_criterion(
+            entities.CosmicDB_ObservationKey.__table__.c.observation_id,
+            "in_csv",
+            f"{csv_filepath}:missing"
+        )
@@ -0,0 +1,117 @@
+import sys
+
+import pytest
+
+from cosmic_database import engine as cosmicdb_engine
+from cosmic_database import entities
+
+
+def _run_cli(monkeypatch, cli_function, multiconfig_filepath, *args):
+    monkeypatch.setattr(sys, "argv", ["cosmicdb", "--engine-configuration", multiconfig_filepath, "--no-discovery-cache", *args])
+    cli_function()
+
+
+@pytest.fixture
+def engine_multi_config(engine_multi_config):
+    for fs_index in range(3):
+        engine_multi_config.get_storage_dbengine(f"uuid{fs_index}").commit_entities([
+            entities.CosmicDB_ObservationKey(observation_id=fs_index*10 + i, scan_id=f"uuid{fs_index}.{i}", configuration_id=i)
+            for i in range(3)
+        ])
+    return engine_multi_config
+
+
+def _add_observation_hits(engine_multi_config, new_observation_hit):
+    for fs_index in range(3):
+        engine_multi_config.get_storage_dbengine(f"uuid{fs_index}").bulk_insert(entities.CosmicDB_ObservationHit, [
+            new_observation_hit(file_local_enumeration=i, signal_snr=10.0*i + fs_index)
+            for i in range(3)
+        ])
+
+
+def test_inspect_fanout_prints_each_database(engine_multi_config, multiconfig_filepath, monkeypatch, capsys):
+    _run_cli(monkeypatch, cosmicdb_engine.cli_inspect, multiconfig_filepath, "ObservationKey")
+    lines = capsys.readouterr().out.splitlines()
+    for label_index in range(3):
+        assert sum(f"(label = 'label{label_index}')" in line for line in lines) == 1
+        assert sum(line.startswith(f"[label{label_index}] #") for line in lines) == 3
+
+    _run_cli(
+        monkeypatch, cosmicdb_engine.cli_inspect, multiconfig_filepath,
+        "ObservationKey", "-s", "observation_id", "--pandas-chunksize", "1"
+    )
+    lines = capsys.readouterr().out.splitlines()
+    for label_index in range(3):
+        assert sum(line.startswith(f"[label{label_index}] dataframe #") for line in lines) == 3
+
+
+def test_inspect_streaming_expunges_eagerly_loaded_relationships(engine_multi_config, monkeypatch):
+    results = []
+    result_str = cosmicdb_engine._result_str
+    def recorded_result_str(result, verbosity):
+        # by now, the previous batch and its eagerly loaded mounts are detached
+        for previous_result in results:
+            assert cosmicdb_engine.sqlalchemy.inspect(previous_result).detached
+            for mount in previous_result.mount_history:
+                assert cosmicdb_engine.sqlalchemy.inspect(mount).detached
+        results.append(result)
+        return result_str(result, verbosity)
+    monkeypatch.setattr(cosmicdb_engine, "_result_str", recorded_result_str)
+
+    cosmicdb_engine._inspect_scalars(
+        cosmicdb_engine.sqlalchemy.select(entities.CosmicDB_Filesystem),
+        engine_multi_config.get_operation_dbengine(),
+        verbosity = 2,
+        print_fn = lambda line: None,
+        stream_batch_size = 1
+    )
+    assert len(results) == 3
+    assert all(len(result.mount_history) == 1 for result in results)
+
+
+def test_inspect_global_order(engine_multi_config, multiconfig_filepath, new_observation_hit, monkeypatch, capsys):
+    _add_observation_hits(engine_multi_config, new_observation_hit)
+    _run_cli(
+        monkeypatch, cosmicdb_engine.cli_inspect, multiconfig_filepath,
+        "ObservationHit", "-g", "-o", "signal_snr", "desc", "-l", "4"
+    )
+    lines = capsys.readouterr().out.splitlines()
+    assert [line.split(" ")[1] for line in lines] == ["[label2]", "[label1]", "[label0]", "[label2]"]
+
+
+def test_inspect_eagerly_loads_rendered_relationships(engine_multi_config):
+    operation_engine = engine_multi_config.get_operation_dbengine()
+    statements = []
+    def record_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    cosmicdb_engine.sqlalchemy.event.listen(operation_engine.engine, "before_cursor_execute", record_statement)
+    lines = []
+    cosmicdb_engine._inspect_scalars(
+        cosmicdb_engine.sqlalchemy.select(entities.CosmicDB_Filesystem),
+        operation_engine,
+        verbosity = 2,
+        print_fn = lines.append
+    )
+    cosmicdb_engine.sqlalchemy.event.remove(operation_engine.engine, "before_cursor_execute", record_statement)
+    assert len(lines) == 3
+    # the filesystems, then the mounts, and observations, of all of them at once
+    assert len(statements) == 3
+
+
+def test_inspect_parquet_output(engine_multi_config, multiconfig_filepath, new_observation_hit, monkeypatch, tmp_path):
+    import pandas
+    import pyarrow.parquet
+
+    _add_observation_hits(engine_multi_config, new_observation_hit)
+    output_filepath = str(tmp_path / "hits.parquet")
+    _run_cli(
+        monkeypatch, cosmicdb_engine.cli_inspect, multiconfig_filepath,
+        "ObservationHit", "-s", "signal_snr", "-s", "signal_incoherent_power",
+        "--pandas-output-filepath", output_filepath, "--partitioned-output"
+    )
+    df = pandas.read_parquet(output_filepath)
+    assert sorted(df["signal_snr"].tolist()) == sorted(10.0*i + fs_index for i in range(3) for fs_index in range(3))
+    assert sorted(df["storage_fslabel"].astype(str).unique().tolist()) == ["label0", "label1", "label2"]
+    # the all-NULL column is typed from the database column, not inferred as null
+    schema = pyarrow.parquet.read_schema(f"{output_filepath}/storage_fslabel=label0/part-0.parquet")
+    assert schema.field("signal_incoherent_power").type == "double"
@@ -0,0 +1,108 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from cosmic_database import entities
+from cosmic_database.intervals import CosmicDB_IntervalIndex, MJD_UNIX_EPOCH
+
+EPOCH = datetime(2024, 1, 1)
+# (start, end) minutes of observations, overlapping and nested
+OBSERVATION_MINUTES = [(0, 10), (5, 8), (6, 30), (12, 14), (40, 50)]
+
+
+def _add_observations(engine, id_minutes):
+    engine.bulk_insert(entities.CosmicDB_Observation, [
+        {
+            "id": observation_id,
+            "scan_id": "scan",
+            "configuration_id": 0,
+            "archival_filesystem_uuid": "uuid0",
+            "start": EPOCH + timedelta(minutes=start),
+            "end": EPOCH + timedelta(minutes=end),
+            "criteria_json": "{}",
+            "validity_code": 0,
+        }
+        for observation_id, (start, end) in id_minutes
+    ])
+
+
+@pytest.fixture
+def operation_engine(operation_engine):
+    _add_observations(operation_engine, enumerate(OBSERVATION_MINUTES))
+    return operation_engine
+
+
+def _containing(minute):
+    return [
+        observation_id
+        for observation_id, (start, end) in enumerate(OBSERVATION_MINUTES)
+        if start <= minute < end
+    ]
+
+
+QUERY_MINUTES = [-1, 0, 5.5, 7, 9.99, 10, 13, 31, 45, 60]
+
+
+def test_locate_and_stab(operation_engine):
+    index = CosmicDB_IntervalIndex(operation_engine, entities.CosmicDB_Observation)
+    assert len(index) == len(OBSERVATION_MINUTES)
+    times = [EPOCH + timedelta(minutes=minute) for minute in QUERY_MINUTES]
+
+    positions = index.locate(times)
+    for minute, position in zip(QUERY_MINUTES, positions.tolist()):
+        containing = _containing(minute)
+        if len(containing) == 0:
+            assert position == -1
+        else:
+            # the latest-starting
+            assert index.keys[position] == max(containing, key=lambda observation_id: OBSERVATION_MINUTES[observation_id][0])
+
+    time_positions, interval_positions = index.stab(times)
+    stabbed = {}
+    for time_position, interval_position in zip(time_positions.tolist(), interval_positions.tolist()):
+        stabbed.setdefault(QUERY_MINUTES[time_position], []).append(int(index.keys[interval_position]))
+    assert stabbed == {
+        minute: sorted(_containing(minute))
+        for minute in QUERY_MINUTES
+        if len(_containing(minute)) > 0
+    }
+
+
+def test_time_formats(operation_engine):
+    index = CosmicDB_IntervalIndex(operation_engine, entities.CosmicDB_Observation)
+    unix = (EPOCH - datetime(1970, 1, 1)).total_seconds() + 13*60
+    assert index.keys[index.locate([unix], "unix")].tolist() == [3]
+    assert index.keys[index.locate([MJD_UNIX_EPOCH + unix/86400], "mjd")].tolist() == [3]
+    with pytest.raises(ValueError):
+        index.locate([unix], "jd")
+
+
+def test_overlapping(operation_engine):
+    index = CosmicDB_IntervalIndex(operation_engine, entities.CosmicDB_Observation)
+    query_positions, interval_positions = index.overlapping(
+        [EPOCH + timedelta(minutes=9), EPOCH + timedelta(minutes=30)],
+        [EPOCH + timedelta(minutes=12), EPOCH + timedelta(minutes=40)],
+    )
+    overlaps = sorted(zip(query_positions.tolist(), index.keys[interval_positions].tolist()))
+    # [start, end) intervals: [12, 14) does not overlap [9, 12), nor [40, 50) [30, 40)
+    assert overlaps == [(0, 0), (0, 2)]
+
+
+def test_refresh_and_open_scans(operation_engine):
+    index = CosmicDB_IntervalIndex(operation_engine, entities.CosmicDB_Observation)
+    _add_observations(operation_engine, [(10, (50, 55)), (11, (60, 61))])
+    assert index.refresh() == 3
+    assert len(index) == len(OBSERVATION_MINUTES) + 2
+    assert index.keys[index.locate([EPOCH + timedelta(minutes=60.5)])].tolist() == [11]
+
+    operation_engine.bulk_insert(entities.CosmicDB_Scan, [
+        {"id": f"scan{minute}", "dataset_id": "dataset", "start": EPOCH + timedelta(minutes=minute), "metadata_json": "{}"}
+        for minute in [0, 10]
+    ])
+    scans = CosmicDB_IntervalIndex(operation_engine, entities.CosmicDB_Scan)
+    # a scan ends at the next's start, the latest is open
+    assert scans.keys[scans.locate([EPOCH + timedelta(minutes=minute) for minute in [5, 10, 1000]])].tolist() == ["scan0", "scan10", "scan10"]
+    assert (scans.locate([EPOCH - timedelta(minutes=1)]) == -1).all()
+
+    with pytest.raises(ValueError):
+        CosmicDB_IntervalIndex(operation_engine, entities.CosmicDB_ObservationKey)
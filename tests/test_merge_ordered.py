@@ -0,0 +1,46 @@
+import pytest
+import sqlalchemy
+
+from cosmic_database import entities
+
+# interleaved powers, and a NULL power, across the Storage databases
+POWERS_PER_FS = {
+    "uuid0": [1.0, 4.0, None],
+    "uuid1": [2.0, None, 6.0],
+    "uuid2": [3.0, 5.0],
+}
+
+
+@pytest.fixture
+def engine_multi_config(engine_multi_config, new_observation_hit):
+    for fs_uuid, powers in POWERS_PER_FS.items():
+        engine_multi_config.get_storage_dbengine(fs_uuid).bulk_insert(entities.CosmicDB_ObservationHit, [
+            new_observation_hit(signal_incoherent_power=power, file_local_enumeration=enum)
+            for enum, power in enumerate(powers)
+        ])
+    return engine_multi_config
+
+
+def test_merge_orders_globally(engine_multi_config):
+    power = entities.CosmicDB_ObservationHit.signal_incoherent_power
+
+    merged = engine_multi_config.merge_ordered_storage(sqlalchemy.select(power), power, orm=False, batch_size=1)
+    # NULLs order first ascending
+    assert [row[0] for _, row in merged] == [None, None, 1.0, 2.0, 3.0, 4.0, 5.0, 6.0]
+
+    merged = engine_multi_config.merge_ordered_storage(sqlalchemy.select(power), power, descending=True, orm=False)
+    # and last descending
+    assert [row[0] for _, row in merged] == [6.0, 5.0, 4.0, 3.0, 2.0, 1.0, None, None]
+
+
+def test_merge_stops_at_limit(engine_multi_config):
+    power = entities.CosmicDB_ObservationHit.signal_incoherent_power
+
+    merged = list(engine_multi_config.merge_ordered_storage(
+        sqlalchemy.select(entities.CosmicDB_ObservationHit).where(power.is_not(None)),
+        power,
+        descending=True,
+        limit=3,
+        row_transform=lambda row: row[0].signal_incoherent_power
+    ))
+    assert merged == [("uuid1", 6.0), ("uuid2", 5.0), ("uuid0", 4.0)]
@@ -0,0 +1,63 @@
+from datetime import datetime
+
+import pytest
+
+from cosmic_database import entities
+
+
+def _subband_values(subband_offset) -> dict:
+    return {
+        "percentage_recorded": 100.0,
+        "successful_participation": True,
+        "node_uri": f"node{subband_offset}",
+        "subband_length": 16,
+        "subband_frequency_lower_MHz": 1000.0 + subband_offset,
+        "subband_bandwidth_MHz": 1.0,
+    }
+
+
+def test_select_entities_by_composite_key(operation_engine):
+    operation_engine.commit_entities([
+        entities.CosmicDB_ObservationSubband(observation_id=1, tuning=tuning, subband_offset=offset, **_subband_values(offset))
+        for tuning in ["AC", "BD"]
+        for offset in range(3)
+    ])
+    keys = [(1, "AC", 0), [1, "BD", 2], (1, "AC", 0), (2, "AC", 0)]
+    entity_map, missing_keys = operation_engine.select_entities(entities.CosmicDB_ObservationSubband, keys, chunk_size=1)
+    assert sorted(entity_map.keys()) == [(1, "AC", 0), (1, "BD", 2)]
+    assert entity_map[(1, "BD", 2)].node_uri == "node2"
+    assert missing_keys == [(2, "AC", 0)]
+
+    # the missing subband's non-key columns are required
+    with pytest.raises(ValueError):
+        operation_engine.select_entities(entities.CosmicDB_ObservationSubband, keys, create_missing_entities=True)
+    entity_map, missing_keys = operation_engine.select_entities(
+        entities.CosmicDB_ObservationSubband,
+        keys,
+        create_missing_entities=True,
+        missing_entity_values=lambda key: _subband_values(key[2])
+    )
+    assert missing_keys == [(2, "AC", 0)]
+    assert len(entity_map) == 3
+    assert entity_map[(2, "AC", 0)].subband_frequency_lower_MHz == 1000.0
+
+
+def test_select_entities_creates_missing(operation_engine, storage_engine):
+    entity_map, missing_keys = operation_engine.select_entities(
+        entities.CosmicDB_Scan,
+        ["scan0", "scan1"],
+        create_missing_entities=True,
+        missing_entity_values={"dataset_id": "dataset", "start": datetime(2024, 1, 1), "metadata_json": "{}"}
+    )
+    assert missing_keys == ["scan0", "scan1"]
+    assert entity_map["scan1"].dataset_id == "dataset"
+
+    storage_engine.commit_entity(entities.CosmicDB_ObservationKey(observation_id=0, scan_id="scan0", configuration_id=0))
+    entity_map, missing_keys = storage_engine.select_entities(
+        entities.CosmicDB_ObservationKey,
+        [0, 1],
+        create_missing_entities=True,
+        missing_entity_values=lambda observation_id: {"scan_id": f"scan{observation_id}", "configuration_id": 0}
+    )
+    assert missing_keys == [1]
+    assert [entity_map[observation_id].scan_id for observation_id in [0, 1]] == ["scan0", "scan1"]
@@ -0,0 +1,125 @@
+import math
+from datetime import datetime
+
+import numpy
+import pytest
+import sqlalchemy
+
+from cosmic_database import entities
+from cosmic_database import sky
+
+
+def test_sky_pixels_are_consistent():
+    ra = numpy.linspace(0, 2*math.pi, 37)[:-1]
+    dec = numpy.linspace(-math.pi/2, math.pi/2, 19)
+    ra, dec = [grid.ravel() for grid in numpy.meshgrid(ra, dec)]
+    pixels = sky.sky_pixels(ra, dec)
+    assert pixels.tolist() == [sky.sky_pixel(ra_, dec_) for ra_, dec_ in zip(ra.tolist(), dec.tolist())]
+    assert ((0 <= pixels) & (pixels < sky.SKY_PIXEL_COUNT)).all()
+
+    # a pixel's centre is within it
+    ra_centres, dec_centres = sky.sky_pixel_centres(pixels)
+    assert sky.sky_pixels(ra_centres, dec_centres).tolist() == pixels.tolist()
+
+
+@pytest.mark.parametrize("ra_radians, dec_radians", [(1.0, 0.3), (0.0, -0.5), (2*math.pi - 1e-4, 1.5)])
+def test_cone_pixel_ranges_cover_the_cone(ra_radians, dec_radians):
+    radius = math.radians(0.5)
+    rng = numpy.random.default_rng(0)
+    # points within the cone, drawn about its centre
+    ra = ra_radians + rng.uniform(-1, 1, 1000)*radius/max(math.cos(dec_radians), 1e-2)
+    dec = numpy.clip(dec_radians + rng.uniform(-1, 1, 1000)*radius, -math.pi/2, math.pi/2)
+    within = sky.angular_separation(ra, dec, ra_radians, dec_radians) <= radius
+    pixels = sky.sky_pixels(numpy.mod(ra[within], 2*math.pi), dec[within])
+
+    ranges = sky.cone_sky_pixel_ranges(ra_radians, dec_radians, radius)
+    assert all(
+        any(first <= pixel <= last for first, last in ranges)
+        for pixel in pixels.tolist()
+    )
+
+
+def test_cone_search_hits(storage_engine, new_observation_hit):
+    hit = entities.CosmicDB_ObservationHit
+    # hits 0.1 degrees apart in declination, about RA 1 hour
+    storage_engine.bulk_insert(hit, [
+        new_observation_hit(file_local_enumeration=i, ra_hours=1.0, dec_degrees=10.0 + 0.1*i)
+        for i in range(-10, 11)
+    ])
+    hits, separations = storage_engine.cone_search(hit, math.radians(15.0), math.radians(10.0), math.radians(0.35), columns=["file_local_enumeration"])
+    assert sorted(hits["file_local_enumeration"].tolist()) == [-3, -2, -1, 0, 1, 2, 3]
+    assert numpy.allclose(separations, numpy.radians(0.1*numpy.abs(hits["file_local_enumeration"])))
+
+    with pytest.raises(ValueError):
+        storage_engine.cone_search(entities.CosmicDB_ObservationKey, 0.0, 0.0, 0.1)
+
+    # backfilling the pixels of rows without
+    with storage_engine.engine.begin() as conn:
+        conn.execute(sqlalchemy.update(hit.__table__).values(sky_pixel=None))
+    assert len(storage_engine.cone_search(hit, math.radians(15.0), math.radians(10.0), 1e-3)[0]) == 0
+    assert storage_engine.update_sky_pixels(hit, batch_size=8) == 21
+    assert storage_engine.update_sky_pixels(hit) == 0
+    assert len(storage_engine.cone_search(hit, math.radians(15.0), math.radians(10.0), 1e-3)[0]) == 1
+
+
+def test_entities_select_from_tables_without_sky_pixels(storage_engine, new_observation_hit):
+    hit = entities.CosmicDB_ObservationHit
+    storage_engine.bulk_insert(hit, [new_observation_hit(file_local_enumeration=i) for i in range(3)])
+    # as a table that predates the column
+    with storage_engine.engine.begin() as conn:
+        for index in hit.__table__.indexes:
+            if "sky_pixel" in index.columns:
+                conn.exec_driver_sql(f"DROP INDEX {index.name}")
+        conn.exec_driver_sql(f"ALTER TABLE {hit.__tablename__} DROP COLUMN sky_pixel")
+
+    with storage_engine.session() as session:
+        hits = session.scalars(sqlalchemy.select(hit).order_by(hit.id)).all()
+    assert [hit_.file_local_enumeration for hit_ in hits] == [0, 1, 2]
+    assert storage_engine.select_entity(hit, file_local_enumeration=1).id == 2
+
+
+def test_sky_coverage(operation_engine):
+    def add_observation(observation_id, start_minute, frequency_lower):
+        operation_engine.bulk_insert(entities.CosmicDB_ObservationBeam, [{
+            "observation_id": observation_id,
+            "enumeration": 0,
+            "ra_radians": 1.0,
+            "dec_radians": 0.5,
+            "source": "source",
+            "start": datetime(2024, 1, 1, 0, start_minute),
+            "end": datetime(2024, 1, 1, 0, start_minute + 5),
+        }])
+        operation_engine.bulk_insert(entities.CosmicDB_ObservationSubband, [
+            {
+                "observation_id": observation_id,
+                "tuning": "AC",
+                "subband_offset": subband_offset,
+                "percentage_recorded": 100.0,
+                "successful_participation": True,
+                "node_uri": "node",
+                "subband_length": 1,
+                "subband_frequency_lower_MHz": frequency_lower + subband_offset,
+                "subband_bandwidth_MHz": 1.0,
+            }
+            for subband_offset in range(2)
+        ])
+
+    add_observation(1, 0, 1000.0)
+    add_observation(2, 10, 1001.5)
+    assert operation_engine.update_sky_coverage() == 2
+    assert operation_engine.update_sky_coverage() == 0
+    add_observation(3, 20, 2000.0)
+    assert operation_engine.update_sky_coverage() == 1
+    assert operation_engine.update_sky_coverage(observation_ids=[3, 3]) == 1
+
+    coverage = operation_engine.select_sky_coverage(1.0, 0.5)
+    assert len(coverage) == 1
+    assert coverage[0]["sky_pixel"] == sky.sky_pixel(1.0, 0.5)
+    assert coverage[0]["exposure_s"] == 3*5*60
+    assert coverage[0]["frequency_ranges_MHz"] == [(1000.0, 1003.5), (2000.0, 2002.0)]
+    assert coverage[0]["observation_ids"] == [1, 2, 3]
+
+    assert operation_engine.select_sky_coverage(1.0, -0.5, radius_radians=0.01) == []
+    # a footprint covers the neighbouring pixels
+    assert operation_engine.update_sky_coverage(footprint_radius_radians=math.radians(0.2), observation_ids=[1]) == 1
+    assert len(operation_engine.select_sky_coverage(1.0, 0.5, radius_radians=math.radians(0.2))) > 1
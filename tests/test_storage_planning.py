@@ -0,0 +1,118 @@
+import numpy
+import sqlalchemy
+
+from cosmic_database import engine as cosmicdb_engine
+from cosmic_database import entities
+
+
+def _add_observation_keys(engine_multi_config, fs_uuid, observation_ids):
+    engine_multi_config.get_storage_dbengine(fs_uuid).commit_entities([
+        entities.CosmicDB_ObservationKey(observation_id=observation_id, scan_id=f"scan{observation_id}", configuration_id=0)
+        for observation_id in observation_ids
+    ])
+
+
+def _cached_multiconfig(multiconfig_filepath, engine_registry, tmp_path, **kwargs):
+    return cosmicdb_engine.CosmicDB_EngineMultiConfig(
+        multiconfig_filepath,
+        engine_registry=engine_registry,
+        discovery_cache_dirpath=str(tmp_path / "cache"),
+        **kwargs
+    )
+
+
+def test_manifests_prune_storage_databases(multiconfig_filepath, engine_registry, tmp_path):
+    engine_multi_config = _cached_multiconfig(multiconfig_filepath, engine_registry, tmp_path)
+    for fs_index in range(3):
+        _add_observation_keys(engine_multi_config, f"uuid{fs_index}", range(fs_index*10, fs_index*10 + 5))
+    observation_id = entities.CosmicDB_ObservationKey.observation_id
+
+    # the active Storage database, uuid0, is always planned
+    assert engine_multi_config.plan_storage_fs_uuids([observation_id == 21]) == ["uuid0", "uuid2"]
+    assert engine_multi_config.plan_storage_fs_uuids([observation_id.in_([11, 21])]) == ["uuid0", "uuid1", "uuid2"]
+    assert engine_multi_config.plan_storage_fs_uuids([entities.CosmicDB_ObservationKey.scan_id == "scan12"]) == ["uuid0", "uuid1"]
+    # values are normalised to the column's type before testing
+    assert engine_multi_config.plan_storage_fs_uuids([observation_id == 21.0]) == ["uuid0", "uuid2"]
+    assert engine_multi_config.plan_storage_fs_uuids([observation_id == numpy.int64(21)]) == ["uuid0", "uuid2"]
+
+
+def test_manifests_account_for_new_observations(multiconfig_filepath, engine_registry, tmp_path):
+    engine_multi_config = _cached_multiconfig(multiconfig_filepath, engine_registry, tmp_path, storage_manifest_ttl_s=0)
+    for fs_index in range(3):
+        _add_observation_keys(engine_multi_config, f"uuid{fs_index}", range(fs_index*10, fs_index*10 + 5))
+    observation_id = entities.CosmicDB_ObservationKey.observation_id
+    assert engine_multi_config.plan_storage_fs_uuids([observation_id == 15]) == ["uuid0"]
+
+    _add_observation_keys(engine_multi_config, "uuid1", [15])
+    assert engine_multi_config.plan_storage_fs_uuids([observation_id == 15]) == ["uuid0", "uuid1"]
+
+    # as do the manifests cached by another instance
+    engine_multi_config = _cached_multiconfig(multiconfig_filepath, engine_registry, tmp_path, storage_manifest_ttl_s=0)
+    _add_observation_keys(engine_multi_config, "uuid2", [16])
+    assert engine_multi_config.plan_storage_fs_uuids([observation_id == 16]) == ["uuid0", "uuid2"]
+
+
+
+def test_manifests_validate_only_ruled_out_databases(multiconfig_filepath, engine_registry, tmp_path):
+    engine_multi_config = _cached_multiconfig(multiconfig_filepath, engine_registry, tmp_path)
+    for fs_index in range(3):
+        _add_observation_keys(engine_multi_config, f"uuid{fs_index}", range(fs_index*10, fs_index*10 + 5))
+    observation_id = entities.CosmicDB_ObservationKey.observation_id
+    assert engine_multi_config.plan_storage_fs_uuids([observation_id == 21]) == ["uuid0", "uuid2"]
+
+    statement_counts = {}
+    for fs_index in range(3):
+        sqlalchemy.event.listen(
+            engine_multi_config.get_storage_dbengine(f"uuid{fs_index}").engine,
+            "before_cursor_execute",
+            lambda *args, fs_uuid=f"uuid{fs_index}": statement_counts.update({fs_uuid: statement_counts.get(fs_uuid, 0) + 1})
+        )
+    # the cached manifests are fresh
+    assert engine_multi_config.plan_storage_fs_uuids([observation_id == 21]) == ["uuid0", "uuid2"]
+    assert statement_counts == {}
+
+    # stale, only uuid1's manifest could change the plan
+    engine_multi_config.storage_manifest_ttl_s = 0
+    assert engine_multi_config.plan_storage_fs_uuids([observation_id == 21]) == ["uuid0", "uuid2"]
+    assert set(statement_counts.keys()) == {"uuid1"}
+
+
+def _add_hits(engine_multi_config, fs_uuid, new_observation_hit, hits: list):
+    storage_engine = engine_multi_config.get_storage_dbengine(fs_uuid)
+    with storage_engine.session() as session:
+        if session.get(entities.CosmicDB_File, 1) is None:
+            session.add(entities.CosmicDB_File(id=1, local_uri=f"/{fs_uuid}/file"))
+            session.flush()
+        session.execute(
+            sqlalchemy.insert(entities.CosmicDB_ObservationHit),
+            [new_observation_hit(**hit) for hit in hits]
+        )
+        session.commit()
+
+
+def test_hit_summaries_prune_only_when_opted_in(multiconfig_filepath, engine_registry, new_observation_hit):
+    engine_multi_config = cosmicdb_engine.CosmicDB_EngineMultiConfig(multiconfig_filepath, engine_registry=engine_registry)
+    for fs_index in range(3):
+        _add_observation_keys(engine_multi_config, f"uuid{fs_index}", [fs_index*10])
+        _add_hits(engine_multi_config, f"uuid{fs_index}", new_observation_hit, [
+            {"observation_id": fs_index*10, "tstart": 60000.0 + fs_index},
+        ])
+    # observation 25 has hits, but no ObservationKey
+    _add_hits(engine_multi_config, "uuid2", new_observation_hit, [{"observation_id": 25, "tstart": 60002.5}])
+
+    assert {
+        fs_uuid: summarised_count
+        for fs_uuid, summarised_count, err in engine_multi_config.sync_hit_summaries()
+        if err is None
+    } == {"uuid0": 1, "uuid1": 1, "uuid2": 2}
+
+    hit_table = entities.CosmicDB_ObservationHit.__table__
+    key_table = entities.CosmicDB_ObservationKey.__table__
+    plan = lambda criterion, **kwargs: engine_multi_config.plan_storage_fs_uuids([criterion], **kwargs)
+    assert plan(hit_table.c.observation_id == 20) == ["uuid0", "uuid1", "uuid2"]
+    assert plan(hit_table.c.observation_id == 20, use_hit_summaries=True) == ["uuid0", "uuid2"]
+    assert plan(hit_table.c.observation_id == 25, use_hit_summaries=True) == ["uuid0", "uuid2"]
+    assert plan(hit_table.c.tstart > 60001.5, use_hit_summaries=True) == ["uuid0", "uuid2"]
+    assert plan(key_table.c.scan_id == "scan10", use_hit_summaries=True) == ["uuid0", "uuid1"]
+    # a stamp's observation_id is not necessarily an ObservationKey's
+    assert plan(entities.CosmicDB_ObservationStamp.__table__.c.observation_id == 20, use_hit_summaries=True) == ["uuid0", "uuid1", "uuid2"]
@@ -0,0 +1,50 @@
+import pytest
+import sqlalchemy
+
+from cosmic_database import entities
+
+
+def _observation_keys(engine) -> dict:
+    with engine.session() as session:
+        return {
+            observation_key.observation_id: (observation_key.scan_id, observation_key.configuration_id)
+            for observation_key in session.scalars(sqlalchemy.select(entities.CosmicDB_ObservationKey))
+        }
+
+
+def test_upsert_on_primary_key(storage_engine):
+    assert storage_engine.upsert_entities([
+        entities.CosmicDB_ObservationKey(observation_id=i, scan_id=f"scan{i}", configuration_id=0)
+        for i in range(3)
+    ]) == (3, 0)
+    assert storage_engine.upsert_entities([
+        (entities.CosmicDB_ObservationKey, {"observation_id": 2, "scan_id": "scan2", "configuration_id": 1}),
+        (entities.CosmicDB_ObservationKey, {"observation_id": 3, "scan_id": "scan3", "configuration_id": 1}),
+        # the later of the same key wins
+        (entities.CosmicDB_ObservationKey, {"observation_id": 3, "scan_id": "scan3", "configuration_id": 2}),
+    ], field_update_filter=["configuration_id"]) == (1, 2)
+    assert _observation_keys(storage_engine) == {
+        0: ("scan0", 0),
+        1: ("scan1", 0),
+        2: ("scan2", 1),
+        3: ("scan3", 2),
+    }
+
+
+def test_upsert_on_unique_key(storage_engine):
+    # `CosmicDB_File.local_uri` is unique, and the ID is generated
+    assert storage_engine.upsert_entities([
+        (entities.CosmicDB_File, {"local_uri": "/a"}),
+        (entities.CosmicDB_File, {"local_uri": "/b"}),
+    ]) == (2, 0)
+    assert storage_engine.upsert_entities([
+        (entities.CosmicDB_File, {"local_uri": "/b"}),
+        (entities.CosmicDB_File, {"local_uri": "/c"}),
+    ]) == (1, 1)
+    with storage_engine.session() as session:
+        assert session.scalars(
+            sqlalchemy.select(entities.CosmicDB_File.local_uri).order_by(entities.CosmicDB_File.id)
+        ).all() == ["/a", "/b", "/c"]
+
+    with pytest.raises(ValueError):
+        storage_engine.upsert_entities([(entities.CosmicDB_File, {"local_uri": "/d"})], conflict_colnames=["id"])